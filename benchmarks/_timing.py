@@ -0,0 +1,35 @@
+"""Timing helper shared by the benchmark scripts."""
+
+import time
+import tracemalloc
+from typing import Callable
+
+
+def measure(
+    name: str, fn: Callable[[], object], repeats: int, peak_memory: bool = True
+) -> None:
+    """Print the mean time of fn over repeats calls, after one warmup call.
+
+    Args:
+        name: Label printed in front of the results.
+        fn: Function to benchmark.
+        repeats: Number of timed calls.
+        peak_memory: Also run fn once under tracemalloc and print its peak.
+    """
+    fn()
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    elapsed_ms = (time.perf_counter() - start) / repeats * 1000
+
+    if not peak_memory:
+        print(f"{name:<32} {elapsed_ms:8.1f} ms")
+        return
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{name:<32} {elapsed_ms:8.1f} ms {peak / 1024**2:10.1f} MiB peak")
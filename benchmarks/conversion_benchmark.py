@@ -0,0 +1,36 @@
+"""Compare float to uint8 conversion paths on a 4K float32 image.
+
+Run with `poetry run python benchmarks/conversion_benchmark.py`.
+"""
+
+from functools import partial
+
+import numpy as np
+from _timing import measure
+
+from mash.images import to_uint8
+
+_REPEATS = 10
+_measure = partial(measure, repeats=_REPEATS)
+
+
+def _naive(image: np.ndarray) -> np.ndarray:
+    return (image * 255).astype(np.uint8)
+
+
+def main():
+    image = np.random.rand(2160, 3840, 3).astype(np.float32)
+    out = np.empty(image.shape, dtype=np.uint8)
+    print(f"Input: {image.shape} {image.dtype}, {image.nbytes / 1024**2:.1f} MiB")
+
+    _measure("(image * 255).astype", lambda: _naive(image))
+    _measure("to_uint8", lambda: to_uint8(image))
+    _measure("to_uint8(out=)", lambda: to_uint8(image, out=out))
+
+    image64 = image.astype(np.float64)
+    _measure("float64 (image * 255).astype", lambda: _naive(image64))
+    _measure("float64 to_uint8(out=)", lambda: to_uint8(image64, out=out))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Compare standardize paths on a 1080p image.
+
+Run with `poetry run python benchmarks/normalization_benchmark.py`.
+"""
+
+from functools import partial
+
+import numpy as np
+from _timing import measure
+
+from mash.images import standardize
+from mash.images.normalization import IMAGENET_MEAN, IMAGENET_STD
+
+_REPEATS = 10
+_measure = partial(measure, repeats=_REPEATS)
+
+
+def _naive(image: np.ndarray) -> np.ndarray:
+    return (image.astype(np.float32) / 255.0 - IMAGENET_MEAN) / IMAGENET_STD
+
+
+def main():
+    image = np.random.randint(0, 256, size=(1080, 1920, 3), dtype=np.uint8)
+    image_float = image.astype(np.float32) / 255
+    out = np.empty(image.shape, dtype=np.float32)
+
+    _measure("naive float64", lambda: _naive(image))
+    _measure("uint8 lookup table", lambda: standardize(image, "imagenet"))
+    _measure("uint8 lookup table out=", lambda: standardize(image, "imagenet", out=out))
+    _measure(
+        "uint8 lookup table float16",
+        lambda: standardize(image, "imagenet", dtype=np.float16),
+    )
+    _measure("float32 out=", lambda: standardize(image_float, "imagenet", out=out))
+
+
+if __name__ == "__main__":
+    main()
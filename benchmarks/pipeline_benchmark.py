@@ -0,0 +1,47 @@
+"""Compare the fused pipeline with running crop, resize and standardize in turn.
+
+Run with `poetry run python benchmarks/pipeline_benchmark.py`.
+"""
+
+from functools import partial
+
+import numpy as np
+from _timing import measure
+
+from mash.images import (
+    CenterSquareCrop,
+    Pipeline,
+    ResizeMinSide,
+    Standardize,
+    center_square_crop,
+    resize_image_min_side,
+    standardize,
+)
+
+_REPEATS = 5
+_measure = partial(measure, repeats=_REPEATS)
+
+
+def _steps(image: np.ndarray, backend: str) -> np.ndarray:
+    cropped = center_square_crop(image, 1024)
+    resized = resize_image_min_side(cropped, 224, backend=backend)
+    standardized = standardize(resized.astype(np.uint8), "imagenet")
+    return np.ascontiguousarray(standardized.transpose(2, 0, 1), dtype=np.float32)
+
+
+def main():
+    image = np.random.randint(0, 256, size=(1080, 1920, 3), dtype=np.uint8)
+    transform = Pipeline(
+        [CenterSquareCrop(1024), ResizeMinSide(224), Standardize("imagenet")]
+    )
+
+    _measure("steps skimage", lambda: _steps(image, "skimage"))
+    _measure("steps pillow", lambda: _steps(image, "pillow"))
+    _measure("Pipeline", lambda: transform(image))
+
+    transform16 = Pipeline(transform.steps, dtype=np.float16)
+    _measure("Pipeline float16", lambda: transform16(image))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Compare resize backends on a 4K image, a batch and a stream of 1080p frames.
+
+Run with `poetry run python benchmarks/resize_benchmark.py`.
+"""
+
+from functools import partial
+from itertools import product
+
+import numpy as np
+from _timing import measure
+
+from mash.images import resize_image_min_side, resize_image_min_side_many
+
+_REPEATS = 5
+_measure = partial(measure, repeats=_REPEATS, peak_memory=False)
+
+
+def main():
+    image = np.random.randint(0, 256, size=(2160, 3840, 3), dtype=np.uint8)
+    images = {"uint8": image, "float32": image.astype(np.float32) / 255}
+
+    for (dtype, array), interpolation, backend in product(
+        images.items(), ["bilinear", "bicubic"], ["skimage", "pillow", "torch"]
+    ):
+        _measure(
+            f"{dtype} {interpolation} {backend}",
+            lambda: resize_image_min_side(
+                array, 224, interpolation=interpolation, backend=backend
+            ),
+        )
+
+    stack = np.random.randint(0, 256, size=(32, 1080, 1920, 3), dtype=np.uint8)
+    for backend in ["pillow", "torch"]:
+        _measure(
+            f"batch loop {backend}",
+            lambda: [resize_image_min_side(x, 224, backend=backend) for x in stack],
+        )
+        _measure(
+            f"batch many {backend}",
+            lambda: resize_image_min_side_many(stack, 224, backend=backend),
+        )
+
+    frame = stack[0]
+    _measure(
+        "frame pillow", lambda: resize_image_min_side(frame, 224, backend="pillow")
+    )
+    _measure("frame torch", lambda: resize_image_min_side(frame, 224, backend="torch"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Compare ways of tiling an 8k image and of stitching it back together.
+
+Run with `poetry run python benchmarks/tile_benchmark.py`.
+"""
+
+import os
+import tempfile
+from functools import partial
+
+import numpy as np
+import tifffile
+from _timing import measure
+
+from mash.images import (
+    image_to_tiles,
+    map_tiles,
+    tile_batches_from_uri,
+    tile_grid,
+    tiles_from_uri,
+    tiles_to_image,
+)
+
+_REPEATS = 3
+_measure = partial(measure, repeats=_REPEATS)
+
+
+def _blur(tile: np.ndarray) -> np.ndarray:
+    """A cheap 3x3 box blur standing in for a per-tile CPU workload."""
+    padded = np.pad(tile.astype(np.float32), ((1, 1), (1, 1), (0, 0)), mode="edge")
+    height, width = tile.shape[:2]
+    total = sum(
+        padded[y : y + height, x : x + width] for y in range(3) for x in range(3)
+    )
+    return (total / 9).astype(np.uint8)
+
+
+def main():
+    image = np.random.randint(0, 256, size=(8192, 8192, 3), dtype=np.uint8)
+    print(f"Input: {image.shape} {image.dtype}, {image.nbytes / 1024**2:.1f} MiB")
+
+    _measure("image_to_tiles", lambda: image_to_tiles(image, 512, 512, 64, 64))
+    _measure("tile_grid", lambda: tile_grid(image, 512, 512, 64, 64))
+    _measure("tile_grid(copy=True)", lambda: tile_grid(image, 512, 512, 64, 64, True))
+
+    tiles = image_to_tiles(image, 512, 512, 64, 64)
+    height, width = image.shape[:2]
+    for blend in ("mean", "max", "feather"):
+        _measure(
+            f"tiles_to_image({blend})",
+            lambda: tiles_to_image(tiles, width, height, 64, 64, blend=blend),
+        )
+    _measure(
+        "tiles_to_image(chunk_rows=1)",
+        lambda: tiles_to_image(tiles, width, height, 64, 64, chunk_rows=1),
+    )
+
+    workers = max(os.cpu_count() or 1, 2)
+    _measure("map_tiles", lambda: map_tiles(image, _blur, 512, 512, 64, 64))
+    _measure(
+        f"map_tiles(workers={workers})",
+        lambda: map_tiles(image, _blur, 512, 512, 64, 64, workers=workers),
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "tiled.tif")
+        tifffile.imwrite(path, image, tile=(256, 256))
+        _measure(
+            "tiles_from_uri",
+            lambda: sum(1 for _ in tiles_from_uri(path, 512, 512, 64, 64)),
+        )
+        _measure(
+            "tile_batches_from_uri(16)",
+            lambda: sum(1 for _ in tile_batches_from_uri(path, 512, 512, 16, 64, 64)),
+        )
+
+
+if __name__ == "__main__":
+    main()
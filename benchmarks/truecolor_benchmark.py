@@ -0,0 +1,44 @@
+"""Compare expanding grayscale to RGB and compositing RGBA over a background.
+
+Run with `poetry run python benchmarks/truecolor_benchmark.py`.
+"""
+
+from functools import partial
+
+import numpy as np
+from _timing import measure
+
+from mash.images import grayscale_to_rgb, transparent_to_rgb
+
+_REPEATS = 5
+_measure = partial(measure, repeats=_REPEATS)
+
+
+def _composite_float(image: np.ndarray, background: np.ndarray) -> np.ndarray:
+    """Straightforward float64 compositing, as a reference."""
+    alpha = image[..., 3:] / 255
+    composited = image[..., :3] * alpha + background * (1 - alpha)
+    return np.rint(composited).astype(np.uint8)
+
+
+def main():
+    gray = np.random.randint(0, 256, size=(4096, 4096), dtype=np.uint8)
+    rgba = np.random.randint(0, 256, size=(4096, 4096, 4), dtype=np.uint8)
+    background = np.array([255, 255, 255])
+    print(f"Input: {rgba.shape} {rgba.dtype}, {rgba.nbytes / 1024**2:.1f} MiB")
+
+    _measure("grayscale_to_rgb", lambda: grayscale_to_rgb(gray))
+    _measure("grayscale_to_rgb(view=True)", lambda: grayscale_to_rgb(gray, view=True))
+
+    _measure("composite in float64", lambda: _composite_float(rgba, background))
+    _measure(
+        "transparent_to_rgb(background)", lambda: transparent_to_rgb(rgba, background)
+    )
+    _measure(
+        "transparent_to_rgb(premultiplied)",
+        lambda: transparent_to_rgb(rgba, background, premultiplied=True),
+    )
+
+
+if __name__ == "__main__":
+    main()
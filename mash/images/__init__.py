@@ -1,12 +1,59 @@
-from .conversion import to_numpy, to_pil, to_tensor
+from .async_conversion import ato_numpy, ato_pil, ato_tensor, set_async_concurrency
+from .cache import (
+    disable_decoded_cache,
+    disable_disk_cache,
+    enable_decoded_cache,
+    enable_disk_cache,
+    get_decoded_cache,
+    get_disk_cache,
+)
+from .conversion import (
+    to_numpy,
+    to_numpy_many,
+    to_pil,
+    to_tensor,
+    to_tensor_many,
+    to_uint8,
+)
 from .crop import (
     center_square_crop,
+    center_square_crop_batch,
     crop_rectangle,
+    crop_rectangle_batch,
+    crop_rectangle_from_uri,
     crop_square,
+    crop_square_batch,
     crop_to_multiple_of_dimension,
     random_square_crop,
+    random_square_crop_batch,
+    sample_square_crops,
+)
+from .dataset_stats import RunningMeanStd, compute_mean_std, load_mean_std
+from .fetch import configure_http, configure_s3
+from .info import ImageInfo, image_info, image_info_many
+from .normalization import register_dataset, standardize
+from .pipeline import (
+    CenterSquareCrop,
+    Pipeline,
+    ResizeMaxSide,
+    ResizeMinSide,
+    Standardize,
+)
+from .region import decode_region, is_tiled
+from .resize import (
+    resize_image_max_side,
+    resize_image_max_side_many,
+    resize_image_min_side,
+    resize_image_min_side_many,
+    resize_pillow,
+    set_resize_backend,
+)
+from .tile import (
+    image_to_tiles,
+    map_tiles,
+    tile_batches_from_uri,
+    tile_grid,
+    tiles_from_uri,
+    tiles_to_image,
 )
-from .normalization import standardize
-from .resize import resize_image_max_side, resize_image_min_side
-from .tile import image_to_tiles
 from .truecolor import grayscale_to_rgb, transparent_to_rgb
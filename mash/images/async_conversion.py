@@ -0,0 +1,146 @@
+import asyncio
+import weakref
+from concurrent.futures import Executor
+from functools import partial
+from typing import Callable, TypeVar
+
+import numpy as np
+import torch
+from PIL import Image
+
+from mash.images import cache, conversion
+from mash.images.conversion import ImageInput
+
+_R = TypeVar("_R")
+
+_max_concurrency = 64
+_semaphores: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def set_async_concurrency(limit: int) -> None:
+    """Set the maximum number of in-flight fetches per event loop.
+
+    Args:
+        limit: Maximum number of concurrent downloads or file opens.
+    """
+    global _max_concurrency
+
+    if limit <= 0:
+        raise ValueError("Concurrency limit must be a positive integer.")
+
+    _max_concurrency = limit
+    _semaphores.clear()
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    """Return the fetch semaphore for the running loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(_max_concurrency)
+        _semaphores[loop] = semaphore
+
+    return semaphore
+
+
+async def _convert(
+    image: ImageInput,
+    convert: Callable[[ImageInput], _R],
+    executor: Executor | None,
+    decodes_uri: bool = False,
+) -> _R:
+    loop = asyncio.get_running_loop()
+
+    if isinstance(image, str):
+        async with _get_semaphore():
+            # Conversions that read uris through the decoded cache get the uri
+            # itself, so a hit skips the fetch and the decode.
+            if decodes_uri and cache.get_decoded_cache() is not None:
+                return await loop.run_in_executor(executor, convert, image)
+
+            # Fetching is I/O bound, so it runs on the default executor and is
+            # bounded by the per-loop semaphore.
+            image = await loop.run_in_executor(None, conversion.pil_from_uri, image)
+
+    # Decoding and conversion are CPU bound, so they go to the given executor.
+    return await loop.run_in_executor(executor, convert, image)
+
+
+def _to_loaded_pil(
+    image: ImageInput, max_side: int | None = None, min_side: int | None = None
+) -> Image.Image:
+    pil_image = conversion.to_pil(image, max_side=max_side, min_side=min_side)
+    pil_image.load()
+    return pil_image
+
+
+async def ato_pil(
+    image: ImageInput,
+    executor: Executor | None = None,
+    max_side: int | None = None,
+    min_side: int | None = None,
+) -> Image.Image:
+    """Asynchronously create a PIL Image from a variety of input types.
+
+    The image is fully decoded before returning, so no work is left to run lazily
+    on the event loop.
+
+    Args:
+        image: Input to convert, can be a file path, URL or an array.
+        executor: Executor for decoding, defaults to the loop's default executor.
+        max_side: Optional decode size hint, see `mash.images.to_numpy`.
+        min_side: Optional decode size hint, see `mash.images.to_numpy`.
+
+    Returns:
+        PIL image, if the input is not uint8 it will be assumed to be 0-1 and scaled.
+    """
+    convert = partial(_to_loaded_pil, max_side=max_side, min_side=min_side)
+    return await _convert(image, convert, executor)
+
+
+async def ato_numpy(
+    image: ImageInput,
+    executor: Executor | None = None,
+    max_side: int | None = None,
+    min_side: int | None = None,
+) -> np.ndarray:
+    """Asynchronously create a numpy array from a variety of input types.
+
+    Args:
+        image: Input to convert, can be a file path, URL or an array.
+        executor: Executor for decoding, defaults to the loop's default executor.
+            With the decoded cache enabled, uris are read through the cache of
+            the process the executor runs in.
+        max_side: Optional decode size hint, see `mash.images.to_numpy`.
+        min_side: Optional decode size hint, see `mash.images.to_numpy`.
+
+    Returns:
+        Numpy array, either uint8 for PIL images or the same type as the input.
+    """
+    convert = partial(conversion.to_numpy, max_side=max_side, min_side=min_side)
+    return await _convert(image, convert, executor, decodes_uri=True)
+
+
+async def ato_tensor(
+    image: ImageInput,
+    executor: Executor | None = None,
+    max_side: int | None = None,
+    min_side: int | None = None,
+) -> torch.Tensor:
+    """Asynchronously create a torch.Tensor from a variety of input types.
+
+    Args:
+        image: Input to convert, can be a file path, URL or an array.
+        executor: Executor for decoding, defaults to the loop's default executor.
+            With the decoded cache enabled, uris are read through the cache of
+            the process the executor runs in.
+        max_side: Optional decode size hint, see `mash.images.to_numpy`.
+        min_side: Optional decode size hint, see `mash.images.to_numpy`.
+
+    Returns:
+        PyTorch Tensor, either uint8 for PIL images or the same type as the input.
+    """
+    convert = partial(conversion.to_tensor, max_side=max_side, min_side=min_side)
+    return await _convert(image, convert, executor, decodes_uri=True)
@@ -0,0 +1,73 @@
+import asyncio
+import os
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+from PIL import Image
+
+from mash.images import async_conversion, cache
+
+
+class TestAsyncConversion(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.npy_array = np.random.rand(100, 100, 3)
+        self.test_file_path = "test_image_async.png"
+        Image.new("RGB", (100, 50), color=(10, 20, 30)).save(self.test_file_path)
+
+    def tearDown(self):
+        os.remove(self.test_file_path)
+
+    async def test_path_returns_loaded_pil(self):
+        result = await async_conversion.ato_pil(self.test_file_path)
+        self.assertIsInstance(result, Image.Image)
+        self.assertEqual(result.getpixel((0, 0)), (10, 20, 30))
+
+    async def test_path_returns_numpy(self):
+        result = await async_conversion.ato_numpy(self.test_file_path)
+        self.assertIsInstance(result, np.ndarray)
+        self.assertEqual(result.shape, (50, 100, 3))
+
+    async def test_numpy_returns_tensor(self):
+        result = await async_conversion.ato_tensor(self.npy_array)
+        self.assertIsInstance(result, torch.Tensor)
+
+    async def test_many_concurrent_with_executor(self):
+        async_conversion.set_async_concurrency(2)
+        self.addCleanup(async_conversion.set_async_concurrency, 64)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = await asyncio.gather(
+                *[
+                    async_conversion.ato_numpy(self.test_file_path, executor=executor)
+                    for _ in range(8)
+                ]
+            )
+        self.assertEqual(len(results), 8)
+        for result in results:
+            self.assertEqual(result.shape, (50, 100, 3))
+
+    async def test_path_uses_decoded_cache(self):
+        decoded_cache = cache.enable_decoded_cache()
+        self.addCleanup(cache.disable_decoded_cache)
+
+        for _ in range(3):
+            result = await async_conversion.ato_numpy(self.test_file_path)
+            self.assertEqual(result.shape, (50, 100, 3))
+        tensor = await async_conversion.ato_tensor(self.test_file_path)
+
+        self.assertEqual(tensor.shape, (50, 100, 3))
+        self.assertEqual(decoded_cache.stats()["hits"], 3)
+        self.assertEqual(decoded_cache.stats()["misses"], 1)
+
+    async def test_invalid_input_type_raises(self):
+        with self.assertRaises(TypeError):
+            await async_conversion.ato_numpy(12345)
+
+    def test_invalid_concurrency_raises(self):
+        with self.assertRaises(ValueError):
+            async_conversion.set_async_concurrency(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
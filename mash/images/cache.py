@@ -0,0 +1,300 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Hashable
+
+import numpy as np
+from loguru import logger
+
+# Prefix for partially written entries, these are never served or counted.
+_TEMP_PREFIX = ".tmp-"
+
+# After going over budget, evict down to this fraction so we don't rescan the
+# directory on every write.
+_LOW_WATER_FRACTION = 0.9
+
+
+class DiskCache:
+    def __init__(self, directory: str, max_bytes: int):
+        """Content-addressed on-disk cache of raw file bytes with LRU eviction.
+
+        Entries are keyed by a hash of the uri and written atomically, so several
+        processes can safely share one directory. Recency is tracked through file
+        modification times, which are bumped on every hit.
+
+        Args:
+            directory: Directory to store cached files in, created if missing.
+            max_bytes: Size budget for the cache in bytes.
+        """
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be a positive integer.")
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._size_bytes = sum(size for _, _, size in self._scan())
+
+    def path_for(self, key: str) -> str:
+        """Return the path an entry for key is stored at."""
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def get(self, key: str) -> bytes | None:
+        """Return the cached bytes for key, or None on a miss."""
+        path = self.path_for(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            # Missing, or evicted by another process since we looked.
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes | memoryview) -> None:
+        """Atomically store data for key, evicting old entries if over budget."""
+        path = self.path_for(key)
+        shard = os.path.dirname(path)
+        os.makedirs(shard, exist_ok=True)
+
+        # Write to a temporary file next to the target and rename it into place,
+        # readers see either nothing or the complete file.
+        fd, temp_path = tempfile.mkstemp(dir=shard, prefix=_TEMP_PREFIX)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            # Rewriting an entry replaces its size rather than adding to it.
+            try:
+                replaced_bytes = os.stat(path).st_size
+            except FileNotFoundError:
+                replaced_bytes = 0
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        with self._lock:
+            self._size_bytes += len(data) - replaced_bytes
+            over_budget = self._size_bytes > self.max_bytes
+
+        if over_budget:
+            self.evict()
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache is under budget."""
+        entries = sorted(self._scan(), key=lambda entry: entry[1])
+        size_bytes = sum(size for _, _, size in entries)
+        target_bytes = int(self.max_bytes * _LOW_WATER_FRACTION)
+
+        for path, _, size in entries:
+            if size_bytes <= target_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                # Another process got here first.
+                pass
+            size_bytes -= size
+
+        with self._lock:
+            self._size_bytes = size_bytes
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters."""
+        for path, _, _ in self._scan():
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+        with self._lock:
+            self._size_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss counters and the approximate size of the cache."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size_bytes": self._size_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _scan(self) -> list[tuple[str, float, int]]:
+        """Return (path, mtime, size) for every complete entry."""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.startswith(_TEMP_PREFIX):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((path, stat.st_mtime, stat.st_size))
+
+        return entries
+
+
+_disk_cache: DiskCache | None = None
+
+
+def enable_disk_cache(directory: str, max_bytes: int = 10 * 1024**3) -> DiskCache:
+    """Cache remote images on local disk, shared by every process using directory.
+
+    Args:
+        directory: Directory to store cached files in.
+        max_bytes: Size budget in bytes, least recently used files are evicted.
+
+    Returns:
+        The active cache, useful for inspecting stats.
+    """
+    global _disk_cache
+
+    _disk_cache = DiskCache(directory, max_bytes)
+    logger.debug(f"Caching remote images in {directory}")
+    return _disk_cache
+
+
+def disable_disk_cache() -> None:
+    """Stop caching remote images, files already on disk are left in place."""
+    global _disk_cache
+
+    _disk_cache = None
+
+
+def get_disk_cache() -> DiskCache | None:
+    """Return the active disk cache, or None if caching is disabled."""
+    return _disk_cache
+
+
+class DecodedCache:
+    def __init__(self, max_bytes: int):
+        """In-memory LRU cache of decoded images bounded by total array bytes.
+
+        Cached arrays are read-only so callers can't corrupt them for each other.
+        Entries for local files remember the file's mtime and size and are dropped
+        if either changes.
+
+        Args:
+            max_bytes: Size budget for the cache in bytes.
+        """
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be a positive integer.")
+
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._size_bytes = 0
+        self._entries: OrderedDict[Hashable, tuple[tuple | None, np.ndarray]] = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: tuple | None = None) -> np.ndarray | None:
+        """Return the cached array for key if it matches version, else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] != version:
+                # The file changed underneath us, the entry is stale.
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(
+        self, key: Hashable, array: np.ndarray, version: tuple | None = None
+    ) -> np.ndarray:
+        """Store array for key and return it, marked read-only."""
+        array.flags.writeable = False
+        if array.nbytes > self.max_bytes:
+            return array
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = (version, array)
+            self._size_bytes += array.nbytes
+
+            # Evict least recently used entries until we're back under budget.
+            while self._size_bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+        return array
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss counters, number of entries and total size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "size_bytes": self._size_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+    def _remove(self, key: Hashable) -> None:
+        _, array = self._entries.pop(key)
+        self._size_bytes -= array.nbytes
+
+
+_decoded_cache: DecodedCache | None = None
+
+
+def enable_decoded_cache(max_bytes: int = 1024**3) -> DecodedCache:
+    """Cache decoded images from paths and URLs in memory, process wide.
+
+    While enabled, arrays returned by `to_numpy` for paths and URLs are read-only.
+    Calling this again replaces the cache, dropping existing entries.
+
+    Args:
+        max_bytes: Size budget in bytes, least recently used arrays are evicted.
+
+    Returns:
+        The active cache, useful for inspecting stats.
+    """
+    global _decoded_cache
+
+    _decoded_cache = DecodedCache(max_bytes)
+    return _decoded_cache
+
+
+def disable_decoded_cache() -> None:
+    """Stop caching decoded images and release the cached arrays."""
+    global _decoded_cache
+
+    _decoded_cache = None
+
+
+def get_decoded_cache() -> DecodedCache | None:
+    """Return the active decoded image cache, or None if caching is disabled."""
+    return _decoded_cache
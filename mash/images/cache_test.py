@@ -0,0 +1,137 @@
+import os
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from mash.images import cache
+
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = self.temp_dir.name
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_miss_then_hit(self):
+        disk_cache = cache.DiskCache(self.directory, max_bytes=1024)
+        self.assertIsNone(disk_cache.get("http://example.com/cat.png"))
+
+        disk_cache.put("http://example.com/cat.png", b"meow")
+        self.assertEqual(disk_cache.get("http://example.com/cat.png"), b"meow")
+
+        stats = disk_cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["size_bytes"], 4)
+
+    def test_entries_are_content_addressed(self):
+        disk_cache = cache.DiskCache(self.directory, max_bytes=1024)
+        path = disk_cache.path_for("http://example.com/cat.png")
+        self.assertTrue(path.startswith(self.directory))
+        self.assertNotIn("cat", os.path.basename(path))
+        self.assertEqual(path, disk_cache.path_for("http://example.com/cat.png"))
+
+    def test_eviction_removes_least_recently_used(self):
+        disk_cache = cache.DiskCache(self.directory, max_bytes=250)
+        disk_cache.put("a", b"a" * 100)
+        disk_cache.put("b", b"b" * 100)
+
+        # Make "a" the oldest, then touch it so "b" becomes least recently used.
+        past = time.time() - 100
+        os.utime(disk_cache.path_for("a"), (past, past))
+        os.utime(disk_cache.path_for("b"), (past + 1, past + 1))
+        disk_cache.get("a")
+
+        disk_cache.put("c", b"c" * 100)
+
+        self.assertEqual(disk_cache.get("a"), b"a" * 100)
+        self.assertIsNone(disk_cache.get("b"))
+        self.assertEqual(disk_cache.get("c"), b"c" * 100)
+        self.assertLessEqual(disk_cache.stats()["size_bytes"], 250)
+
+    def test_rewriting_an_entry_replaces_its_size(self):
+        disk_cache = cache.DiskCache(self.directory, max_bytes=1024)
+        for _ in range(3):
+            disk_cache.put("a", b"a" * 100)
+        disk_cache.put("a", b"a" * 40)
+        self.assertEqual(disk_cache.stats()["size_bytes"], 40)
+
+    def test_existing_entries_are_counted(self):
+        cache.DiskCache(self.directory, max_bytes=1024).put("a", b"a" * 10)
+        disk_cache = cache.DiskCache(self.directory, max_bytes=1024)
+        self.assertEqual(disk_cache.stats()["size_bytes"], 10)
+        self.assertEqual(disk_cache.get("a"), b"a" * 10)
+
+    def test_clear_removes_entries(self):
+        disk_cache = cache.DiskCache(self.directory, max_bytes=1024)
+        disk_cache.put("a", b"a")
+        disk_cache.clear()
+        self.assertIsNone(disk_cache.get("a"))
+        self.assertEqual(disk_cache.stats()["size_bytes"], 0)
+
+    def test_invalid_budget_raises(self):
+        with self.assertRaises(ValueError):
+            cache.DiskCache(self.directory, max_bytes=0)
+
+    def test_enable_and_disable(self):
+        disk_cache = cache.enable_disk_cache(self.directory, max_bytes=1024)
+        self.assertIs(cache.get_disk_cache(), disk_cache)
+        cache.disable_disk_cache()
+        self.assertIsNone(cache.get_disk_cache())
+
+
+class TestDecodedCache(unittest.TestCase):
+    def test_put_returns_read_only_array(self):
+        decoded_cache = cache.DecodedCache(max_bytes=1024)
+        array = decoded_cache.put("a", np.zeros((4, 4), dtype=np.uint8))
+        self.assertFalse(array.flags.writeable)
+        self.assertIs(decoded_cache.get("a"), array)
+
+    def test_evicts_by_bytes(self):
+        decoded_cache = cache.DecodedCache(max_bytes=250)
+        decoded_cache.put("a", np.zeros(100, dtype=np.uint8))
+        decoded_cache.put("b", np.zeros(100, dtype=np.uint8))
+        decoded_cache.get("a")
+        decoded_cache.put("c", np.zeros(100, dtype=np.uint8))
+
+        self.assertIsNotNone(decoded_cache.get("a"))
+        self.assertIsNone(decoded_cache.get("b"))
+        self.assertIsNotNone(decoded_cache.get("c"))
+        self.assertEqual(decoded_cache.stats()["size_bytes"], 200)
+
+    def test_oversized_array_is_not_cached(self):
+        decoded_cache = cache.DecodedCache(max_bytes=10)
+        decoded_cache.put("a", np.zeros(100, dtype=np.uint8))
+        self.assertIsNone(decoded_cache.get("a"))
+        self.assertEqual(decoded_cache.stats()["entries"], 0)
+
+    def test_version_mismatch_invalidates(self):
+        decoded_cache = cache.DecodedCache(max_bytes=1024)
+        decoded_cache.put("a", np.zeros(10, dtype=np.uint8), version=(1, 10))
+        self.assertIsNotNone(decoded_cache.get("a", version=(1, 10)))
+        self.assertIsNone(decoded_cache.get("a", version=(2, 10)))
+        self.assertEqual(decoded_cache.stats()["entries"], 0)
+
+    def test_clear_resets(self):
+        decoded_cache = cache.DecodedCache(max_bytes=1024)
+        decoded_cache.put("a", np.zeros(10, dtype=np.uint8))
+        decoded_cache.get("a")
+        decoded_cache.clear()
+        self.assertEqual(
+            decoded_cache.stats(),
+            {"hits": 0, "misses": 0, "entries": 0, "size_bytes": 0, "max_bytes": 1024},
+        )
+
+    def test_enable_and_disable(self):
+        decoded_cache = cache.enable_decoded_cache(max_bytes=1024)
+        self.assertIs(cache.get_decoded_cache(), decoded_cache)
+        cache.disable_decoded_cache()
+        self.assertIsNone(cache.get_decoded_cache())
+
+
+if __name__ == "__main__":
+    unittest.main()
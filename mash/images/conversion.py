@@ -1,108 +1,599 @@
-from io import BytesIO
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Sequence, TypeVar
 
 import numpy as np
-import requests
 import torch
 from PIL import Image
 from pillow_heif import register_heif_opener
 
+from mash.images import cache, fetch
+
 register_heif_opener()
 
+_T = TypeVar("_T")
+_R = TypeVar("_R")
+
+ImageInput = str | np.ndarray | Image.Image | torch.Tensor
+
+_TENSOR_LAYOUTS = ("hwc", "chw", "channels_last")
+
+# Number of elements converted at a time, bounds the float32 scratch buffer.
+_CONVERSION_BLOCK_SIZE = 1 << 18
+
+
+def _float_to_uint8(image: np.ndarray, out: np.ndarray) -> None:
+    """Scale a 0-1 float image into out, processing blocks of rows at a time."""
+    row_size = max(1, image[:1].size)
+    rows_per_block = max(1, _CONVERSION_BLOCK_SIZE // row_size)
+    scratch = np.empty((rows_per_block,) + image.shape[1:], dtype=np.float32)
+
+    for start in range(0, image.shape[0], rows_per_block):
+        src = image[start : start + rows_per_block]
+        buffer = scratch[: len(src)]
+
+        # Scale in float32 even for float64 inputs, then clip before rounding so
+        # values slightly outside 0-1 saturate instead of wrapping around.
+        np.multiply(src, np.float32(255), out=buffer, dtype=np.float32)
+        np.clip(buffer, 0, 255, out=buffer)
+        np.rint(buffer, out=buffer)
+        np.copyto(out[start : start + rows_per_block], buffer, casting="unsafe")
+
+
+def _tensor_to_uint8(image: torch.Tensor) -> torch.Tensor:
+    """Scale a 0-1 float tensor to uint8 on its own device."""
+    if image.dtype == torch.uint8:
+        return image
+    if not image.is_floating_point():
+        raise ValueError(f"Image must be of type uint8 or float, got {image.dtype}")
+
+    # One float temporary on the device, then only the uint8 result moves.
+    return image.mul(255).clamp_(0, 255).round_().to(torch.uint8)
+
+
+def to_uint8(
+    image: np.ndarray | torch.Tensor, out: np.ndarray | None = None
+) -> np.ndarray:
+    """Convert a 0-1 float image to a uint8 numpy array, clipping and rounding.
+
+    Works in small float32 blocks, so the only full size allocation is the output.
+    Tensors are converted on their own device before being copied to the CPU.
+
+    Args:
+        image: Image to convert, uint8 or floating point in the range 0-1.
+        out: Optional uint8 array to write the result into, must match the shape.
+
+    Returns:
+        The uint8 image, out if it was given.
+    """
+    if out is not None:
+        if out.dtype != np.uint8:
+            raise ValueError(f"Output must be of type uint8, got {out.dtype}")
+        if tuple(out.shape) != tuple(image.shape):
+            raise ValueError(
+                f"Output shape {out.shape} does not match image shape {image.shape}."
+            )
+
+    if isinstance(image, torch.Tensor):
+        tensor = _tensor_to_uint8(image.detach())
+        if out is None:
+            return tensor.cpu().numpy()
+        torch.from_numpy(out).copy_(tensor)
+        return out
 
-def _maybe_convert_to_uint8(image: np.ndarray) -> np.ndarray:
     if image.dtype not in (np.uint8, np.float16, np.float32, np.float64):
         raise ValueError(f"Image must be of type uint8 or float32, got {image.dtype}")
 
-    if image.dtype in (np.float32, np.float16, np.float64):
-        image = (image * 255).astype(np.uint8)
+    if image.dtype == np.uint8:
+        if out is None:
+            return image
+        np.copyto(out, image)
+        return out
+
+    if out is None:
+        out = np.empty(image.shape, dtype=np.uint8)
+    if image.ndim == 0:
+        _float_to_uint8(image.reshape(1), out.reshape(1))
+    else:
+        _float_to_uint8(image, out)
+
+    return out
+
+
+def _reduce_to_target(
+    image: Image.Image,
+    max_side: int | None = None,
+    min_side: int | None = None,
+    draft: bool = False,
+) -> Image.Image:
+    """Cheaply shrink an image while keeping the requested side at least as large.
+
+    With draft, JPEGs are decoded directly at a smaller power of two scale. Draft
+    mode changes the image in place, so it is only used on images opened here.
+    Anything left over is reduced by an integer factor with a fast box filter.
+    """
+    if max_side is None and min_side is None:
+        return image
+    if max_side is not None and min_side is not None:
+        raise ValueError("Cannot specify both max_side and min_side.")
+
+    target = max_side if max_side is not None else min_side
+    assert target is not None
+    if target <= 0:
+        raise ValueError("Side length must be a positive integer.")
+
+    width, height = image.size
+    side = max(width, height) if max_side is not None else min(width, height)
+    scale = side / target
+    if scale < 2:
+        return image
+
+    # Draft only picks scales that keep the image at least the requested size, and
+    # is a no-op for formats that don't support it or images that are loaded.
+    if draft:
+        requested = (math.ceil(width / scale), math.ceil(height / scale))
+        image.draft(image.mode, requested)
+
+    # Anything left over is reduced after decoding, rounding the factor down so
+    # the requested side never drops below the target.
+    width, height = image.size
+    side = max(width, height) if max_side is not None else min(width, height)
+    factor = side // target
+    if factor < 2:
+        return image
 
-    return image
+    try:
+        return image.reduce(factor)
+    except ValueError:
+        # Not every mode supports reduce, i.e. palette images.
+        return image
 
 
-def pil_from_uri(uri: str) -> Image.Image:
-    """Return a PIL image from an image file or URL.
+def pil_from_uri(
+    uri: str, max_side: int | None = None, min_side: int | None = None
+) -> Image.Image:
+    """Return a PIL image from an image file, URL or s3:// uri.
 
     Args:
-        uri: File path or url to the image.
+        uri: File path, url or s3:// uri of the image.
+        max_side: Optional hint to decode at a reduced size, the longest side will
+            be at least this long.
+        min_side: Optional hint to decode at a reduced size, the shortest side will
+            be at least this long.
 
     Returns:
         PIL image.
     """
-    if uri.startswith("http://") or uri.startswith("https://"):
-        # The uri is a URL
-        response = requests.get(uri)
-        response.raise_for_status()  # Raise an error for bad responses
-        return Image.open(BytesIO(response.content))
+    if fetch.is_remote(uri):
+        # The uri is a URL or S3 object, streamed over a shared connection pool.
+        image = Image.open(fetch.read_remote(uri))
     else:
         # The uri is a file path
-        return Image.open(uri)
+        image = Image.open(uri)
+
+    return _reduce_to_target(image, max_side=max_side, min_side=min_side, draft=True)
+
+
+def _pil_to_numpy(image: Image.Image, writeable: bool = True) -> np.ndarray:
+    """Return the pixels of a PIL image.
+
+    Read-only arrays wrap the bytes exported by Pillow directly, writeable ones
+    need one more copy.
+    """
+    return np.array(image) if writeable else np.asarray(image)
 
 
-def to_numpy(image: str | np.ndarray | Image.Image | torch.Tensor) -> np.ndarray:
+def _decode_uri(
+    uri: str,
+    max_side: int | None = None,
+    min_side: int | None = None,
+    writeable: bool = True,
+) -> np.ndarray:
+    """Decode a uri to a numpy array, going through the decoded cache if enabled."""
+    decoded_cache = cache.get_decoded_cache()
+    if decoded_cache is None:
+        pil_image = pil_from_uri(uri, max_side=max_side, min_side=min_side)
+        return _pil_to_numpy(pil_image, writeable=writeable)
+
+    # Local files are versioned by mtime and size so edits invalidate the entry.
+    version = None
+    if not fetch.is_remote(uri):
+        stat = os.stat(uri)
+        version = (stat.st_mtime_ns, stat.st_size)
+
+    key = (uri, max_side, min_side)
+    array = decoded_cache.get(key, version)
+    if array is None:
+        # Cached arrays are read-only anyway, so skip the writeable copy.
+        pil_image = pil_from_uri(uri, max_side=max_side, min_side=min_side)
+        array = _pil_to_numpy(pil_image, writeable=False)
+        array = decoded_cache.put(key, array, version)
+
+    return array
+
+
+def _write_into(array: np.ndarray, out: np.ndarray) -> np.ndarray:
+    """Copy array into a caller provided buffer after checking it fits."""
+    if out.shape != array.shape:
+        raise ValueError(
+            f"Output shape {out.shape} does not match image shape {array.shape}."
+        )
+    if out.dtype != array.dtype:
+        raise ValueError(
+            f"Output dtype {out.dtype} does not match image dtype {array.dtype}."
+        )
+
+    np.copyto(out, array)
+    return out
+
+
+def to_numpy(
+    image: ImageInput,
+    max_side: int | None = None,
+    min_side: int | None = None,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
     """Create a numpy array from a variety of input types.
 
     Args:
-        input: Input to convert to a numpy array, can be a file path or an array.
+        input: Input to convert to a numpy array, a path, URL, S3 uri or array.
+        max_side: Optional hint when decoding, the image is shrunk at decode time
+            while keeping the longest side at least this long.
+        min_side: Optional hint when decoding, the image is shrunk at decode time
+            while keeping the shortest side at least this long.
+        out: Optional array to write the pixels into, i.e. a slice of a batch or a
+            shared memory buffer. Must match the image shape and dtype exactly.
 
     Returns:
-        Numpy array, either uint8 for PIL images or the same type as the input.
+        Numpy array, either uint8 for PIL images or the same type as the input. Read
+        only for paths and URLs while the decoded cache is enabled. Returns out if
+        it was given.
     """
+    # Pixels only get copied once into out, so the source can be read-only.
+    writeable = out is None
+
     if isinstance(image, str):
-        pil_image = pil_from_uri(image)
-        return np.array(pil_image)
+        array = _decode_uri(
+            image, max_side=max_side, min_side=min_side, writeable=writeable
+        )
     elif isinstance(image, np.ndarray):
-        return image
+        array = image
     elif isinstance(image, Image.Image):
-        return np.array(image)
+        pil_image = _reduce_to_target(image, max_side=max_side, min_side=min_side)
+        array = _pil_to_numpy(pil_image, writeable=writeable)
     elif isinstance(image, torch.Tensor):
-        return image.cpu().numpy()
+        array = image.detach().cpu().numpy()
     else:
         raise TypeError(f"Unsupported input type: {type(image)}")
 
+    if out is None:
+        return array
+    return _write_into(array, out)
 
-def to_pil(image: str | np.ndarray | Image.Image | torch.Tensor) -> Image.Image:
+
+def to_pil(
+    image: ImageInput, max_side: int | None = None, min_side: int | None = None
+) -> Image.Image:
     """Create a PIL Image from a variety of input types.
 
     Args:
-        input: Input to convert to a numpy array, can be a file path or an array.
+        input: Input to convert to a numpy array, a path, URL, S3 uri or array.
+        max_side: Optional hint when decoding, the image is shrunk at decode time
+            while keeping the longest side at least this long.
+        min_side: Optional hint when decoding, the image is shrunk at decode time
+            while keeping the shortest side at least this long.
 
     Returns:
         PIL image, if the input is not uint8 it will be assumed to be 0-1 and scaled.
     """
     if isinstance(image, str):
-        return pil_from_uri(image)
+        return pil_from_uri(image, max_side=max_side, min_side=min_side)
     elif isinstance(image, np.ndarray):
-        image = _maybe_convert_to_uint8(image)
+        image = to_uint8(image)
         return Image.fromarray(image)
     elif isinstance(image, Image.Image):
-        return image
+        return _reduce_to_target(image, max_side=max_side, min_side=min_side)
     elif isinstance(image, torch.Tensor):
-        numpy = image.cpu().numpy()
-        numpy = _maybe_convert_to_uint8(numpy)
+        numpy = to_uint8(image)
         return Image.fromarray(numpy)
     else:
         raise TypeError(f"Unsupported input type: {type(image)}")
 
 
-def to_tensor(image: str | np.ndarray | Image.Image | torch.Tensor) -> torch.Tensor:
+def _wrap_numpy(array: np.ndarray) -> torch.Tensor:
+    """Wrap an array as a tensor, copying it only if it is read-only."""
+    if array.flags.writeable:
+        return torch.from_numpy(array)
+
+    # torch can't share read-only memory, so copy into a tensor it owns.
+    output = torch.from_numpy(np.empty(array.shape, dtype=array.dtype))
+    np.copyto(output.numpy(), array)
+    return output
+
+
+def _layout_view(tensor: torch.Tensor, layout: str) -> torch.Tensor:
+    """Return a view of an HW or HWC tensor in the requested layout."""
+    if layout == "hwc":
+        return tensor
+
+    if tensor.ndim == 2:
+        tensor = tensor.unsqueeze(-1)
+    if tensor.ndim != 3:
+        raise ValueError("Channel first layouts require a 2D or 3D image.")
+
+    return tensor.permute(2, 0, 1)
+
+
+def _copy_array(output: torch.Tensor, array: np.ndarray) -> None:
+    """Copy an array into a tensor without wrapping it, i.e. when it is read-only."""
+    if output.device.type == "cpu" and output.dtype != torch.bfloat16:
+        np.copyto(output.numpy(), array, casting="unsafe")
+    else:
+        output.copy_(_wrap_numpy(array))
+
+
+def _finalize_tensor(
+    source: torch.Tensor | np.ndarray,
+    layout: str,
+    dtype: torch.dtype | None,
+    scale: bool,
+    pin_memory: bool,
+    out: torch.Tensor | None = None,
+) -> torch.Tensor:
+    """Produce the requested tensor from source with at most one allocation."""
+    if layout not in _TENSOR_LAYOUTS:
+        raise ValueError(f"Unknown layout {layout}, choose from {_TENSOR_LAYOUTS}.")
+
+    # torch can't share read-only memory, so those arrays are copied straight into
+    # the output and only stand in as an empty meta tensor until then.
+    array = None
+    if isinstance(source, np.ndarray):
+        if source.flags.writeable:
+            source = torch.from_numpy(source)
+        else:
+            array = source
+            source_dtype = torch.from_numpy(np.empty(0, dtype=array.dtype)).dtype
+            source = torch.empty(array.shape, dtype=source_dtype, device="meta")
+
+    dtype = dtype if dtype is not None else source.dtype
+    rescale = scale and source.dtype == torch.uint8 and dtype.is_floating_point
+    view = _layout_view(source, layout)
+
+    # Views of the source are enough when nothing about the memory has to change.
+    contiguous_ok = layout != "chw" or view.is_contiguous()
+    if out is None and dtype == source.dtype:
+        if not pin_memory and contiguous_ok:
+            if array is not None:
+                return _layout_view(_wrap_numpy(array), layout)
+            return view
+
+    # Allocate the output once in its final memory order, then convert into it.
+    device = view.device if array is None else torch.device("cpu")
+    if out is not None:
+        if out.shape != view.shape:
+            raise ValueError(
+                f"Output shape {tuple(out.shape)} does not match image shape "
+                f"{tuple(view.shape)}."
+            )
+        if out.dtype != dtype:
+            raise ValueError(f"Output dtype {out.dtype} does not match {dtype}.")
+        output = out
+    elif layout == "chw":
+        output = torch.empty(
+            view.shape, dtype=dtype, device=device, pin_memory=pin_memory
+        )
+    else:
+        # HWC memory order, permuted to channel first for channels_last.
+        output = torch.empty(
+            source.shape, dtype=dtype, device=device, pin_memory=pin_memory
+        )
+        output = _layout_view(output, layout)
+
+    if array is None:
+        output.copy_(view)
+    else:
+        if layout != "hwc":
+            array = (array[..., None] if array.ndim == 2 else array).transpose(2, 0, 1)
+        _copy_array(output, array)
+    if rescale:
+        output.div_(255)
+
+    return output
+
+
+def to_tensor(
+    image: ImageInput,
+    max_side: int | None = None,
+    min_side: int | None = None,
+    layout: str = "hwc",
+    dtype: torch.dtype | None = None,
+    scale: bool = True,
+    pin_memory: bool = False,
+    out: torch.Tensor | None = None,
+) -> torch.Tensor:
     """Create a torch.Tensor from a variety of input types.
 
+    The result shares memory with numpy and tensor inputs when no conversion is
+    needed, otherwise it is produced with a single allocation.
+
     Args:
-        input: Input to convert to a tensor, can be a file path or an array.
+        input: Input to convert to a tensor, a path, URL, S3 uri or array.
+        max_side: Optional hint when decoding, the image is shrunk at decode time
+            while keeping the longest side at least this long.
+        min_side: Optional hint when decoding, the image is shrunk at decode time
+            while keeping the shortest side at least this long.
+        layout: "hwc", "chw" for a contiguous channel first tensor, or
+            "channels_last" for a channel first tensor with HWC memory order.
+        dtype: Output dtype, defaults to the dtype of the input.
+        scale: Scale uint8 inputs to 0-1 when converting to a floating dtype.
+        pin_memory: Allocate the output in pinned memory for faster GPU copies.
+        out: Optional tensor to write the result into, i.e. a slice of a batch.
+            Must match the output shape and dtype exactly.
 
     Returns:
         PyTorch Tensor, either uint8 for PIL images or the same type as the input.
+        Returns out if it was given.
     """
     if isinstance(image, str):
-        pil_image = pil_from_uri(image)
-        np_array = np.array(pil_image)
-        return torch.from_numpy(np_array)
+        source: torch.Tensor | np.ndarray = _decode_uri(
+            image, max_side=max_side, min_side=min_side, writeable=False
+        )
     elif isinstance(image, np.ndarray):
-        return torch.from_numpy(image)
+        source = image
     elif isinstance(image, Image.Image):
-        np_array = np.array(image)
-        return torch.from_numpy(np_array)
+        pil_image = _reduce_to_target(image, max_side=max_side, min_side=min_side)
+        source = _pil_to_numpy(pil_image, writeable=False)
     elif isinstance(image, torch.Tensor):
-        return image
+        source = image
     else:
         raise TypeError(f"Unsupported input type: {type(image)}")
+
+    return _finalize_tensor(source, layout, dtype, scale, pin_memory, out=out)
+
+
+def _map_ordered(
+    fn: Callable[[_T], _R], items: Sequence[_T], max_workers: int | None
+) -> list[_R]:
+    """Apply fn to every item on a bounded thread pool, preserving input order."""
+    if max_workers is not None and max_workers <= 0:
+        raise ValueError("max_workers must be a positive integer.")
+
+    # Not worth spinning up threads for a single item or a single worker.
+    if len(items) <= 1 or max_workers == 1:
+        return [fn(item) for item in items]
+
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="mash-decode"
+    ) as executor:
+        return list(executor.map(fn, items))
+
+
+def to_numpy_many(
+    images: Sequence[ImageInput],
+    max_workers: int | None = None,
+    stack: bool = False,
+    max_side: int | None = None,
+    min_side: int | None = None,
+    out: np.ndarray | None = None,
+) -> list[np.ndarray] | np.ndarray:
+    """Convert many images to numpy arrays, fetching and decoding in parallel.
+
+    Pillow releases the GIL while decoding, so paths and URLs are fetched and
+    decoded concurrently on a bounded thread pool. When stacking, each image is
+    decoded straight into its slot of the batch.
+
+    Args:
+        images: Inputs to convert, any type accepted by `to_numpy`.
+        max_workers: Maximum number of threads, defaults to the executor default.
+        stack: Stack the results into a single NHWC array, requires equal shapes.
+        max_side: Optional decode size hint, see `to_numpy`.
+        min_side: Optional decode size hint, see `to_numpy`.
+        out: Optional NHWC array to decode into, implies stack.
+
+    Returns:
+        List of numpy arrays in input order, or a single stacked array.
+    """
+    convert = partial(to_numpy, max_side=max_side, min_side=min_side)
+    if out is None and not stack:
+        return _map_ordered(convert, images, max_workers)
+
+    if out is None:
+        # The first image decides the batch shape, the rest land in place.
+        if not images:
+            raise ValueError("Cannot stack an empty list of images.")
+        first = convert(images[0])
+        out = np.empty((len(images),) + first.shape, dtype=first.dtype)
+        out[0] = first
+        start = 1
+    else:
+        start = 0
+
+    if len(out) != len(images):
+        raise ValueError(f"Output holds {len(out)} images, got {len(images)}.")
+
+    batch = out
+    _map_ordered(
+        lambda idx: convert(images[idx], out=batch[idx]),
+        range(start, len(images)),
+        max_workers,
+    )
+    return batch
+
+
+def _empty_batch(first: torch.Tensor, size: int, layout: str) -> torch.Tensor:
+    """Allocate a batch for tensors shaped like first, keeping its memory order."""
+    if layout == "channels_last":
+        channels, height, width = first.shape
+        batch = torch.empty(
+            (size, height, width, channels), dtype=first.dtype, device=first.device
+        )
+        return batch.permute(0, 3, 1, 2)
+
+    return torch.empty(
+        (size,) + tuple(first.shape), dtype=first.dtype, device=first.device
+    )
+
+
+def to_tensor_many(
+    images: Sequence[ImageInput],
+    max_workers: int | None = None,
+    stack: bool = False,
+    max_side: int | None = None,
+    min_side: int | None = None,
+    layout: str = "hwc",
+    dtype: torch.dtype | None = None,
+    scale: bool = True,
+    out: torch.Tensor | None = None,
+) -> list[torch.Tensor] | torch.Tensor:
+    """Convert many images to tensors, fetching and decoding in parallel.
+
+    When stacking, each image is converted straight into its slot of the batch.
+
+    Args:
+        images: Inputs to convert, any type accepted by `to_tensor`.
+        max_workers: Maximum number of threads, defaults to the executor default.
+        stack: Stack the results into a single tensor, requires equal shapes.
+        max_side: Optional decode size hint, see `to_tensor`.
+        min_side: Optional decode size hint, see `to_tensor`.
+        layout: Layout of each image, see `to_tensor`.
+        dtype: Output dtype, see `to_tensor`.
+        scale: Scale uint8 inputs to 0-1 when converting to a floating dtype.
+        out: Optional batch tensor to convert into, implies stack.
+
+    Returns:
+        List of tensors in input order, or a single stacked tensor.
+    """
+    convert = partial(
+        to_tensor,
+        max_side=max_side,
+        min_side=min_side,
+        layout=layout,
+        dtype=dtype,
+        scale=scale,
+    )
+    if out is None and not stack:
+        return _map_ordered(convert, images, max_workers)
+
+    if out is None:
+        # The first image decides the batch shape, the rest land in place.
+        if not images:
+            raise ValueError("Cannot stack an empty list of images.")
+        first = convert(images[0])
+        out = _empty_batch(first, len(images), layout)
+        out[0] = first
+        start = 1
+    else:
+        start = 0
+
+    if len(out) != len(images):
+        raise ValueError(f"Output holds {len(out)} images, got {len(images)}.")
+
+    batch = out
+    _map_ordered(
+        lambda idx: convert(images[idx], out=batch[idx]),
+        range(start, len(images)),
+        max_workers,
+    )
+    return batch
@@ -1,11 +1,15 @@
 import os
+import tracemalloc
 import unittest
+import warnings
+from unittest.mock import patch
 
 import numpy as np
 import torch
+from parameterized import parameterized
 from PIL import Image
 
-from mash.images import conversion
+from mash.images import cache, conversion
 
 
 class TestPilFromFile(unittest.TestCase):
@@ -22,6 +26,64 @@ class TestPilFromFile(unittest.TestCase):
         self.assertIsInstance(img, Image.Image)
 
 
+class TestToUint8(unittest.TestCase):
+    def test_rounds_and_clips(self):
+        image = np.array([[-0.5, 0.0, 0.5, 1.0, 1.01]], dtype=np.float32)
+        result = conversion.to_uint8(image)
+        self.assertEqual(result.dtype, np.uint8)
+        self.assertListEqual(result.tolist(), [[0, 0, 128, 255, 255]])
+
+    def test_float64_matches_float32(self):
+        image = np.random.rand(64, 48, 3)
+        np.testing.assert_array_equal(
+            conversion.to_uint8(image), conversion.to_uint8(image.astype(np.float32))
+        )
+
+    def test_writes_into_out(self):
+        image = np.random.rand(300, 400, 3).astype(np.float32)
+        out = np.zeros((300, 400, 3), dtype=np.uint8)
+        result = conversion.to_uint8(image, out=out)
+        self.assertIs(result, out)
+        np.testing.assert_array_equal(out, np.rint(image * 255).astype(np.uint8))
+
+    def test_non_contiguous_input(self):
+        image = np.random.rand(3, 50, 40).astype(np.float32).transpose(1, 2, 0)
+        np.testing.assert_array_equal(
+            conversion.to_uint8(image), np.rint(image * 255).astype(np.uint8)
+        )
+
+    def test_uint8_passes_through(self):
+        image = np.zeros((4, 4, 3), dtype=np.uint8)
+        self.assertIs(conversion.to_uint8(image), image)
+
+    def test_no_full_size_float_temporaries(self):
+        image = np.random.rand(1000, 1000, 3).astype(np.float32)
+        tracemalloc.start()
+        conversion.to_uint8(image)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        self.assertLess(peak, image.nbytes // 2)
+
+    def test_tensor_converts(self):
+        tensor = torch.tensor([[0.0, 0.5, 1.5]])
+        self.assertListEqual(conversion.to_uint8(tensor).tolist(), [[0, 128, 255]])
+
+        out = np.zeros((1, 3), dtype=np.uint8)
+        conversion.to_uint8(tensor, out=out)
+        self.assertListEqual(out.tolist(), [[0, 128, 255]])
+
+    def test_invalid_out_raises(self):
+        image = np.random.rand(4, 4).astype(np.float32)
+        with self.assertRaises(ValueError):
+            conversion.to_uint8(image, out=np.zeros((4, 5), dtype=np.uint8))
+        with self.assertRaises(ValueError):
+            conversion.to_uint8(image, out=np.zeros((4, 4), dtype=np.float32))
+
+    def test_invalid_dtype_raises(self):
+        with self.assertRaises(ValueError):
+            conversion.to_uint8(np.zeros((4, 4), dtype=np.int64))
+
+
 class TestToNumpy(unittest.TestCase):
     def setUp(self):
         self.npy_array = np.random.rand(100, 100, 3)
@@ -49,6 +111,24 @@ class TestToNumpy(unittest.TestCase):
         result = conversion.to_numpy(self.tensor)
         self.assertIsInstance(result, np.ndarray)
 
+    def test_path_into_out_slice(self):
+        batch = np.zeros((2, 100, 100, 3), dtype=np.uint8)
+        result = conversion.to_numpy(self.test_file_path, out=batch[1])
+        self.assertTrue(np.shares_memory(result, batch))
+        np.testing.assert_array_equal(batch[1], np.array(self.pil_image))
+
+    def test_out_shape_mismatch_raises(self):
+        with self.assertRaises(ValueError):
+            conversion.to_numpy(
+                self.test_file_path, out=np.zeros((100, 99, 3), dtype=np.uint8)
+            )
+
+    def test_out_dtype_mismatch_raises(self):
+        with self.assertRaises(ValueError):
+            conversion.to_numpy(
+                self.pil_image, out=np.zeros((100, 100, 3), dtype=np.float32)
+            )
+
     def test_invalid_input_type_raises_for_numpy_conversion(self):
         with self.assertRaises(TypeError):
             conversion.to_numpy(12345)
@@ -137,10 +217,265 @@ class TestToTensor(unittest.TestCase):
         result = conversion.to_tensor(uint8)
         self.assertIsInstance(result, torch.Tensor)
 
+    def test_chw_layout_is_contiguous(self):
+        image = np.random.randint(0, 256, (10, 20, 3), dtype=np.uint8)
+        result = conversion.to_tensor(image, layout="chw")
+        self.assertEqual(tuple(result.shape), (3, 10, 20))
+        self.assertTrue(result.is_contiguous())
+        self.assertTrue(torch.equal(result, torch.from_numpy(image).permute(2, 0, 1)))
+
+    def test_channels_last_layout_shares_memory(self):
+        image = np.random.randint(0, 256, (10, 20, 3), dtype=np.uint8)
+        result = conversion.to_tensor(image, layout="channels_last")
+        self.assertEqual(tuple(result.shape), (3, 10, 20))
+        self.assertEqual(result.data_ptr(), image.ctypes.data)
+
+    def test_float_dtype_scales_uint8(self):
+        image = np.full((4, 4, 3), 255, dtype=np.uint8)
+        result = conversion.to_tensor(image, layout="chw", dtype=torch.float32)
+        self.assertEqual(result.dtype, torch.float32)
+        self.assertTrue(torch.all(result == 1.0))
+
+        unscaled = conversion.to_tensor(image, dtype=torch.float32, scale=False)
+        self.assertTrue(torch.all(unscaled == 255.0))
+
+    def test_path_layout_and_dtype(self):
+        result = conversion.to_tensor(
+            self.test_file_path, layout="chw", dtype=torch.float16
+        )
+        self.assertEqual(tuple(result.shape), (3, 100, 100))
+        self.assertEqual(result.dtype, torch.float16)
+
+    def test_path_result_is_writeable(self):
+        result = conversion.to_tensor(self.test_file_path)
+        result[0, 0, 0] = 1
+        self.assertEqual(result[0, 0, 0], 1)
+
+    def test_grayscale_chw_adds_channel(self):
+        image = np.zeros((10, 20), dtype=np.uint8)
+        result = conversion.to_tensor(image, layout="chw")
+        self.assertEqual(tuple(result.shape), (1, 10, 20))
+
+    def test_invalid_layout_raises(self):
+        with self.assertRaises(ValueError):
+            conversion.to_tensor(self.npy_array, layout="cwh")
+
+    def test_into_out_tensor(self):
+        batch = torch.zeros((2, 3, 100, 100), dtype=torch.float32)
+        result = conversion.to_tensor(
+            self.pil_image, layout="chw", dtype=torch.float32, out=batch[0]
+        )
+        self.assertEqual(result.data_ptr(), batch[0].data_ptr())
+
+    def test_out_tensor_mismatch_raises(self):
+        with self.assertRaises(ValueError):
+            conversion.to_tensor(
+                self.pil_image, out=torch.zeros((3, 100, 100), dtype=torch.uint8)
+            )
+        with self.assertRaises(ValueError):
+            conversion.to_tensor(
+                self.pil_image, out=torch.zeros((100, 100, 3), dtype=torch.float32)
+            )
+
+    @unittest.skipUnless(torch.cuda.is_available(), "Pinned memory requires CUDA.")
+    def test_pin_memory(self):
+        result = conversion.to_tensor(self.test_file_path, pin_memory=True)
+        self.assertTrue(result.is_pinned())
+
     def test_invalid_input_type_raises_for_tensor_conversion(self):
         with self.assertRaises(TypeError):
             conversion.to_tensor(12345)
 
 
+class TestDecodeSizeHint(unittest.TestCase):
+    def setUp(self):
+        self.jpeg_path = "test_image_large.jpg"
+        self.png_path = "test_image_large.png"
+        Image.new("RGB", (1600, 1200), color=(0, 128, 255)).save(self.jpeg_path)
+        Image.new("RGB", (1600, 1200), color=(0, 128, 255)).save(self.png_path)
+
+    def tearDown(self):
+        os.remove(self.jpeg_path)
+        os.remove(self.png_path)
+
+    def test_jpeg_max_side_uses_draft(self):
+        result = conversion.to_numpy(self.jpeg_path, max_side=224)
+        self.assertEqual(result.shape, (300, 400, 3))
+
+    def test_jpeg_min_side_keeps_at_least_target(self):
+        result = conversion.to_numpy(self.jpeg_path, min_side=224)
+        self.assertGreaterEqual(min(result.shape[:2]), 224)
+        self.assertLess(min(result.shape[:2]), 1200)
+
+    def test_png_max_side_reduces(self):
+        result = conversion.to_pil(self.png_path, max_side=500)
+        self.assertEqual(result.size, (534, 400))
+        self.assertEqual(result.getpixel((0, 0)), (0, 128, 255))
+
+    def test_small_target_ratio_leaves_image_unchanged(self):
+        result = conversion.to_tensor(self.png_path, max_side=1000)
+        self.assertEqual(tuple(result.shape), (1200, 1600, 3))
+
+    @parameterized.expand([("to_numpy",), ("to_tensor",), ("to_pil",)])
+    def test_pil_input_is_reduced_without_changing_it(self, name):
+        with Image.open(self.jpeg_path) as image:
+            result = getattr(conversion, name)(image, max_side=224)
+            # Draft would change the caller's image, so only reduce runs here.
+            self.assertEqual(image.size, (1600, 1200))
+            self.assertEqual(np.asarray(result).shape, (172, 229, 3))
+
+    def test_both_sides_raises(self):
+        with self.assertRaises(ValueError):
+            conversion.to_numpy(self.jpeg_path, max_side=224, min_side=224)
+
+    def test_non_positive_side_raises(self):
+        with self.assertRaises(ValueError):
+            conversion.to_numpy(self.jpeg_path, max_side=0)
+
+
+class TestDecodedCache(unittest.TestCase):
+    def setUp(self):
+        self.test_file_path = "test_image_cached.png"
+        Image.new("RGB", (10, 10), color=(1, 2, 3)).save(self.test_file_path)
+        self.decoded_cache = cache.enable_decoded_cache(max_bytes=1024**2)
+
+    def tearDown(self):
+        cache.disable_decoded_cache()
+        os.remove(self.test_file_path)
+
+    def test_repeated_decode_hits_cache(self):
+        first = conversion.to_numpy(self.test_file_path)
+        second = conversion.to_numpy(self.test_file_path)
+        self.assertIs(first, second)
+        self.assertFalse(first.flags.writeable)
+        self.assertEqual(self.decoded_cache.stats()["hits"], 1)
+
+    def test_modified_file_is_redecoded(self):
+        first = conversion.to_numpy(self.test_file_path)
+        Image.new("RGB", (12, 10), color=(4, 5, 6)).save(self.test_file_path)
+        second = conversion.to_numpy(self.test_file_path)
+        self.assertEqual(first.shape, (10, 10, 3))
+        self.assertEqual(second.shape, (10, 12, 3))
+
+    def test_tensor_from_cache_is_writeable(self):
+        conversion.to_numpy(self.test_file_path)
+        result = conversion.to_tensor(self.test_file_path)
+        result[0, 0, 0] = 255
+        self.assertEqual(conversion.to_numpy(self.test_file_path)[0, 0, 0], 1)
+
+    @parameterized.expand(
+        [
+            ("chw", torch.float32, False),
+            ("channels_last", torch.float16, False),
+            ("hwc", torch.uint8, True),
+            ("chw", torch.bfloat16, True),
+        ]
+    )
+    def test_tensor_from_cache_is_copied_once(self, layout, dtype, use_out):
+        conversion.to_numpy(self.test_file_path)
+        expected = torch.tensor([1, 2, 3], dtype=torch.float64)
+        if dtype.is_floating_point:
+            expected /= 255
+        shape = (10, 10, 3) if layout == "hwc" else (3, 10, 10)
+        out = torch.empty(shape, dtype=dtype) if use_out else None
+
+        wrap = conversion._wrap_numpy
+        with patch.object(conversion, "_wrap_numpy", wraps=wrap) as wrap_numpy:
+            result = conversion.to_tensor(
+                self.test_file_path, layout=layout, dtype=dtype, out=out
+            )
+        # numpy has no bfloat16, so only that goes through an intermediate copy.
+        self.assertEqual(wrap_numpy.called, dtype == torch.bfloat16)
+
+        self.assertEqual(tuple(result.shape), shape)
+        pixel = result[0, 0] if layout == "hwc" else result[:, 0, 0]
+        torch.testing.assert_close(
+            pixel.double(), expected, atol=1e-2, rtol=0, check_dtype=False
+        )
+
+    def test_tensor_from_cache_does_not_warn(self):
+        conversion.to_numpy(self.test_file_path)
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            results = conversion.to_tensor_many(
+                [self.test_file_path] * 8, max_workers=4
+            )
+        self.assertTrue(all(result[0, 0, 2] == 3 for result in results))
+
+
+class TestToManyConversions(unittest.TestCase):
+    def setUp(self):
+        self.test_file_paths = []
+        for idx, size in enumerate([(100, 100), (100, 100), (50, 80)]):
+            path = f"test_image_{idx}.png"
+            Image.new("RGB", size, color=(idx, idx, idx)).save(path)
+            self.test_file_paths.append(path)
+
+    def tearDown(self):
+        for path in self.test_file_paths:
+            os.remove(path)
+
+    def test_numpy_many_preserves_order(self):
+        results = conversion.to_numpy_many(self.test_file_paths, max_workers=3)
+        self.assertEqual(len(results), 3)
+        for idx, result in enumerate(results):
+            self.assertIsInstance(result, np.ndarray)
+            self.assertEqual(result[0, 0, 0], idx)
+        self.assertEqual(results[2].shape, (80, 50, 3))
+
+    def test_numpy_many_stack(self):
+        result = conversion.to_numpy_many(self.test_file_paths[:2], stack=True)
+        self.assertEqual(result.shape, (2, 100, 100, 3))
+        self.assertEqual(result[1, 0, 0, 0], 1)
+
+    def test_numpy_many_stack_mismatched_shapes_raises(self):
+        with self.assertRaises(ValueError):
+            conversion.to_numpy_many(self.test_file_paths, stack=True)
+
+    def test_numpy_many_into_out(self):
+        out = np.zeros((2, 100, 100, 3), dtype=np.uint8)
+        result = conversion.to_numpy_many(self.test_file_paths[:2], out=out)
+        self.assertIs(result, out)
+        self.assertEqual(out[1, 0, 0, 0], 1)
+
+    def test_numpy_many_out_length_mismatch_raises(self):
+        out = np.zeros((3, 100, 100, 3), dtype=np.uint8)
+        with self.assertRaises(ValueError):
+            conversion.to_numpy_many(self.test_file_paths[:2], out=out)
+
+    def test_stack_empty_raises(self):
+        with self.assertRaises(ValueError):
+            conversion.to_numpy_many([], stack=True)
+
+    def test_tensor_many_stack_channels_last(self):
+        result = conversion.to_tensor_many(
+            self.test_file_paths[:2], stack=True, layout="channels_last"
+        )
+        self.assertEqual(tuple(result.shape), (2, 3, 100, 100))
+        self.assertTrue(result.is_contiguous(memory_format=torch.channels_last))
+
+    def test_tensor_many_returns_tensors(self):
+        results = conversion.to_tensor_many(self.test_file_paths)
+        self.assertEqual(len(results), 3)
+        for result in results:
+            self.assertIsInstance(result, torch.Tensor)
+
+    def test_tensor_many_stack_chw(self):
+        result = conversion.to_tensor_many(
+            self.test_file_paths[:2], stack=True, layout="chw", dtype=torch.float32
+        )
+        self.assertEqual(tuple(result.shape), (2, 3, 100, 100))
+        self.assertEqual(result.dtype, torch.float32)
+
+    def test_tensor_many_stack(self):
+        result = conversion.to_tensor_many(self.test_file_paths[:2], stack=True)
+        self.assertIsInstance(result, torch.Tensor)
+        self.assertEqual(tuple(result.shape), (2, 100, 100, 3))
+
+    def test_invalid_max_workers_raises(self):
+        with self.assertRaises(ValueError):
+            conversion.to_numpy_many(self.test_file_paths, max_workers=0)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,8 +1,9 @@
 import random
 
 import numpy as np
+import torch
 
-from mash.images import truecolor
+from mash.images import region, truecolor
 
 
 def crop_rectangle(
@@ -65,6 +66,54 @@ def crop_rectangle(
         return np.reshape(cropped_image, expected_shape)
 
 
+def crop_rectangle_from_uri(
+    uri: str,
+    crop_height: int,
+    crop_width: int,
+    start_x: int,
+    start_y: int,
+    return_rgb: bool = False,
+    allow_large: bool = False,
+) -> np.ndarray:
+    """Crop a rectangle from an image file without decoding the whole image.
+
+    Uncompressed tiled and striped TIFFs only decode the tiles under the crop,
+    and top-down row based formats (i.e. PNG) stop decoding after the last row
+    of the crop. Everything else is decoded whole and then cropped, so memory
+    scales with the full image. That includes compressed TIFFs (LZW, deflate,
+    JPEG), tiled or not, since Pillow reads them through libtiff in one piece.
+
+    Args:
+        uri: File path, url or s3:// uri of the image.
+        crop_height: The height of the crop.
+        crop_width: The width of the crop.
+        start_x: The x-coordinate of the top-left corner of the crop.
+        start_y: The y-coordinate of the top-left corner of the crop.
+        return_rgb: Return in RGB format instead of the image format.
+        allow_large: Open images over Pillow's decompression bomb limit, see
+            `region.open_image`.
+
+    Returns:
+        The cropped image.
+    """
+    if crop_height <= 0 or crop_width <= 0:
+        raise ValueError("Crop size must be a positive integer.")
+    if start_x < 0 or start_y < 0:
+        raise ValueError("Crop start must be a non-negative integer.")
+
+    image = region.open_image(uri, allow_large=allow_large)
+    width, height = image.size
+    if start_x + crop_width > width or start_y + crop_height > height:
+        raise ValueError("Crop must lie within the image bounds.")
+
+    box = (start_x, start_y, start_x + crop_width, start_y + crop_height)
+    cropped_image = np.array(region.decode_region(image, box, allow_large))
+
+    return crop_rectangle(
+        cropped_image, crop_height, crop_width, 0, 0, return_rgb=return_rgb
+    )
+
+
 def crop_square(
     image: np.ndarray,
     crop_size: int,
@@ -179,3 +228,251 @@ def crop_to_multiple_of_dimension(img: np.ndarray, multiple: int) -> np.ndarray:
     bottom = top + new_height
 
     return img[top:bottom, left:right]
+
+
+def _batch_offsets(
+    offsets: int | np.ndarray | torch.Tensor, batch_size: int, name: str
+) -> np.ndarray:
+    """Return per-image offsets as an int array of shape (batch_size,)."""
+    if isinstance(offsets, torch.Tensor):
+        offsets = offsets.cpu().numpy()
+
+    offsets_array = np.broadcast_to(np.asarray(offsets, dtype=np.int64), (batch_size,))
+    if np.any(offsets_array < 0):
+        raise ValueError(f"{name} offsets must be non-negative.")
+
+    return offsets_array
+
+
+def _gather_crops(
+    images: np.ndarray | torch.Tensor,
+    image_index: np.ndarray,
+    xs: np.ndarray,
+    ys: np.ndarray,
+    crop_height: int,
+    crop_width: int,
+    return_rgb: bool,
+) -> np.ndarray | torch.Tensor:
+    """Gather one crop per entry of image_index with a single indexing operation."""
+    # Build broadcastable (M, h, w) index grids, one row per crop.
+    batch_index = image_index[:, None, None]
+    rows = (ys[:, None] + np.arange(crop_height))[:, :, None]
+    cols = (xs[:, None] + np.arange(crop_width))[:, None, :]
+    index: tuple = (batch_index, rows, cols)
+
+    if return_rgb:
+        if images.ndim == 3:
+            images = images[..., None]
+        channels = images.shape[3]
+        if channels == 2:
+            raise ValueError("Cannot convert 2 channel images to RGB.")
+
+        # Grayscale repeats its channel and RGBA drops alpha, in the same gather.
+        channel_index = np.zeros(3, dtype=np.int64) if channels == 1 else np.arange(3)
+        index = (
+            batch_index[..., None],
+            rows[..., None],
+            cols[..., None],
+            channel_index,
+        )
+
+    if isinstance(images, torch.Tensor):
+        return images[tuple(torch.as_tensor(i, device=images.device) for i in index)]
+    return images[index]
+
+
+def crop_rectangle_batch(
+    images: np.ndarray | torch.Tensor,
+    crop_height: int,
+    crop_width: int,
+    start_x: int | np.ndarray | torch.Tensor,
+    start_y: int | np.ndarray | torch.Tensor,
+    return_rgb: bool = False,
+) -> np.ndarray | torch.Tensor:
+    """Crop a rectangle from every image in a batch, each at its own offset.
+
+    All crops are gathered with a single vectorized indexing operation, or sliced
+    as a view when every image shares the same offset.
+
+    Args:
+        images: Batch of images to crop, NHW or NHWC array or tensor.
+        crop_height: The height of the crops.
+        crop_width: The width of the crops.
+        start_x: The x-coordinate of the top-left corners, one per image or shared.
+        start_y: The y-coordinate of the top-left corners, one per image or shared.
+        return_rgb: Return in RGB format instead of the input format.
+
+    Returns:
+        The cropped images, stacked in the same type as the input.
+    """
+    if crop_height <= 0 or crop_width <= 0:
+        raise ValueError("Crop size must be a positive integer.")
+    if images.ndim not in (3, 4):
+        raise ValueError("Unsupported batch type, requires 3D or 4D array.")
+
+    batch_size, height, width = images.shape[:3]
+    xs = _batch_offsets(start_x, batch_size, "X")
+    ys = _batch_offsets(start_y, batch_size, "Y")
+    if height < crop_height or width < crop_width:
+        raise ValueError(
+            "Crop size should be smaller or equal to both image dimensions."
+        )
+    if np.any(xs + crop_width > width) or np.any(ys + crop_height > height):
+        raise ValueError("Crops must lie within the image bounds.")
+
+    # Shared offsets are a plain slice, which is a view like `crop_rectangle`.
+    x, y = int(xs.max(initial=0)), int(ys.max(initial=0))
+    if not return_rgb and np.all(xs == x) and np.all(ys == y):
+        return images[:, y : y + crop_height, x : x + crop_width]
+
+    return _gather_crops(
+        images, np.arange(batch_size), xs, ys, crop_height, crop_width, return_rgb
+    )
+
+
+def crop_square_batch(
+    images: np.ndarray | torch.Tensor,
+    crop_size: int,
+    start_x: int | np.ndarray | torch.Tensor,
+    start_y: int | np.ndarray | torch.Tensor,
+    return_rgb: bool = False,
+) -> np.ndarray | torch.Tensor:
+    """Crop a square from every image in a batch, each at its own offset.
+
+    Args:
+        images: Batch of images to crop, NHW or NHWC array or tensor.
+        crop_size: The side length of the crops.
+        start_x: The x-coordinate of the top-left corners, one per image or shared.
+        start_y: The y-coordinate of the top-left corners, one per image or shared.
+        return_rgb: Return in RGB format instead of the input format.
+
+    Returns:
+        The cropped images, stacked in the same type as the input.
+    """
+    return crop_rectangle_batch(
+        images, crop_size, crop_size, start_x, start_y, return_rgb=return_rgb
+    )
+
+
+def center_square_crop_batch(
+    images: np.ndarray | torch.Tensor, crop_size: int, return_rgb: bool = False
+) -> np.ndarray | torch.Tensor:
+    """Crop the center of every image in a batch to the specified size.
+
+    Args:
+        images: Batch of images to crop, NHW or NHWC array or tensor.
+        crop_size: The size of the crops.
+        return_rgb: Return in RGB format instead of the input format.
+
+    Returns:
+        The cropped images, stacked in the same type as the input.
+    """
+    height, width = images.shape[1:3]
+
+    if crop_size > height or crop_size > width:
+        raise ValueError("Side length is larger than image dimensions.")
+    if crop_size <= 0:
+        raise ValueError("Side length must be a positive integer.")
+
+    # Compute crop based on rounded center of the images.
+    y_start = (height - crop_size) // 2
+    x_start = (width - crop_size) // 2
+
+    return crop_square_batch(images, crop_size, x_start, y_start, return_rgb=return_rgb)
+
+
+def random_square_crop_batch(
+    images: np.ndarray | torch.Tensor,
+    crop_size: int,
+    return_rgb: bool = False,
+    seed: int | np.random.Generator | None = None,
+) -> np.ndarray | torch.Tensor:
+    """Crop a random square from every image in a batch, independently per image.
+
+    Args:
+        images: Batch of images to crop, NHW or NHWC array or tensor.
+        crop_size: The side length of the crops.
+        return_rgb: Return in RGB format instead of the input format.
+        seed: Seed or generator for reproducible crops, fresh entropy if None.
+
+    Returns:
+        The cropped images, stacked in the same type as the input.
+    """
+    batch_size, height, width = images.shape[:3]
+
+    if crop_size > height or crop_size > width:
+        raise ValueError("Side length is larger than image dimensions.")
+    if crop_size <= 0:
+        raise ValueError("Side length must be a positive integer.")
+
+    # Randomly select the starting position of every crop at once.
+    rng = np.random.default_rng(seed)
+    start_y = rng.integers(0, height - crop_size + 1, size=batch_size)
+    start_x = rng.integers(0, width - crop_size + 1, size=batch_size)
+
+    return crop_square_batch(images, crop_size, start_x, start_y, return_rgb=return_rgb)
+
+
+def sample_square_crops(
+    images: np.ndarray | torch.Tensor,
+    crop_size: int,
+    num_crops: int,
+    seed: int | np.random.Generator | None = None,
+    batched: bool = False,
+    return_rgb: bool = False,
+) -> tuple[np.ndarray | torch.Tensor, np.ndarray]:
+    """Sample many random square crops per image in one vectorized draw.
+
+    All offsets are drawn from an explicit generator, so results are reproducible
+    across worker processes given the same seed.
+
+    Args:
+        images: A single HW/HWC image, or a NHW/NHWC batch if batched is set.
+        crop_size: The side length of the crops.
+        num_crops: The number of crops to sample per image.
+        seed: Seed or generator for reproducible crops, fresh entropy if None.
+        batched: Treat the first dimension of images as the batch.
+        return_rgb: Return in RGB format instead of the input format.
+
+    Returns:
+        The crops, shaped (num_crops, ...) for a single image or
+        (N, num_crops, ...) for a batch, and the matching (x, y) top-left corners
+        shaped (num_crops, 2) or (N, num_crops, 2).
+    """
+    if num_crops <= 0:
+        raise ValueError("Number of crops must be a positive integer.")
+    if crop_size <= 0:
+        raise ValueError("Side length must be a positive integer.")
+
+    if not batched:
+        if images.ndim not in (2, 3):
+            raise ValueError("Unsupported image type, requires 2D or 3D array.")
+        images = images[None]
+    elif images.ndim not in (3, 4):
+        raise ValueError("Unsupported batch type, requires 3D or 4D array.")
+
+    batch_size, height, width = images.shape[:3]
+    if crop_size > height or crop_size > width:
+        raise ValueError("Side length is larger than image dimensions.")
+
+    # Draw every offset at once, one row per image.
+    rng = np.random.default_rng(seed)
+    xs = rng.integers(0, width - crop_size + 1, size=(batch_size, num_crops))
+    ys = rng.integers(0, height - crop_size + 1, size=(batch_size, num_crops))
+    image_index = np.repeat(np.arange(batch_size), num_crops)
+
+    crops = _gather_crops(
+        images,
+        image_index,
+        xs.reshape(-1),
+        ys.reshape(-1),
+        crop_size,
+        crop_size,
+        return_rgb,
+    )
+    crops = crops.reshape((batch_size, num_crops) + tuple(crops.shape[1:]))
+    coordinates = np.stack([xs, ys], axis=-1)
+
+    if not batched:
+        return crops[0], coordinates[0]
+    return crops, coordinates
@@ -1,10 +1,15 @@
+import os
 import random
+import tempfile
 import unittest
 from itertools import product
 from unittest.mock import patch
 
 import numpy as np
+import tifffile
+import torch
 from parameterized import parameterized
+from PIL import Image, ImageFile
 
 from mash.images import crop
 
@@ -246,5 +251,240 @@ class TestCropToMultipleOfDimension(unittest.TestCase):
             crop.crop_to_multiple_of_dimension(invalid_img_2d, 4)
 
 
+class TestCropRectangleBatch(unittest.TestCase):
+    batch_sizes = [(4, 10, 10), (4, 10, 10, 1), (4, 10, 10, 3), (4, 10, 10, 4)]
+
+    @parameterized.expand(product(batch_sizes, [False, True]))
+    def test_matches_single_image_crops(
+        self, input_shape: tuple[int, ...], return_rgb: bool
+    ):
+        images = np.random.randint(0, 255, size=input_shape, dtype="uint8")
+        xs = np.array([0, 1, 2, 5])
+        ys = np.array([5, 0, 3, 1])
+        cropped = crop.crop_rectangle_batch(images, 5, 4, xs, ys, return_rgb=return_rgb)
+
+        for idx in range(len(images)):
+            expected = crop.crop_rectangle(
+                images[idx], 5, 4, int(xs[idx]), int(ys[idx]), return_rgb=return_rgb
+            )
+            np.testing.assert_array_equal(cropped[idx], expected)
+
+    def test_shared_offset_returns_view(self):
+        images = np.zeros((4, 10, 10, 3), dtype=np.uint8)
+        cropped = crop.crop_rectangle_batch(images, 5, 4, 2, 3)
+        self.assertEqual(cropped.shape, (4, 5, 4, 3))
+        self.assertTrue(np.shares_memory(cropped, images))
+
+    def test_tensor_input(self):
+        images = torch.randint(0, 255, (3, 10, 10, 3), dtype=torch.uint8)
+        xs = torch.tensor([0, 3, 5])
+        cropped = crop.crop_rectangle_batch(images, 4, 5, xs, 1, return_rgb=True)
+        self.assertIsInstance(cropped, torch.Tensor)
+        self.assertEqual(tuple(cropped.shape), (3, 4, 5, 3))
+        self.assertTrue(torch.equal(cropped[1], images[1, 1:5, 3:8]))
+
+    @parameterized.expand(
+        [
+            ["too_large", (2, 10, 10, 3), 15, 0, 0],
+            ["negative", (2, 10, 10, 3), -10, 0, 0],
+            ["single_image", (10, 10), 5, 0, 0],
+            ["out_of_bounds_x", (2, 10, 10, 3), 5, [0, 6], 0],
+            ["out_of_bounds_y", (2, 10, 10, 3), 5, 0, [6, 0]],
+            ["negative_offset", (2, 10, 10, 3), 5, [-1, 0], 0],
+        ]
+    )
+    def test_invalid_input_raises(
+        self, name: str, input_shape: tuple[int, ...], crop_size: int, xs, ys
+    ):
+        images = np.zeros(input_shape)
+        with self.assertRaises(ValueError):
+            crop.crop_rectangle_batch(images, crop_size, crop_size, xs, ys)
+
+
+class TestCenterSquareCropBatch(unittest.TestCase):
+    def test_matches_single_image_crop(self):
+        images = np.random.randint(0, 255, size=(3, 10, 12, 3), dtype="uint8")
+        cropped = crop.center_square_crop_batch(images, 5)
+        self.assertEqual(cropped.shape, (3, 5, 5, 3))
+        np.testing.assert_array_equal(cropped[2], crop.center_square_crop(images[2], 5))
+
+    def test_too_large_raises(self):
+        with self.assertRaises(ValueError):
+            crop.center_square_crop_batch(np.zeros((3, 10, 10, 3)), 11)
+
+
+class TestRandomSquareCropBatch(unittest.TestCase):
+    def test_crops_are_independent(self):
+        images = np.broadcast_to(np.arange(100).reshape(1, 10, 10), (64, 10, 10))
+        cropped = crop.random_square_crop_batch(images, 3, return_rgb=True)
+        self.assertEqual(cropped.shape, (64, 3, 3, 3))
+        self.assertGreater(len(np.unique(cropped[:, 0, 0, 0])), 1)
+
+    def test_seed_is_reproducible(self):
+        images = np.random.randint(0, 255, size=(8, 10, 10, 3), dtype="uint8")
+        first = crop.random_square_crop_batch(images, 4, seed=7)
+        second = crop.random_square_crop_batch(images, 4, seed=7)
+        np.testing.assert_array_equal(first, second)
+
+    def test_invalid_size_raises(self):
+        with self.assertRaises(ValueError):
+            crop.random_square_crop_batch(np.zeros((3, 10, 10, 3)), 0)
+
+
+class TestSampleSquareCrops(unittest.TestCase):
+    def test_single_image_crops_match_coordinates(self):
+        image = np.random.randint(0, 255, size=(20, 30, 3), dtype="uint8")
+        crops, coordinates = crop.sample_square_crops(image, 5, 16, seed=0)
+
+        self.assertEqual(crops.shape, (16, 5, 5, 3))
+        self.assertEqual(coordinates.shape, (16, 2))
+        for (x, y), cropped in zip(coordinates, crops):
+            np.testing.assert_array_equal(cropped, image[y : y + 5, x : x + 5])
+
+    def test_batch_crops_match_coordinates(self):
+        images = np.random.randint(0, 255, size=(3, 12, 12), dtype="uint8")
+        crops, coordinates = crop.sample_square_crops(
+            images, 4, 6, seed=1, batched=True, return_rgb=True
+        )
+
+        self.assertEqual(crops.shape, (3, 6, 4, 4, 3))
+        self.assertEqual(coordinates.shape, (3, 6, 2))
+        x, y = coordinates[2, 5]
+        np.testing.assert_array_equal(
+            crops[2, 5, :, :, 1], images[2, y : y + 4, x : x + 4]
+        )
+
+    def test_seed_and_generator_are_reproducible(self):
+        image = np.random.randint(0, 255, size=(20, 20), dtype="uint8")
+        first, first_coordinates = crop.sample_square_crops(image, 5, 8, seed=42)
+        second, second_coordinates = crop.sample_square_crops(
+            image, 5, 8, seed=np.random.default_rng(42)
+        )
+        np.testing.assert_array_equal(first, second)
+        np.testing.assert_array_equal(first_coordinates, second_coordinates)
+
+    def test_tensor_input(self):
+        images = torch.zeros((2, 10, 10, 3), dtype=torch.uint8)
+        crops, _ = crop.sample_square_crops(images, 3, 4, seed=0, batched=True)
+        self.assertIsInstance(crops, torch.Tensor)
+        self.assertEqual(tuple(crops.shape), (2, 4, 3, 3, 3))
+
+    @parameterized.expand(
+        [
+            ["too_large", (10, 10, 3), 15, 1],
+            ["zero_size", (10, 10, 3), 0, 1],
+            ["zero_crops", (10, 10, 3), 5, 0],
+            ["extra_dim", (10, 10, 3, 1), 5, 1],
+        ]
+    )
+    def test_invalid_input_raises(
+        self, name: str, input_shape: tuple[int, ...], crop_size: int, num_crops: int
+    ):
+        with self.assertRaises(ValueError):
+            crop.sample_square_crops(np.zeros(input_shape), crop_size, num_crops)
+
+
 if __name__ == "__main__":
     unittest.main()
+
+
+class TestCropRectangleFromUri(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+        rng = np.random.default_rng(0)
+        self.image = rng.integers(0, 256, size=(300, 400, 3), dtype=np.uint8)
+
+    def _write(self, name: str, **kwargs) -> str:
+        path = os.path.join(self.directory, name)
+        if name.endswith("tiled.tif"):
+            tifffile.imwrite(path, self.image, tile=(64, 64))
+        else:
+            Image.fromarray(self.image).save(path, **kwargs)
+        return path
+
+    @parameterized.expand(
+        [
+            ("tiled.tif", {}),
+            ("striped.tif", {}),
+            ("deflate.tif", {"compression": "tiff_adobe_deflate"}),
+            ("image.png", {}),
+            ("interlaced.png", {"interlace": True}),
+        ]
+    )
+    def test_crop_matches_full_decode(self, name, kwargs):
+        path = self._write(name, **kwargs)
+        result = crop.crop_rectangle_from_uri(path, 50, 70, 100, 130)
+        np.testing.assert_array_equal(result, self.image[130:180, 100:170])
+
+    def test_jpeg_matches_full_decode(self):
+        path = self._write("image.jpg", quality=95)
+        expected = np.array(Image.open(path))[10:60, 20:90]
+        result = crop.crop_rectangle_from_uri(path, 50, 70, 20, 10)
+        np.testing.assert_array_equal(result, expected)
+
+    def test_tiled_only_decodes_intersecting_tiles(self):
+        path = self._write("tiled.tif")
+        with Image.open(path) as image:
+            num_tiles = len(image.tile)
+
+        decoded = []
+        original_load = ImageFile.ImageFile.load
+
+        def load(image):
+            if image.tile:
+                decoded.append(len(image.tile))
+            return original_load(image)
+
+        with patch.object(ImageFile.ImageFile, "load", load):
+            result = crop.crop_rectangle_from_uri(path, 64, 64, 64, 128)
+
+        np.testing.assert_array_equal(result, self.image[128:192, 64:128])
+        self.assertEqual(decoded, [1])
+        self.assertGreater(num_tiles, 1)
+
+    def test_return_rgb(self):
+        path = os.path.join(self.directory, "gray.png")
+        Image.fromarray(self.image[..., 0]).save(path)
+
+        result = crop.crop_rectangle_from_uri(path, 10, 20, 5, 5, return_rgb=True)
+        self.assertEqual(result.shape, (10, 20, 3))
+        np.testing.assert_array_equal(result[..., 2], self.image[5:15, 5:25, 0])
+
+    def test_allow_large(self):
+        path = self._write("tiled.tif")
+
+        # The 300x400 image is over twice the lowered limit, the crop is not.
+        with patch.object(Image, "MAX_IMAGE_PIXELS", 20000):
+            with self.assertRaises(Image.DecompressionBombError):
+                crop.crop_rectangle_from_uri(path, 50, 70, 100, 130)
+
+            result = crop.crop_rectangle_from_uri(
+                path, 50, 70, 100, 130, allow_large=True
+            )
+            self.assertEqual(Image.MAX_IMAGE_PIXELS, 20000)
+
+        np.testing.assert_array_equal(result, self.image[130:180, 100:170])
+
+    def test_result_is_writeable(self):
+        path = self._write("image.png")
+        result = crop.crop_rectangle_from_uri(path, 10, 10, 0, 0)
+        self.assertTrue(result.flags.writeable)
+
+    @parameterized.expand(
+        [
+            (0, 10, 0, 0),
+            (10, -1, 0, 0),
+            (10, 10, -1, 0),
+            (10, 10, 395, 0),
+            (10, 10, 0, 295),
+        ]
+    )
+    def test_invalid_crop_raises(self, crop_height, crop_width, start_x, start_y):
+        path = self._write("image.png")
+        with self.assertRaises(ValueError):
+            crop.crop_rectangle_from_uri(
+                path, crop_height, crop_width, start_x, start_y
+            )
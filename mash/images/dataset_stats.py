@@ -0,0 +1,180 @@
+import json
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from itertools import islice
+from typing import Iterable
+
+import numpy as np
+from loguru import logger
+from smart_open import open as smart_open
+
+from mash.cloud import glob
+from mash.images import conversion, normalization
+from mash.images.conversion import ImageInput
+
+# Pixels converted to float64 at a time, bounds memory for very large images.
+_BLOCK_PIXELS = 1 << 20
+
+
+class RunningMeanStd:
+    def __init__(self) -> None:
+        """Per-channel mean and standard deviation accumulated over many images.
+
+        Each block of pixels is reduced to its count, mean and sum of squared
+        deviations, which are merged with Chan et al.'s parallel update. The
+        result is numerically stable and two accumulators can be merged, i.e.
+        across processes. uint8 images are scaled to 0-1 to match `standardize`.
+        """
+        self.count = 0
+        self._mean: np.ndarray | None = None
+        self._m2: np.ndarray | None = None
+
+    def update(self, image: np.ndarray) -> None:
+        """Add the pixels of an HW or HWC image."""
+        pixels = image.reshape(-1, image.shape[2] if image.ndim == 3 else 1)
+        for start in range(0, len(pixels), _BLOCK_PIXELS):
+            block = pixels[start : start + _BLOCK_PIXELS].astype(np.float64)
+            if image.dtype == np.uint8:
+                block /= 255
+
+            mean = block.mean(axis=0)
+            block -= mean
+            m2 = np.einsum("ij,ij->j", block, block)
+            self._merge(len(block), mean, m2)
+
+    def merge(self, other: "RunningMeanStd") -> None:
+        """Add the pixels accumulated by another instance."""
+        if other._mean is not None and other._m2 is not None:
+            self._merge(other.count, other._mean, other._m2)
+
+    def _merge(self, count: int, mean: np.ndarray, m2: np.ndarray) -> None:
+        if count == 0:
+            return
+        if self._mean is None or self._m2 is None:
+            self.count, self._mean, self._m2 = count, mean.copy(), m2.copy()
+            return
+        if len(mean) != len(self._mean):
+            raise ValueError(
+                f"Images must have {len(self._mean)} channels, not {len(mean)}."
+            )
+
+        total = self.count + count
+        delta = mean - self._mean
+        self._mean = self._mean + delta * (count / total)
+        self._m2 = self._m2 + m2 + delta**2 * (self.count * count / total)
+        self.count = total
+
+    @property
+    def mean(self) -> np.ndarray:
+        """Per-channel mean."""
+        if self._mean is None:
+            raise ValueError("No pixels have been added yet.")
+        return self._mean
+
+    @property
+    def std(self) -> np.ndarray:
+        """Per-channel population standard deviation."""
+        if self._m2 is None:
+            raise ValueError("No pixels have been added yet.")
+        return np.sqrt(self._m2 / self.count)
+
+
+def _chunk_stats(images: list[ImageInput]) -> RunningMeanStd:
+    """Accumulate a chunk of images, runs in a worker process."""
+    stats = RunningMeanStd()
+    for image in images:
+        stats.update(conversion.to_numpy(image))
+    return stats
+
+
+def _chunks(
+    images: Iterable[ImageInput], chunk_size: int
+) -> Iterable[list[ImageInput]]:
+    iterator = iter(images)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
+
+
+def compute_mean_std(
+    images: str | Iterable[ImageInput],
+    workers: int | None = None,
+    chunk_size: int = 64,
+    name: str | None = None,
+    path: str | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Compute the per-channel mean and standard deviation of a dataset.
+
+    Images are streamed in chunks and only per-chunk statistics are kept, so
+    memory doesn't grow with the number of images. With several workers, chunks
+    are decoded and reduced in a process pool with a bounded number in flight.
+
+    Args:
+        images: A glob pattern, see `mash.cloud.glob`, or an iterable of file
+            paths, URLs or arrays.
+        workers: Number of worker processes, None or 1 runs in this process.
+        chunk_size: Number of images handed to a worker at a time.
+        name: Optional dataset name to register the result under, for use as
+            `standardize(dataset=name)`.
+        path: Optional JSON file to save the result to, see `load_mean_std`.
+
+    Returns:
+        Per-channel mean and standard deviation, in 0-1 for uint8 images.
+    """
+    if workers is not None and workers <= 0:
+        raise ValueError("workers must be a positive integer.")
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be a positive integer.")
+
+    if isinstance(images, str):
+        images = glob(images)
+
+    stats = RunningMeanStd()
+    if workers is None or workers == 1:
+        for chunk in _chunks(images, chunk_size):
+            stats.merge(_chunk_stats(chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending: set[Future] = set()
+            for chunk in _chunks(images, chunk_size):
+                # Keep a couple of chunks per worker queued, not the whole dataset.
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        stats.merge(future.result())
+                pending.add(executor.submit(_chunk_stats, chunk))
+
+            for future in pending:
+                stats.merge(future.result())
+
+    mean, std = stats.mean, stats.std
+    logger.debug(f"Computed mean {mean} and std {std} over {stats.count} pixels")
+
+    if path is not None:
+        with smart_open(path, "w") as f:
+            json.dump(
+                {"mean": mean.tolist(), "std": std.tolist(), "count": stats.count}, f
+            )
+    if name is not None:
+        normalization.register_dataset(name, mean, std)
+
+    return mean, std
+
+
+def load_mean_std(path: str, name: str | None = None) -> tuple[np.ndarray, np.ndarray]:
+    """Load a mean/std saved by `compute_mean_std`.
+
+    Args:
+        path: JSON file to load, local or in the cloud.
+        name: Optional dataset name to register the result under.
+
+    Returns:
+        Per-channel mean and standard deviation.
+    """
+    with smart_open(path, "r") as f:
+        data = json.load(f)
+
+    mean = np.asarray(data["mean"], dtype=np.float64)
+    std = np.asarray(data["std"], dtype=np.float64)
+    if name is not None:
+        normalization.register_dataset(name, mean, std)
+
+    return mean, std
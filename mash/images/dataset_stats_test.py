@@ -0,0 +1,162 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+from parameterized import parameterized
+from PIL import Image
+
+from mash.images import dataset_stats, normalization
+
+
+class TestRunningMeanStd(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.images = [
+            rng.integers(0, 256, size=shape, dtype=np.uint8)
+            for shape in [(20, 30, 3), (40, 10, 3), (5, 5, 3)]
+        ]
+        pixels = np.concatenate([image.reshape(-1, 3) for image in self.images]) / 255
+        self.expected_mean = pixels.mean(axis=0)
+        self.expected_std = pixels.std(axis=0)
+
+    def test_matches_numpy(self):
+        stats = dataset_stats.RunningMeanStd()
+        for image in self.images:
+            stats.update(image)
+
+        self.assertEqual(stats.count, 20 * 30 + 40 * 10 + 5 * 5)
+        np.testing.assert_allclose(stats.mean, self.expected_mean)
+        np.testing.assert_allclose(stats.std, self.expected_std)
+
+    def test_merge(self):
+        first, second = dataset_stats.RunningMeanStd(), dataset_stats.RunningMeanStd()
+        first.update(self.images[0])
+        second.update(self.images[1])
+        second.update(self.images[2])
+        first.merge(second)
+        first.merge(dataset_stats.RunningMeanStd())
+
+        np.testing.assert_allclose(first.mean, self.expected_mean)
+        np.testing.assert_allclose(first.std, self.expected_std)
+
+    def test_blocks(self):
+        stats = dataset_stats.RunningMeanStd()
+        with patch.object(dataset_stats, "_BLOCK_PIXELS", 7):
+            for image in self.images:
+                stats.update(image)
+
+        np.testing.assert_allclose(stats.mean, self.expected_mean)
+        np.testing.assert_allclose(stats.std, self.expected_std)
+
+    def test_stable_with_large_offset(self):
+        image = 1e8 + np.random.default_rng(0).random((100, 100, 1))
+        stats = dataset_stats.RunningMeanStd()
+        for rows in np.array_split(image, 10):
+            stats.update(rows)
+
+        np.testing.assert_allclose(stats.std, image.reshape(-1, 1).std(axis=0))
+
+    def test_grayscale(self):
+        stats = dataset_stats.RunningMeanStd()
+        stats.update(self.images[0][..., 0])
+        self.assertEqual(stats.mean.shape, (1,))
+
+    def test_mismatched_channels_raise(self):
+        stats = dataset_stats.RunningMeanStd()
+        stats.update(self.images[0])
+        with self.assertRaises(ValueError):
+            stats.update(self.images[0][..., 0])
+
+    def test_empty_raises(self):
+        with self.assertRaises(ValueError):
+            dataset_stats.RunningMeanStd().mean
+
+
+class TestComputeMeanStd(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.addCleanup(normalization._DATASET_MEAN_STD.pop, "test", None)
+
+        rng = np.random.default_rng(0)
+        pixels = []
+        for idx in range(5):
+            image = rng.integers(0, 256, size=(16, 24, 3), dtype=np.uint8)
+            Image.fromarray(image).save(os.path.join(self.directory, f"{idx}.png"))
+            pixels.append(image.reshape(-1, 3) / 255)
+
+        pixels = np.concatenate(pixels)
+        self.expected_mean = pixels.mean(axis=0)
+        self.expected_std = pixels.std(axis=0)
+
+    @parameterized.expand([(None, 64), (1, 2), (2, 2)])
+    def test_glob(self, workers, chunk_size):
+        mean, std = dataset_stats.compute_mean_std(
+            os.path.join(self.directory, "*.png"),
+            workers=workers,
+            chunk_size=chunk_size,
+        )
+        np.testing.assert_allclose(mean, self.expected_mean)
+        np.testing.assert_allclose(std, self.expected_std)
+
+    def test_iterable_of_arrays(self):
+        images = (np.full((4, 4, 3), value, np.uint8) for value in [0, 255])
+        mean, std = dataset_stats.compute_mean_std(images)
+        np.testing.assert_allclose(mean, 0.5)
+        np.testing.assert_allclose(std, 0.5)
+
+    def test_register_and_save(self):
+        path = os.path.join(self.directory, "stats.json")
+        mean, std = dataset_stats.compute_mean_std(
+            os.path.join(self.directory, "*.png"), name="test", path=path
+        )
+
+        with open(path) as f:
+            self.assertEqual(json.load(f)["count"], 5 * 16 * 24)
+
+        image = np.full((2, 2, 3), 128, dtype=np.uint8)
+        np.testing.assert_allclose(
+            normalization.standardize(image, dataset="test"),
+            normalization.standardize(image, mean=mean, std=std),
+        )
+
+    def test_load(self):
+        path = os.path.join(self.directory, "stats.json")
+        mean, std = dataset_stats.compute_mean_std(
+            os.path.join(self.directory, "*.png"), path=path
+        )
+        loaded_mean, loaded_std = dataset_stats.load_mean_std(path, name="test")
+
+        np.testing.assert_allclose(loaded_mean, mean)
+        np.testing.assert_allclose(loaded_std, std)
+        self.assertIn("test", normalization._DATASET_MEAN_STD)
+
+    def test_no_images_raises(self):
+        with self.assertRaises(ValueError):
+            dataset_stats.compute_mean_std(os.path.join(self.directory, "*.jpg"))
+
+    @parameterized.expand([({"workers": 0},), ({"chunk_size": 0},)])
+    def test_invalid_arguments_raise(self, kwargs):
+        with self.assertRaises(ValueError):
+            dataset_stats.compute_mean_std([], **kwargs)
+
+
+class TestRegisterDataset(unittest.TestCase):
+    @parameterized.expand(
+        [
+            ([0.5, 0.5], [0.5]),
+            ([0.5], [0.0]),
+            ([[0.5]], [[0.5]]),
+        ]
+    )
+    def test_invalid_raises(self, mean, std):
+        with self.assertRaises(ValueError):
+            normalization.register_dataset("test", np.array(mean), np.array(std))
+
+
+if __name__ == "__main__":
+    unittest.main()
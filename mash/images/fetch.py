@@ -0,0 +1,246 @@
+import threading
+from io import BytesIO
+from typing import IO, Any
+
+import requests
+from requests.adapters import HTTPAdapter
+from smart_open import open as smart_open
+from urllib3.util.retry import Retry
+
+from mash.images import cache
+
+# Statuses that are worth retrying, everything else fails immediately.
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Size of the chunks read off the socket while streaming a body.
+_CHUNK_SIZE = 64 * 1024
+
+_http_config: dict[str, Any] = {
+    "max_connections": 16,
+    "timeout": (10.0, 60.0),
+    "retries": 3,
+    "backoff_factor": 0.5,
+}
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+_s3_client: Any = None
+_s3_client_lock = threading.Lock()
+
+
+def configure_http(
+    max_connections: int | None = None,
+    timeout: float | tuple[float, float] | None = None,
+    retries: int | None = None,
+    backoff_factor: float | None = None,
+) -> None:
+    """Configure the shared HTTP connection pool used to fetch remote images.
+
+    Only the arguments that are passed are changed. The pool is rebuilt lazily on
+    the next request, so this is safe to call while other threads are fetching.
+
+    Args:
+        max_connections: Maximum number of kept-alive connections per host.
+        timeout: Timeout in seconds, or a (connect, read) tuple.
+        retries: Number of retries on connection errors and 429/5xx responses.
+        backoff_factor: Exponential backoff factor between retries, in seconds.
+    """
+    global _session
+
+    if max_connections is not None and max_connections <= 0:
+        raise ValueError("max_connections must be a positive integer.")
+    if retries is not None and retries < 0:
+        raise ValueError("retries must be a non-negative integer.")
+    if backoff_factor is not None and backoff_factor < 0:
+        raise ValueError("backoff_factor must be non-negative.")
+
+    updates = {
+        "max_connections": max_connections,
+        "timeout": timeout,
+        "retries": retries,
+        "backoff_factor": backoff_factor,
+    }
+    with _session_lock:
+        _http_config.update({k: v for k, v in updates.items() if v is not None})
+
+        # Drop the old pool, in-flight requests keep their reference to it.
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def _build_session() -> requests.Session:
+    retry = Retry(
+        total=_http_config["retries"],
+        backoff_factor=_http_config["backoff_factor"],
+        status_forcelist=_RETRY_STATUSES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=_http_config["max_connections"],
+        pool_maxsize=_http_config["max_connections"],
+        max_retries=retry,
+    )
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _get_session() -> requests.Session:
+    """Return the shared session, creating it on first use."""
+    global _session
+
+    session = _session
+    if session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+            session = _session
+
+    return session
+
+
+def configure_s3(client: Any = None) -> None:
+    """Set the boto3 S3 client used to fetch s3:// images.
+
+    Args:
+        client: A boto3 S3 client, i.e. one with a custom endpoint. If None, a
+            default client is created on the next fetch.
+    """
+    global _s3_client
+
+    with _s3_client_lock:
+        _s3_client = client
+
+
+def _get_s3_client() -> Any:
+    """Return the shared S3 client, creating it on first use."""
+    global _s3_client
+
+    client = _s3_client
+    if client is None:
+        import boto3
+
+        with _s3_client_lock:
+            if _s3_client is None:
+                _s3_client = boto3.client("s3")
+            client = _s3_client
+
+    return client
+
+
+def _split_s3_uri(uri: str) -> tuple[str, str]:
+    bucket, _, key = uri[len("s3://") :].partition("/")
+    if not bucket or not key:
+        raise ValueError(f"Invalid S3 uri: {uri}")
+
+    return bucket, key
+
+
+def is_url(uri: str) -> bool:
+    """Return True if the uri is an http(s) URL."""
+    return uri.startswith("http://") or uri.startswith("https://")
+
+
+def is_s3(uri: str) -> bool:
+    """Return True if the uri is an s3:// object."""
+    return uri.startswith("s3://")
+
+
+def is_remote(uri: str) -> bool:
+    """Return True if the uri has to be fetched over the network."""
+    return is_url(uri) or is_s3(uri)
+
+
+def fetch_url(uri: str, headers: dict[str, str] | None = None) -> BytesIO:
+    """Stream the body of a URL into an in-memory file.
+
+    Uses the shared keep-alive connection pool, retrying on 429/5xx responses.
+
+    Args:
+        uri: URL to fetch.
+        headers: Extra request headers, i.e. a Range header.
+
+    Returns:
+        File-like object positioned at the start of the body.
+    """
+    response = _get_session().get(
+        uri, headers=headers, stream=True, timeout=_http_config["timeout"]
+    )
+    with response:
+        response.raise_for_status()  # Raise an error for bad responses
+
+        # Consuming the body fully hands the connection back to the pool.
+        body = BytesIO()
+        for chunk in response.iter_content(chunk_size=_CHUNK_SIZE):
+            body.write(chunk)
+
+    body.seek(0)
+    return body
+
+
+def open_s3(uri: str) -> IO[bytes]:
+    """Open an s3:// object as a seekable stream using the shared client.
+
+    Reads are served by ranged GETs as they happen, so nothing is downloaded
+    up front and no temporary files are written.
+
+    Args:
+        uri: S3 uri of the object.
+
+    Returns:
+        Seekable binary file-like object.
+    """
+    _split_s3_uri(uri)
+    return smart_open(uri, "rb", transport_params={"client": _get_s3_client()})
+
+
+def read_header(uri: str, num_bytes: int) -> BytesIO:
+    """Fetch the first bytes of a remote file with a ranged request.
+
+    Args:
+        uri: Remote location of the file.
+        num_bytes: Number of bytes to request, more may come back if the server
+            doesn't support ranges.
+
+    Returns:
+        File-like object positioned at the start of the contents.
+    """
+    byte_range = f"bytes=0-{num_bytes - 1}"
+    if is_s3(uri):
+        bucket, key = _split_s3_uri(uri)
+        response = _get_s3_client().get_object(Bucket=bucket, Key=key, Range=byte_range)
+        return BytesIO(response["Body"].read())
+    else:
+        return fetch_url(uri, headers={"Range": byte_range})
+
+
+def read_remote(uri: str) -> IO[bytes]:
+    """Return the contents of a remote image, going through the disk cache if enabled.
+
+    Args:
+        uri: Remote location of the image, an http(s) URL or s3:// uri.
+
+    Returns:
+        File-like object positioned at the start of the contents.
+    """
+    disk_cache = cache.get_disk_cache()
+    if disk_cache is None:
+        return open_s3(uri) if is_s3(uri) else fetch_url(uri)
+
+    data = disk_cache.get(uri)
+    if data is not None:
+        return BytesIO(data)
+
+    if is_s3(uri):
+        with open_s3(uri) as stream:
+            body = BytesIO(stream.read())
+    else:
+        body = fetch_url(uri)
+
+    with body.getbuffer() as view:
+        disk_cache.put(uri, view)
+    return body
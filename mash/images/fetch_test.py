@@ -0,0 +1,169 @@
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+import boto3
+import moto
+import numpy as np
+import requests
+from PIL import Image
+
+from mash.images import cache, conversion, fetch, info
+
+
+def _png_bytes() -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", (20, 10), color=(255, 0, 0)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+class _ImageHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    body = _png_bytes()
+    failures_left = 0
+    connections: set = set()
+
+    def do_GET(self):
+        type(self).connections.add(self.client_address)
+        if self.path == "/missing.png":
+            self._respond(404, b"")
+        elif self.path == "/flaky.png" and type(self).failures_left > 0:
+            type(self).failures_left -= 1
+            self._respond(503, b"")
+        else:
+            self._respond(200, self.body)
+
+    def _respond(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestFetchUrl(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _ImageHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        fetch.configure_http(retries=3, backoff_factor=0)
+        _ImageHandler.connections = set()
+
+    def test_fetch_url_returns_body(self):
+        body = fetch.fetch_url(f"{self.base_url}/image.png")
+        self.assertEqual(body.read(), _ImageHandler.body)
+
+    def test_connections_are_reused(self):
+        for _ in range(5):
+            fetch.fetch_url(f"{self.base_url}/image.png")
+        self.assertEqual(len(_ImageHandler.connections), 1)
+
+    def test_retries_on_server_error(self):
+        _ImageHandler.failures_left = 2
+        image = conversion.pil_from_uri(f"{self.base_url}/flaky.png")
+        self.assertEqual(image.size, (20, 10))
+
+    def test_no_retries_raises_on_server_error(self):
+        fetch.configure_http(retries=0)
+        _ImageHandler.failures_left = 1
+        with self.assertRaises(requests.HTTPError):
+            fetch.fetch_url(f"{self.base_url}/flaky.png")
+
+    def test_missing_raises(self):
+        with self.assertRaises(requests.HTTPError):
+            fetch.fetch_url(f"{self.base_url}/missing.png")
+
+    def test_invalid_config_raises(self):
+        with self.assertRaises(ValueError):
+            fetch.configure_http(max_connections=0)
+        with self.assertRaises(ValueError):
+            fetch.configure_http(retries=-1)
+
+    def test_read_remote_uses_disk_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            disk_cache = cache.enable_disk_cache(directory, max_bytes=1024**2)
+            self.addCleanup(cache.disable_disk_cache)
+
+            url = f"{self.base_url}/image.png"
+            first = fetch.read_remote(url).read()
+            second = fetch.read_remote(url).read()
+
+            self.assertEqual(first, _ImageHandler.body)
+            self.assertEqual(second, _ImageHandler.body)
+            self.assertEqual(disk_cache.stats()["hits"], 1)
+            self.assertEqual(disk_cache.stats()["misses"], 1)
+
+
+class TestS3(unittest.TestCase):
+    def setUp(self):
+        self.mock = moto.mock_s3()
+        self.mock.start()
+        self.addCleanup(self.mock.stop)
+
+        # The shared client has to be created inside the mock.
+        fetch.configure_s3(None)
+        self.addCleanup(fetch.configure_s3, None)
+
+        s3 = boto3.client("s3", region_name="us-east-1")
+        s3.create_bucket(Bucket="path")
+        s3.put_object(Bucket="path", Key="images/cat.png", Body=_png_bytes())
+
+    def test_to_numpy_reads_s3(self):
+        result = conversion.to_numpy("s3://path/images/cat.png")
+        self.assertEqual(result.shape, (10, 20, 3))
+        np.testing.assert_array_equal(result[0, 0], [255, 0, 0])
+
+    def test_image_info_reads_s3_header(self):
+        result = info.image_info("s3://path/images/cat.png")
+        self.assertEqual(result, info.ImageInfo(20, 10, "RGB", "PNG"))
+
+    def test_read_header_returns_range(self):
+        header = fetch.read_header("s3://path/images/cat.png", 8)
+        self.assertEqual(header.read(), _png_bytes()[:8])
+
+    def test_s3_uses_disk_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            disk_cache = cache.enable_disk_cache(directory, max_bytes=1024**2)
+            self.addCleanup(cache.disable_disk_cache)
+
+            conversion.to_pil("s3://path/images/cat.png")
+            conversion.to_pil("s3://path/images/cat.png")
+            self.assertEqual(disk_cache.stats()["hits"], 1)
+
+    def test_missing_key_raises(self):
+        with self.assertRaises(OSError):
+            conversion.to_numpy("s3://path/images/missing.png")
+
+    def test_invalid_uri_raises(self):
+        with self.assertRaises(ValueError):
+            fetch.open_s3("s3://path")
+
+
+class TestIsUrl(unittest.TestCase):
+    def test_is_url(self):
+        self.assertTrue(fetch.is_url("http://example.com/cat.png"))
+        self.assertTrue(fetch.is_url("https://example.com/cat.png"))
+        self.assertFalse(fetch.is_url("/path/to/cat.png"))
+        self.assertFalse(fetch.is_url("s3://bucket/cat.png"))
+
+    def test_is_remote(self):
+        self.assertTrue(fetch.is_remote("https://example.com/cat.png"))
+        self.assertTrue(fetch.is_remote("s3://bucket/cat.png"))
+        self.assertFalse(fetch.is_remote("/path/to/cat.png"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+from typing import NamedTuple, Sequence
+
+from PIL import Image, UnidentifiedImageError
+
+from mash.images import cache, fetch
+from mash.images.conversion import _map_ordered
+
+# Bytes requested for remote headers, enough for nearly every format unless
+# there is a large block of metadata in front of the image data.
+_HEADER_BYTES = 64 * 1024
+
+
+class ImageInfo(NamedTuple):
+    width: int
+    height: int
+    mode: str
+    format: str | None
+
+
+def _info_from_pil(image: Image.Image) -> ImageInfo:
+    width, height = image.size
+    return ImageInfo(width, height, image.mode, image.format)
+
+
+def _remote_info(uri: str) -> ImageInfo:
+    # If the image is already cached on disk there's no need to hit the network.
+    # Only the header is read, and the probe doesn't count as a hit or miss.
+    disk_cache = cache.get_disk_cache()
+    if disk_cache is not None:
+        try:
+            with Image.open(disk_cache.path_for(uri)) as image:
+                return _info_from_pil(image)
+        except FileNotFoundError:
+            pass
+
+    # Servers that ignore the range just send back the whole file, which still works.
+    header = fetch.read_header(uri, _HEADER_BYTES)
+    try:
+        with Image.open(header) as image:
+            return _info_from_pil(image)
+    except (UnidentifiedImageError, OSError, SyntaxError):
+        # The header didn't fit in the range, fall back to the whole file.
+        pass
+
+    with Image.open(fetch.read_remote(uri)) as image:
+        return _info_from_pil(image)
+
+
+def image_info(uri: str) -> ImageInfo:
+    """Return the size, mode and format of an image without decoding the pixels.
+
+    Only the header is read: a partial read for local files and a range request
+    for URLs and s3:// objects.
+
+    Args:
+        uri: File path, url or s3:// uri of the image.
+
+    Returns:
+        Named tuple of width, height, mode and format.
+    """
+    if fetch.is_remote(uri):
+        return _remote_info(uri)
+
+    # Opening is lazy, Pillow only reads as far as it needs to parse the header.
+    with Image.open(uri) as image:
+        return _info_from_pil(image)
+
+
+def image_info_many(
+    uris: Sequence[str], max_workers: int | None = None
+) -> list[ImageInfo]:
+    """Probe many images in parallel, see `image_info`.
+
+    Args:
+        uris: File paths, urls or s3:// uris of the images.
+        max_workers: Maximum number of threads, defaults to the executor default.
+
+    Returns:
+        List of image info in input order.
+    """
+    return _map_ordered(image_info, uris, max_workers)
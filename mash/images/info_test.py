@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+from io import BytesIO
+from unittest.mock import patch
+
+from PIL import Image
+
+from mash.images import cache, fetch, info
+
+
+def _jpeg_bytes(size: tuple[int, int]) -> bytes:
+    buffer = BytesIO()
+    Image.new("RGB", size).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+class TestImageInfo(unittest.TestCase):
+    def setUp(self):
+        self.test_file_paths = ["test_image_info_0.png", "test_image_info_1.jpg"]
+        Image.new("RGBA", (30, 20)).save(self.test_file_paths[0])
+        Image.new("L", (40, 50)).save(self.test_file_paths[1])
+
+    def tearDown(self):
+        for path in self.test_file_paths:
+            os.remove(path)
+
+    def test_local_file_info(self):
+        result = info.image_info(self.test_file_paths[0])
+        self.assertEqual(result, info.ImageInfo(30, 20, "RGBA", "PNG"))
+
+    def test_remote_uses_range_request(self):
+        data = _jpeg_bytes((640, 480))
+        header = BytesIO(data[:1024])
+        with patch.object(fetch, "fetch_url", return_value=header) as fetch_url:
+            result = info.image_info("https://example.com/cat.jpg")
+
+        self.assertEqual(result, info.ImageInfo(640, 480, "RGB", "JPEG"))
+        fetch_url.assert_called_once()
+        self.assertIn("Range", fetch_url.call_args.kwargs["headers"])
+
+    def test_remote_falls_back_to_full_fetch(self):
+        data = _jpeg_bytes((64, 48))
+        with patch.object(fetch, "fetch_url", return_value=BytesIO(b"garbage")):
+            with patch.object(fetch, "read_remote", return_value=BytesIO(data)):
+                result = info.image_info("https://example.com/cat.jpg")
+
+        self.assertEqual(result, info.ImageInfo(64, 48, "RGB", "JPEG"))
+
+    def test_remote_reads_disk_cache_without_counting(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        disk_cache = cache.enable_disk_cache(directory.name, max_bytes=1024**2)
+        self.addCleanup(cache.disable_disk_cache)
+        disk_cache.put("https://example.com/cached.jpg", _jpeg_bytes((64, 48)))
+
+        with patch.object(fetch, "fetch_url") as fetch_url:
+            result = info.image_info("https://example.com/cached.jpg")
+        fetch_url.assert_not_called()
+        self.assertEqual(result, info.ImageInfo(64, 48, "RGB", "JPEG"))
+
+        data = _jpeg_bytes((32, 24))
+        with patch.object(fetch, "fetch_url", return_value=BytesIO(data)):
+            result = info.image_info("https://example.com/cat.jpg")
+        self.assertEqual(result, info.ImageInfo(32, 24, "RGB", "JPEG"))
+
+        stats = disk_cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (0, 0))
+
+    def test_image_info_many_preserves_order(self):
+        results = info.image_info_many(self.test_file_paths, max_workers=2)
+        self.assertEqual([(r.width, r.height) for r in results], [(30, 20), (40, 50)])
+        self.assertEqual(results[1].mode, "L")
+
+    def test_missing_file_raises(self):
+        with self.assertRaises(FileNotFoundError):
+            info.image_info("does_not_exist.png")
+
+
+if __name__ == "__main__":
+    unittest.main()
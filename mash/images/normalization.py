@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 import numpy as np
 
 IMAGENET_MEAN = np.array([0.485, 0.456, 0.406])
@@ -11,22 +13,36 @@ _DATASET_MEAN_STD = {
 }
 
 
-def standardize(
-    image: np.ndarray,
-    dataset: str | None = None,
-    mean: np.ndarray | None = None,
-    std: np.ndarray | None = None,
-):
-    """Standardize an image.
+def register_dataset(name: str, mean: np.ndarray, std: np.ndarray) -> None:
+    """Register a dataset mean/std so it can be used as `standardize(dataset=name)`.
 
     Args:
-        image: Image (numpy) to standardize.
-        dataset: Dataset to use for standardization. Defaults to "imagenet".
-        mean: Mean to use for standardization. Defaults to None, overrides dataset string.
-        std: Standard deviation to use for standardization. Defaults to None, overrides dataset string.
+        name: Name of the dataset, replaces any existing entry with that name.
+        mean: Per-channel mean, in 0-1 for uint8 images.
+        std: Per-channel standard deviation, in 0-1 for uint8 images.
+    """
+    mean = np.asarray(mean, dtype=np.float64)
+    std = np.asarray(std, dtype=np.float64)
+    if mean.ndim != 1 or mean.shape != std.shape:
+        raise ValueError("Mean and std must be 1D with one entry per channel.")
+    if np.any(std <= 0):
+        raise ValueError("Standard deviation must be positive.")
+
+    _DATASET_MEAN_STD[name] = {"mean": mean, "std": std}
+
+
+def resolve_mean_std(
+    dataset: str | None, mean: np.ndarray | None, std: np.ndarray | None
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return the mean/std to use from a dataset name or explicit values.
+
+    Args:
+        dataset: Name of a built-in or registered dataset.
+        mean: Per-channel mean, used with std when no dataset is given.
+        std: Per-channel standard deviation.
 
     Returns:
-        np.ndarray: Standardized image.
+        The mean and std.
     """
     # Allow either a dataset string or a mean/std to be specified.
     if dataset and mean is not None and std is not None:
@@ -43,6 +59,53 @@ def standardize(
     if mean is None or std is None:
         raise ValueError("Must specify either dataset or mean/std")
 
+    return mean, std
+
+
+# Number of pixels standardized per block through the lookup table.
+_LOOKUP_BLOCK_SIZE = 1 << 16
+
+
+@lru_cache(maxsize=32)
+def _lookup_table(
+    mean: tuple[float, ...], std: tuple[float, ...], dtype: np.dtype
+) -> np.ndarray:
+    """Return a read-only (channels, 256) table of standardized uint8 values."""
+    values = np.arange(256) / 255.0
+    table = (values - np.array(mean)[:, None]) / np.array(std)[:, None]
+    table = table.astype(dtype)
+    table.flags.writeable = False
+    return table
+
+
+def standardize(
+    image: np.ndarray,
+    dataset: str | None = None,
+    mean: np.ndarray | None = None,
+    std: np.ndarray | None = None,
+    dtype: np.dtype | type | None = None,
+    out: np.ndarray | None = None,
+) -> np.ndarray:
+    """Standardize an image.
+
+    uint8 images are scaled to 0-1 and standardized through a 256 entry lookup
+    table per channel, so each pixel is a single gather.
+
+    Args:
+        image: Image (numpy) to standardize.
+        dataset: Dataset to use for standardization. Defaults to "imagenet".
+        mean: Mean to use for standardization. Defaults to None, overrides dataset string.
+        std: Standard deviation to use for standardization. Defaults to None, overrides dataset string.
+        dtype: Output dtype, i.e. float16. Defaults to float64 for float64 images
+            and float32 for everything else.
+        out: Optional array to write the result into, can be the image itself to
+            standardize a float image in place.
+
+    Returns:
+        np.ndarray: Standardized image.
+    """
+    mean, std = resolve_mean_std(dataset, mean, std)
+
     # Make sure the dataset mean/std are the right shape for the image.
     n_channels = image.shape[-1]
     if n_channels != len(mean) or n_channels != len(std):
@@ -50,11 +113,51 @@ def standardize(
             f"Input image must have {len(mean)} channels, not {n_channels}."
         )
 
-    # Convert to float range if it's bytes.
+    if dtype is None:
+        if out is not None:
+            dtype = out.dtype
+        else:
+            dtype = np.float64 if image.dtype == np.float64 else np.float32
+    dtype = np.dtype(dtype)
+    if not np.issubdtype(dtype, np.floating):
+        raise ValueError(f"Output dtype must be floating point, not {dtype}.")
+
+    if out is None:
+        out = np.empty(image.shape, dtype=dtype)
+    elif out.shape != image.shape:
+        raise ValueError(
+            f"Output shape {out.shape} does not match image shape {image.shape}."
+        )
+    elif out.dtype != dtype:
+        raise ValueError(f"Output dtype {out.dtype} does not match dtype {dtype}.")
+
+    # Bytes go through the lookup table, which also covers the conversion to 0-1.
     if image.dtype == np.uint8:
-        image = image.astype(np.float32) / 255.0
+        key = (tuple(np.ravel(mean).tolist()), tuple(np.ravel(std).tolist()))
+        table = _lookup_table(*key, dtype)
+
+        # np.take widens the indices to intp, so go in blocks of pixels to keep
+        # that temporary small. Reshaping copies non-contiguous arrays, so the
+        # result is written back to those afterwards.
+        pixels = image.reshape(-1, n_channels)
+        target = out.reshape(-1, n_channels)
+        for start in range(0, len(pixels), _LOOKUP_BLOCK_SIZE):
+            block = slice(start, start + _LOOKUP_BLOCK_SIZE)
+            for channel in range(n_channels):
+                np.take(
+                    table[channel],
+                    pixels[block, channel],
+                    out=target[block, channel],
+                    mode="clip",
+                )
+        if not out.flags.c_contiguous:
+            out[...] = target.reshape(out.shape)
+        return out
 
-    # Normalize the image
-    normalized_image = (image - mean) / std
+    # Normalize the image as a single multiply-add, (x - mean) / std.
+    scale = 1 / np.asarray(std, dtype=np.float64)
+    offset = -np.asarray(mean, dtype=np.float64) * scale
+    np.multiply(image, scale.astype(dtype), out=out)
+    out += offset.astype(dtype)
 
-    return normalized_image
+    return out
@@ -1,6 +1,8 @@
 import unittest
+from unittest.mock import patch
 
 import numpy as np
+from parameterized import parameterized
 
 from mash.images import normalization
 
@@ -70,5 +72,95 @@ class TestImageStandardization(unittest.TestCase):
             normalization.standardize(self.rgb_image)
 
 
+class TestStandardizeOutput(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.image = rng.integers(0, 256, size=(32, 48, 3), dtype=np.uint8)
+        self.expected = (self.image / 255.0 - normalization.IMAGENET_MEAN) / (
+            normalization.IMAGENET_STD
+        )
+
+    @parameterized.expand(
+        [
+            (np.uint8, np.float32),
+            (np.float16, np.float32),
+            (np.float32, np.float32),
+            (np.float64, np.float64),
+        ]
+    )
+    def test_default_dtype(self, input_dtype, expected_dtype):
+        image = self.image.astype(input_dtype)
+        if input_dtype != np.uint8:
+            image /= 255
+
+        result = normalization.standardize(image, dataset="imagenet")
+        self.assertEqual(result.dtype, expected_dtype)
+        np.testing.assert_allclose(result, self.expected, atol=1e-2)
+
+    @parameterized.expand([(np.float16,), (np.float32,), (np.float64,)])
+    def test_lookup_table_matches_float_path(self, dtype):
+        result = normalization.standardize(self.image, dataset="imagenet", dtype=dtype)
+        self.assertEqual(result.dtype, dtype)
+        np.testing.assert_allclose(
+            result, self.expected, rtol=1e-3 if dtype == np.float16 else 1e-6
+        )
+
+    def test_out(self):
+        out = np.empty(self.image.shape, dtype=np.float32)
+        result = normalization.standardize(self.image, dataset="imagenet", out=out)
+
+        self.assertIs(result, out)
+        np.testing.assert_allclose(out, self.expected, rtol=1e-6)
+
+    def test_in_place(self):
+        image = self.image.astype(np.float32) / 255
+        result = normalization.standardize(image, dataset="imagenet", out=image)
+
+        self.assertIs(result, image)
+        np.testing.assert_allclose(image, self.expected, rtol=1e-5, atol=1e-6)
+
+    def test_lookup_table_in_blocks(self):
+        with patch.object(normalization, "_LOOKUP_BLOCK_SIZE", 100):
+            result = normalization.standardize(self.image, dataset="imagenet")
+        np.testing.assert_allclose(result, self.expected, rtol=1e-6)
+
+    @parameterized.expand([((4, 0, 3),), ((3,),), ((2, 5, 7, 3),)])
+    def test_lookup_table_shapes(self, shape):
+        image = np.resize(self.image, shape)
+        expected = (image / 255.0 - normalization.IMAGENET_MEAN) / (
+            normalization.IMAGENET_STD
+        )
+
+        result = normalization.standardize(image, dataset="imagenet")
+        self.assertEqual(result.shape, shape)
+        np.testing.assert_allclose(result, expected, rtol=1e-6)
+
+    def test_lookup_table_non_contiguous(self):
+        image = np.asfortranarray(self.image)
+        out = np.empty((3, 48, 32), dtype=np.float32).transpose(2, 1, 0)
+        result = normalization.standardize(image, dataset="imagenet", out=out)
+
+        self.assertIs(result, out)
+        np.testing.assert_allclose(out, self.expected, rtol=1e-6)
+
+    def test_lookup_table_is_cached(self):
+        normalization._lookup_table.cache_clear()
+        for _ in range(3):
+            normalization.standardize(self.image, dataset="imagenet")
+
+        self.assertEqual(normalization._lookup_table.cache_info().misses, 1)
+
+    @parameterized.expand(
+        [
+            ({"out": np.empty((32, 48, 3), np.float64), "dtype": np.float32},),
+            ({"out": np.empty((32, 32, 3), np.float32)},),
+            ({"dtype": np.uint8},),
+        ]
+    )
+    def test_invalid_output_raises(self, kwargs):
+        with self.assertRaises(ValueError):
+            normalization.standardize(self.image, dataset="imagenet", **kwargs)
+
+
 if __name__ == "__main__":
     unittest.main()
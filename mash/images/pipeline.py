@@ -0,0 +1,240 @@
+from typing import NamedTuple, Sequence
+
+import numpy as np
+
+from mash.images import normalization, resize
+
+
+class CenterSquareCrop(NamedTuple):
+    """Crop the center of the image to a square, see `center_square_crop`."""
+
+    crop_size: int
+
+
+class ResizeMinSide(NamedTuple):
+    """Resize the smallest side to a length, see `resize_image_min_side`."""
+
+    side_len: int
+    interpolation: str = "bilinear"
+
+
+class ResizeMaxSide(NamedTuple):
+    """Resize the longest side to a length, see `resize_image_max_side`."""
+
+    side_len: int
+    interpolation: str = "bilinear"
+
+
+class Standardize(NamedTuple):
+    """Standardize each channel, see `standardize`.
+
+    Uses the imagenet mean/std unless a dataset or a mean/std is given.
+    """
+
+    dataset: str | None = None
+    mean: np.ndarray | None = None
+    std: np.ndarray | None = None
+
+
+Step = CenterSquareCrop | ResizeMinSide | ResizeMaxSide | Standardize
+
+
+class _Plan(NamedTuple):
+    """Geometric steps as a source window, a box inside it and an output size.
+
+    The window is the last crop before resizing, the resize clamps at its edges.
+    """
+
+    window: tuple[int, int, int, int]
+    box: tuple[float, float, float, float]
+    size: tuple[int, int]
+    interpolation: str
+
+
+class Pipeline:
+    def __init__(self, steps: Sequence[Step], dtype: np.dtype | type = np.float32):
+        """Crop, resize and standardize an image into a CHW array in one pass.
+
+        The steps are planned together instead of run one after the other:
+        crops become the source box of the resize, so the cropped image is never
+        materialized, and standardization is folded into the write of the output,
+        so the resized image is the only intermediate. Resizing uses Pillow for
+        bilinear and bicubic, with the same kernels as the pillow backend of
+        `resize_image_min_side`, and a direct gather for nearest.
+
+        uint8 images are scaled to 0-1 like `standardize` does.
+
+        Args:
+            steps: Any number of crops and at most one resize and standardize.
+            dtype: Output dtype, float32 or float16.
+        """
+        dtype = np.dtype(dtype)
+        if dtype not in (np.float32, np.float16):
+            raise ValueError(f"Output dtype must be float32 or float16, not {dtype}.")
+
+        self.steps = list(steps)
+        self.dtype = dtype
+        self._mean: np.ndarray | None = None
+        self._std: np.ndarray | None = None
+
+        resizes = [
+            step
+            for step in self.steps
+            if isinstance(step, (ResizeMinSide, ResizeMaxSide))
+        ]
+        if len(resizes) > 1:
+            raise ValueError("A pipeline can resize at most once.")
+        for step in resizes:
+            if step.interpolation not in resize.INTERPOLATIONS:
+                raise ValueError(
+                    f"Invalid interpolation {step.interpolation}, "
+                    f"choose from {resize.INTERPOLATIONS}."
+                )
+
+        standardizes = [step for step in self.steps if isinstance(step, Standardize)]
+        if len(standardizes) > 1:
+            raise ValueError("A pipeline can standardize at most once.")
+        for standardize in standardizes:
+            dataset = standardize.dataset
+            if dataset is None and standardize.mean is None and standardize.std is None:
+                dataset = "imagenet"
+            mean, std = normalization.resolve_mean_std(
+                dataset, standardize.mean, standardize.std
+            )
+            self._mean = np.asarray(mean, dtype=np.float64)
+            self._std = np.asarray(std, dtype=np.float64)
+
+    def __call__(self, image: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
+        """Run the pipeline on an HW or HWC image.
+
+        Args:
+            image: The image to transform.
+            out: Optional CHW array of the output dtype to write into.
+
+        Returns:
+            The transformed image in CHW layout.
+        """
+        if image.ndim == 2:
+            image = image[..., None]
+        height, width, channels = image.shape
+
+        scale, bias = self._affine(image.dtype, channels)
+        plan = self._plan(height, width)
+        out_shape = (channels,) + plan.size
+
+        if out is None:
+            out = np.empty(out_shape, dtype=self.dtype)
+        elif out.shape != out_shape:
+            raise ValueError(
+                f"Output shape {out.shape} does not match image shape {out_shape}."
+            )
+        elif out.dtype != self.dtype:
+            raise ValueError(
+                f"Output dtype {out.dtype} does not match image dtype {self.dtype}."
+            )
+
+        resized_image = _resample(image, plan)
+
+        # Standardize while writing each channel into the output.
+        plane = None if self.dtype == np.float32 else np.empty(plan.size, np.float32)
+        for channel in range(channels):
+            target = out[channel] if plane is None else plane
+            np.multiply(
+                resized_image[..., channel], np.float32(scale[channel]), out=target
+            )
+            np.add(target, np.float32(bias[channel]), out=out[channel])
+
+        return out
+
+    def _affine(self, dtype: np.dtype, channels: int) -> tuple[np.ndarray, np.ndarray]:
+        """Return the per-channel scale and bias applied after resizing."""
+        scale = np.full(channels, 1 / 255 if dtype == np.uint8 else 1.0)
+        if self._mean is None or self._std is None:
+            return scale, np.zeros(channels)
+
+        if channels != len(self._mean) or channels != len(self._std):
+            raise ValueError(
+                f"Input image must have {len(self._mean)} channels, not {channels}."
+            )
+
+        # (x * scale - mean) / std, as a single multiply-add.
+        return scale / self._std, -self._mean / self._std
+
+    def _plan(self, height: int, width: int) -> _Plan:
+        # Crops before the resize narrow the source window. After it they move
+        # the box inside the window, scaled by the size of a resized pixel.
+        window = [0, 0]
+        window_sizes = (height, width)
+        origin = [0.0, 0.0]
+        scales = [1.0, 1.0]
+        sizes = (height, width)
+        interpolation = "nearest"
+        resized = False
+
+        for step in self.steps:
+            if isinstance(step, CenterSquareCrop):
+                crop_size = step.crop_size
+                if crop_size > sizes[0] or crop_size > sizes[1]:
+                    raise ValueError("Side length is larger than image dimensions.")
+                if crop_size <= 0:
+                    raise ValueError("Side length must be a positive integer.")
+
+                for axis in range(2):
+                    start = (sizes[axis] - crop_size) // 2
+                    if resized:
+                        origin[axis] += start * scales[axis]
+                    else:
+                        window[axis] += start
+                if not resized:
+                    window_sizes = (crop_size, crop_size)
+                sizes = (crop_size, crop_size)
+
+            elif isinstance(step, (ResizeMinSide, ResizeMaxSide)):
+                method = "min" if isinstance(step, ResizeMinSide) else "max"
+                new_sizes = resize.target_size(
+                    sizes[0], sizes[1], step.side_len, method
+                )
+                for axis in range(2):
+                    scales[axis] *= sizes[axis] / new_sizes[axis]
+                sizes = new_sizes
+                interpolation = step.interpolation
+                resized = True
+
+        box = (
+            origin[1],
+            origin[0],
+            origin[1] + sizes[1] * scales[1],
+            origin[0] + sizes[0] * scales[0],
+        )
+        return _Plan(
+            (
+                window[1],
+                window[0],
+                window[1] + window_sizes[1],
+                window[0] + window_sizes[0],
+            ),
+            box,
+            sizes,
+            interpolation,
+        )
+
+
+def _resample(image: np.ndarray, plan: _Plan) -> np.ndarray:
+    """Resample the box of an HWC image to the plan's size."""
+    window_left, window_top, window_right, window_bottom = plan.window
+    image = image[window_top:window_bottom, window_left:window_right]
+    left, top, right, bottom = plan.box
+    height, width = plan.size
+
+    # Nearest, and no resize at all, is a gather of the pixel under each center.
+    if plan.interpolation == "nearest":
+        rows = _nearest_indices(top, bottom, height, image.shape[0])
+        columns = _nearest_indices(left, right, width, image.shape[1])
+        return image[np.ix_(rows, columns)]
+
+    return resize.resize_pillow(image, plan.size, plan.interpolation, box=plan.box)
+
+
+def _nearest_indices(start: float, stop: float, size: int, limit: int) -> np.ndarray:
+    centers = start + (np.arange(size) + 0.5) * ((stop - start) / size)
+    return np.minimum(centers.astype(np.intp), limit - 1)
@@ -0,0 +1,155 @@
+import unittest
+
+import numpy as np
+from parameterized import parameterized
+
+from mash.images import crop, normalization, pipeline, resize
+
+
+def _reference(image: np.ndarray, steps: list) -> np.ndarray:
+    """Run the steps one after the other, standardizing at the end."""
+    result = image
+    for step in steps:
+        if isinstance(step, pipeline.CenterSquareCrop):
+            result = crop.center_square_crop(result, step.crop_size)
+        elif isinstance(step, pipeline.ResizeMinSide):
+            result = resize.resize_image_min_side(
+                result,
+                step.side_len,
+                interpolation=step.interpolation,
+                backend="pillow",
+            )
+        elif isinstance(step, pipeline.ResizeMaxSide):
+            result = resize.resize_image_max_side(
+                result,
+                step.side_len,
+                interpolation=step.interpolation,
+                backend="pillow",
+            )
+
+    result = result.astype(np.float32)
+    if image.dtype == np.uint8:
+        result /= 255
+
+    for step in steps:
+        if isinstance(step, pipeline.Standardize):
+            dataset = step.dataset
+            if dataset is None and step.mean is None:
+                dataset = "imagenet"
+            result = normalization.standardize(result, dataset, step.mean, step.std)
+
+    return np.transpose(result, (2, 0, 1))
+
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.image = rng.integers(0, 256, size=(120, 160, 3), dtype=np.uint8)
+
+    @parameterized.expand(
+        [
+            ([pipeline.CenterSquareCrop(100)],),
+            ([pipeline.ResizeMinSide(60)],),
+            ([pipeline.ResizeMaxSide(200, interpolation="bicubic")],),
+            ([pipeline.CenterSquareCrop(110), pipeline.ResizeMinSide(64)],),
+            ([pipeline.ResizeMinSide(72), pipeline.CenterSquareCrop(64)],),
+            (
+                [
+                    pipeline.CenterSquareCrop(100),
+                    pipeline.ResizeMinSide(72, interpolation="nearest"),
+                    pipeline.CenterSquareCrop(64),
+                    pipeline.Standardize(),
+                ],
+            ),
+            ([pipeline.Standardize(), pipeline.ResizeMaxSide(80)],),
+        ]
+    )
+    def test_matches_steps(self, steps):
+        result = pipeline.Pipeline(steps)(self.image)
+        expected = _reference(self.image, steps)
+
+        # Pillow rounds between its passes for uint8, so a box inside the image
+        # can be a couple of levels off from resizing the whole image.
+        self.assertEqual(result.dtype, np.float32)
+        self.assertEqual(result.shape, expected.shape)
+        np.testing.assert_allclose(result, expected, atol=2 / 255 / 0.224)
+
+        image = self.image.astype(np.float32) / 255
+        result = pipeline.Pipeline(steps)(image)
+        np.testing.assert_allclose(result, _reference(image, steps), atol=1e-4)
+
+    def test_float16(self):
+        steps = [pipeline.ResizeMinSide(64), pipeline.Standardize()]
+        result = pipeline.Pipeline(steps, dtype=np.float16)(self.image)
+
+        self.assertEqual(result.dtype, np.float16)
+        np.testing.assert_allclose(result, _reference(self.image, steps), atol=1e-2)
+
+    def test_float_input_is_not_scaled(self):
+        image = self.image.astype(np.float32) / 255
+        steps = [pipeline.CenterSquareCrop(100), pipeline.Standardize()]
+        result = pipeline.Pipeline(steps)(image)
+        np.testing.assert_allclose(result, _reference(image, steps), atol=1e-5)
+
+    def test_grayscale(self):
+        steps = [
+            pipeline.ResizeMinSide(60),
+            pipeline.Standardize(None, np.array([0.5]), np.array([0.25])),
+        ]
+        result = pipeline.Pipeline(steps)(self.image[..., 0])
+        expected = _reference(self.image[..., :1], steps)
+        np.testing.assert_allclose(result, expected, atol=1e-4)
+
+    def test_standardize_mean_std_keywords(self):
+        mean, std = np.array([0.4, 0.5, 0.6]), np.array([0.2, 0.25, 0.3])
+        steps = [pipeline.Standardize(mean=mean, std=std)]
+        result = pipeline.Pipeline(steps)(self.image)
+        np.testing.assert_allclose(result, _reference(self.image, steps), atol=1e-5)
+
+    def test_standardize_defaults_to_imagenet(self):
+        default = pipeline.Pipeline([pipeline.Standardize()])(self.image)
+        imagenet = pipeline.Pipeline([pipeline.Standardize("imagenet")])(self.image)
+        np.testing.assert_array_equal(default, imagenet)
+
+    def test_writes_into_out(self):
+        transform = pipeline.Pipeline([pipeline.ResizeMinSide(60)])
+        out = np.zeros((2, 3, 60, 80), dtype=np.float32)
+
+        result = transform(self.image, out=out[1])
+        self.assertIs(result.base, out)
+        np.testing.assert_array_equal(out[1], transform(self.image))
+        np.testing.assert_array_equal(out[0], 0)
+
+    def test_invalid_out_raises(self):
+        transform = pipeline.Pipeline([pipeline.ResizeMinSide(60)])
+        with self.assertRaises(ValueError):
+            transform(self.image, out=np.empty((3, 60, 60), np.float32))
+        with self.assertRaises(ValueError):
+            transform(self.image, out=np.empty((3, 60, 80), np.float16))
+
+    @parameterized.expand(
+        [
+            ([pipeline.ResizeMinSide(60), pipeline.ResizeMaxSide(60)], {}),
+            ([pipeline.Standardize(), pipeline.Standardize()], {}),
+            ([pipeline.ResizeMinSide(60, interpolation="lanczos")], {}),
+            ([pipeline.Standardize("unknown")], {}),
+            ([], {"dtype": np.float64}),
+        ]
+    )
+    def test_invalid_pipeline_raises(self, steps, kwargs):
+        with self.assertRaises(ValueError):
+            pipeline.Pipeline(steps, **kwargs)
+
+    def test_crop_too_large_raises(self):
+        transform = pipeline.Pipeline([pipeline.CenterSquareCrop(200)])
+        with self.assertRaises(ValueError):
+            transform(self.image)
+
+    def test_wrong_channels_raises(self):
+        transform = pipeline.Pipeline([pipeline.Standardize()])
+        with self.assertRaises(ValueError):
+            transform(self.image[..., :2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+"""Read regions of lazily opened images without decoding the whole image.
+
+Pillow describes the compressed data of an image as a list of tiles, and only
+decodes them on `load`. Narrowing that list to the tiles under a region, and the
+image size to their bounding box, decodes just that part of the file.
+
+This relies on `ImageFile.tile` holding `ImageFile._Tile` named tuples with
+`codec_name` and `extents` fields, as in Pillow >= 11, on `Image._size`, and on
+TIFF images allocating their `_tile_size` when loading.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import IO, Iterator
+
+from PIL import Image, ImageFile
+
+from mash.images import conversion
+
+# Pillow only exposes the decompression bomb limit as a global. It is lifted while
+# any large read is in progress and restored after the last one.
+_limit_lock = threading.Lock()
+_large_reads = 0
+_saved_limit: int | None = None
+
+# Codecs that decode rows top to bottom and can stop early once the rows above the
+# bottom of a region are done.
+_ROW_SEQUENTIAL_CODECS = ("raw", "zip")
+
+
+@contextmanager
+def _allow_large(allow_large: bool) -> Iterator[None]:
+    """Lift Pillow's decompression bomb limit for the duration of the block."""
+    global _large_reads, _saved_limit
+    if not allow_large:
+        yield
+        return
+
+    with _limit_lock:
+        if _large_reads == 0:
+            _saved_limit = Image.MAX_IMAGE_PIXELS
+            Image.MAX_IMAGE_PIXELS = None
+        _large_reads += 1
+    try:
+        yield
+    finally:
+        with _limit_lock:
+            _large_reads -= 1
+            if _large_reads == 0:
+                Image.MAX_IMAGE_PIXELS = _saved_limit
+
+
+def open_image(source: str | IO[bytes], allow_large: bool = False) -> Image.Image:
+    """Lazily open an image to read regions from.
+
+    Pillow refuses to open images over `Image.MAX_IMAGE_PIXELS` (about 179 MP)
+    as a guard against decompression bombs, which also rules out the gigapixel
+    scans that region reads are meant for. With allow_large the limit is lifted
+    while the header is parsed. It is a process-wide setting, so images opened
+    by other threads during that moment skip the check as well.
+
+    Args:
+        source: File path, url or s3:// uri, or an open binary file.
+        allow_large: Skip Pillow's decompression bomb check. Only use it for
+            trusted files.
+
+    Returns:
+        PIL image, not loaded yet.
+    """
+    with _allow_large(allow_large):
+        return _open(source)
+
+
+def _open(source: str | IO[bytes]) -> Image.Image:
+    if isinstance(source, str):
+        return conversion.pil_from_uri(source)
+    return Image.open(source)
+
+
+def _is_top_down(tile: ImageFile._Tile) -> bool:
+    """Whether a tile's rows are stored top to bottom."""
+    # Raw tiles pass (rawmode, stride, orientation), BMP and TGA are usually
+    # stored bottom-up with an orientation of -1.
+    if tile.codec_name == "raw" and isinstance(tile.args, tuple):
+        return len(tile.args) < 3 or tile.args[2] >= 0
+    return True
+
+
+def _set_decoded_size(image: Image.Image, size: tuple[int, int]) -> None:
+    """Shrink the image that load decodes into."""
+    image._size = size
+    # TIFF allocates its tile size rather than its size.
+    if hasattr(image, "_tile_size"):
+        image._tile_size = size
+
+
+def is_tiled(image: Image.Image) -> bool:
+    """Whether a lazily opened image is stored as separately decodable tiles.
+
+    This covers uncompressed tiled and striped TIFFs, which `decode_region` reads
+    without decoding the rest of the image. Pillow reads compressed TIFFs through
+    libtiff as a single tile, so they are never tiled here.
+    """
+    if not isinstance(image, ImageFile.ImageFile) or len(image.tile) < 2:
+        return False
+    return all(
+        tile.extents is not None and tile.codec_name != "libtiff" for tile in image.tile
+    )
+
+
+def decode_region(
+    image: Image.Image, box: tuple[int, int, int, int], allow_large: bool = False
+) -> Image.Image:
+    """Decode only the part of a lazily opened image needed to crop box from it.
+
+    Uncompressed tiled and striped files only decode the tiles that intersect the
+    box, and formats that decode row by row from the top stop after the last row
+    of the box. Anything else, including compressed TIFFs, falls back to a full
+    decode, so memory scales with the full image.
+
+    Args:
+        image: Image as returned by `Image.open`, not loaded yet.
+        box: Region to read as (left, top, right, bottom).
+        allow_large: Skip Pillow's decompression bomb check on the decoded
+            tiles, see `open_image`.
+
+    Returns:
+        PIL image of the region.
+    """
+    with _allow_large(allow_large):
+        return _decode_region(image, box)
+
+
+def _decode_region(image: Image.Image, box: tuple[int, int, int, int]) -> Image.Image:
+    left, top, right, bottom = box
+    if not isinstance(image, ImageFile.ImageFile):
+        return image.crop(box)
+
+    tiles = image.tile
+    if (
+        not tiles
+        or any(tile.extents is None for tile in tiles)
+        or any(tile.codec_name == "libtiff" for tile in tiles)
+    ):
+        return image.crop(box)
+
+    if len(tiles) == 1:
+        # Interlaced files spread every row over the whole stream, partial
+        # frames don't start at the top, and bottom-up files start at the bottom.
+        if (
+            tiles[0].codec_name not in _ROW_SEQUENTIAL_CODECS
+            or tiles[0].extents != (0, 0) + image.size
+            or image.info.get("interlace")
+            or not _is_top_down(tiles[0])
+        ):
+            return image.crop(box)
+
+        # Stop decoding after the bottom row of the region.
+        width = image.size[0]
+        image.tile = [tiles[0]._replace(extents=(0, 0, width, bottom))]
+        _set_decoded_size(image, (width, bottom))
+        image.load()
+        return image.crop(box)
+
+    # Keep the tiles that touch the box and decode them into an image that only
+    # spans their bounding box.
+    selected = []
+    for tile in tiles:
+        tile_left, tile_top, tile_right, tile_bottom = tile.extents or box
+        if tile_left < right and tile_right > left:
+            if tile_top < bottom and tile_bottom > top:
+                selected.append((tile, (tile_left, tile_top, tile_right, tile_bottom)))
+
+    x0 = min(extents[0] for _, extents in selected)
+    y0 = min(extents[1] for _, extents in selected)
+    x1 = max(extents[2] for _, extents in selected)
+    y1 = max(extents[3] for _, extents in selected)
+
+    image.tile = [
+        tile._replace(extents=(x - x0, y - y0, r - x0, b - y0))
+        for tile, (x, y, r, b) in selected
+    ]
+    _set_decoded_size(image, (x1 - x0, y1 - y0))
+    image.load()
+    return image.crop((left - x0, top - y0, right - x0, bottom - y0))
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import tifffile
+from parameterized import parameterized
+from PIL import Image
+
+from mash.images import region
+
+
+class TestDecodeRegion(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+        rng = np.random.default_rng(0)
+        self.image = rng.integers(0, 256, size=(300, 400, 3), dtype=np.uint8)
+
+    def _write(self, name: str, **kwargs) -> str:
+        path = os.path.join(self.directory, name)
+        if name == "tiled.tif":
+            tifffile.imwrite(path, self.image, tile=(64, 64))
+        elif name == "striped.tif":
+            tifffile.imwrite(path, self.image, rowsperstrip=32)
+        else:
+            Image.fromarray(self.image).save(path, **kwargs)
+        return path
+
+    @parameterized.expand(
+        [
+            ("tiled.tif", {}, True),
+            ("striped.tif", {}, True),
+            ("deflate.tif", {"compression": "tiff_adobe_deflate"}, False),
+            ("image.png", {}, False),
+            ("image.bmp", {}, False),
+            ("image.tga", {}, False),
+            ("top_down.tga", {"orientation": 1}, False),
+            ("image.ppm", {}, False),
+        ]
+    )
+    def test_decode_region(self, name, kwargs, tiled):
+        with Image.open(self._write(name, **kwargs)) as image:
+            self.assertEqual(region.is_tiled(image), tiled)
+            result = region.decode_region(image, (100, 130, 170, 180))
+            np.testing.assert_array_equal(
+                np.asarray(result), self.image[130:180, 100:170]
+            )
+
+    def test_tiled_decodes_bounding_box_of_tiles(self):
+        with Image.open(self._write("tiled.tif")) as image:
+            result = region.decode_region(image, (70, 70, 100, 100))
+            self.assertEqual(image.size, (64, 64))
+            self.assertEqual(image.im.size, (64, 64))
+
+        np.testing.assert_array_equal(np.asarray(result), self.image[70:100, 70:100])
+
+    def test_loaded_image_is_cropped(self):
+        image = Image.fromarray(self.image)
+        self.assertFalse(region.is_tiled(image))
+        result = region.decode_region(image, (0, 0, 10, 20))
+        np.testing.assert_array_equal(np.asarray(result), self.image[:20, :10])
+
+
+class TestOpenImage(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "image.png")
+        Image.new("RGB", (400, 300)).save(self.path)
+
+    def test_allow_large(self):
+        with patch.object(Image, "MAX_IMAGE_PIXELS", 20000):
+            with self.assertRaises(Image.DecompressionBombError):
+                region.open_image(self.path)
+
+            with region.open_image(self.path, allow_large=True) as image:
+                self.assertEqual(image.size, (400, 300))
+            with open(self.path, "rb") as f:
+                with region.open_image(f, allow_large=True) as image:
+                    self.assertEqual(image.size, (400, 300))
+
+            self.assertEqual(Image.MAX_IMAGE_PIXELS, 20000)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,17 +1,71 @@
+import math
+from functools import partial
+from typing import Sequence
+
 import numpy as np
+import torch
+import torch.nn.functional as F
+from PIL import Image
 from skimage.transform import resize
 
+from mash.images import conversion
 
-def _resize_image_fixed_side(
-    image: np.ndarray, side_len: int, method: str = "max", preserve_range: bool = True
-) -> np.ndarray:
+_BACKENDS = ("skimage", "pillow", "torch")
+INTERPOLATIONS = ("nearest", "bilinear", "bicubic")
+
+# Interpolation names mapped onto each backend's own setting.
+_SKIMAGE_ORDERS = {"nearest": 0, "bilinear": 1, "bicubic": 3}
+_PILLOW_FILTERS = {
+    "nearest": Image.Resampling.NEAREST,
+    "bilinear": Image.Resampling.BILINEAR,
+    "bicubic": Image.Resampling.BICUBIC,
+}
+# Kernel support of the Pillow filters, in source pixels when not downsampling.
+_PILLOW_SUPPORT = {"nearest": 0.5, "bilinear": 1.0, "bicubic": 2.0}
+# Plain "nearest" in torch is off by half a pixel compared to the others.
+_TORCH_MODES = {
+    "nearest": "nearest-exact",
+    "bilinear": "bilinear",
+    "bicubic": "bicubic",
+}
+
+_default_backend = "skimage"
+
+
+def set_resize_backend(backend: str) -> None:
+    """Set the backend used by the resize functions when none is passed.
+
+    Args:
+        backend: One of "skimage", "pillow" or "torch".
+    """
+    global _default_backend
+
+    if backend not in _BACKENDS:
+        raise ValueError(f"Invalid backend {backend}, choose from {_BACKENDS}.")
+
+    _default_backend = backend
+
+
+def target_size(
+    height: int, width: int, side_len: int, method: str = "max"
+) -> tuple[int, int]:
+    """Return the size of an image resized so one side has a given length.
+
+    Args:
+        height: Height of the image.
+        width: Width of the image.
+        side_len: Length of the resized side.
+        method: "max" to resize the longest side, "min" the shortest.
+
+    Returns:
+        The new (height, width).
+    """
     # Do some checking.
     if side_len <= 0:
         raise ValueError("Side length must be a positive integer.")
 
     # Need epsilon for floating point errors.
     epsilon = 1e-3
-    height, width, _ = image.shape
 
     # Compute the scaling factor.
     if method == "max":
@@ -27,15 +81,201 @@ def _resize_image_fixed_side(
 
     assert new_height == side_len or new_width == side_len, "One side incorrect"
 
-    resized_image = resize(
-        image, (new_height, new_width), preserve_range=preserve_range
-    )
+    return new_height, new_width
+
+
+def resize_pillow(
+    image: np.ndarray,
+    size: tuple[int, int],
+    interpolation: str = "bilinear",
+    box: tuple[float, float, float, float] | None = None,
+) -> np.ndarray:
+    """Resize an image, or a box inside it, to a size with Pillow.
+
+    uint8 images stay uint8 and everything else is resized as float32.
+
+    Args:
+        image: The image, HW or HWC.
+        size: The new (height, width).
+        interpolation: One of "nearest", "bilinear" or "bicubic".
+        box: Optional (left, top, right, bottom) source box in pixels, can be
+            fractional. Defaults to the whole image.
+
+    Returns:
+        The resized image.
+    """
+    _check_options("pillow", interpolation)
+    new_height, new_width = size
+    resample = _PILLOW_FILTERS[interpolation]
+
+    # Only hand Pillow the box plus the reach of the kernel, not the whole image.
+    if box is not None:
+        left, top, right, bottom = box
+        support = _PILLOW_SUPPORT[interpolation]
+        margin_x = math.ceil(support * max((right - left) / new_width, 1.0)) + 1
+        margin_y = math.ceil(support * max((bottom - top) / new_height, 1.0)) + 1
+        x0 = max(math.floor(left) - margin_x, 0)
+        y0 = max(math.floor(top) - margin_y, 0)
+        image = image[
+            y0 : math.ceil(bottom) + margin_y, x0 : math.ceil(right) + margin_x
+        ]
+        box = (left - x0, top - y0, right - x0, bottom - y0)
+
+    # RGB images are resized in a single pass.
+    if image.dtype == np.uint8 and image.ndim == 3 and image.shape[2] == 3:
+        pil_image = Image.fromarray(np.ascontiguousarray(image))
+        return np.array(pil_image.resize((new_width, new_height), resample, box=box))
+
+    # Anything else goes channel by channel, as "L" for uint8 and "F" otherwise.
+    dtype = np.uint8 if image.dtype == np.uint8 else np.float32
+    channels = image.reshape(image.shape[0], image.shape[1], -1)
+    resized = np.empty((new_height, new_width, channels.shape[2]), dtype=dtype)
+    for channel in range(channels.shape[2]):
+        plane = np.ascontiguousarray(channels[..., channel], dtype=dtype)
+        pil_image = Image.fromarray(plane).resize(
+            (new_width, new_height), resample, box=box
+        )
+        resized[..., channel] = np.asarray(pil_image)
+
+    return resized.reshape(size + image.shape[2:])
+
+
+def _resize_torch(
+    images: np.ndarray, size: tuple[int, int], interpolation: str
+) -> np.ndarray:
+    """Resize an NHWC stack with torch, uint8 stays uint8 and everything else is
+    float32."""
+    dtype = np.uint8 if images.dtype == np.uint8 else np.float32
+    tensor = conversion._wrap_numpy(np.ascontiguousarray(images, dtype=dtype))
+
+    # Viewing NHWC as NCHW gives channels last strides, which torch handles natively.
+    with torch.no_grad():
+        resized = F.interpolate(
+            tensor.permute(0, 3, 1, 2),
+            size=size,
+            mode=_TORCH_MODES[interpolation],
+            antialias=interpolation != "nearest",
+        )
+
+    return np.ascontiguousarray(resized.permute(0, 2, 3, 1).numpy())
+
+
+def _check_options(backend: str, interpolation: str) -> None:
+    if backend not in _BACKENDS:
+        raise ValueError(f"Invalid backend {backend}, choose from {_BACKENDS}.")
+    if interpolation not in INTERPOLATIONS:
+        raise ValueError(
+            f"Invalid interpolation {interpolation}, choose from {INTERPOLATIONS}."
+        )
+
+
+def _rescale(
+    resized_image: np.ndarray, dtype: np.dtype, preserve_range: bool
+) -> np.ndarray:
+    # Match skimage, integer images are scaled to 0-1 by their dtype's range.
+    if not preserve_range and np.issubdtype(dtype, np.integer):
+        scale = 1 / np.iinfo(dtype).max
+        return np.multiply(resized_image, scale, dtype=np.float32)
 
     return resized_image
 
 
+def _resize_image_fixed_side(
+    image: np.ndarray,
+    side_len: int,
+    method: str = "max",
+    preserve_range: bool = True,
+    interpolation: str = "bilinear",
+    backend: str | None = None,
+) -> np.ndarray:
+    backend = backend or _default_backend
+    _check_options(backend, interpolation)
+
+    height, width = image.shape[:2]
+    size = target_size(height, width, side_len, method)
+
+    if backend == "skimage":
+        return resize(
+            image,
+            size,
+            order=_SKIMAGE_ORDERS[interpolation],
+            preserve_range=preserve_range,
+        )
+
+    if backend == "pillow":
+        resized_image = resize_pillow(image, size, interpolation)
+    else:
+        stack = image.reshape((1, height, width, -1))
+        resized_image = _resize_torch(stack, size, interpolation)[0]
+        resized_image = resized_image.reshape(size + image.shape[2:])
+
+    return _rescale(resized_image, image.dtype, preserve_range)
+
+
+def _resize_many(
+    images: Sequence[np.ndarray] | np.ndarray,
+    side_len: int,
+    method: str,
+    preserve_range: bool,
+    interpolation: str,
+    backend: str | None,
+    max_workers: int | None,
+    stack: bool | None,
+) -> list[np.ndarray] | np.ndarray:
+    is_stack = isinstance(images, np.ndarray)
+    if isinstance(images, np.ndarray) and images.ndim != 4:
+        raise ValueError("Image stacks must be NHWC arrays.")
+    if stack is None:
+        stack = is_stack
+
+    backend = backend or _default_backend
+    _check_options(backend, interpolation)
+
+    # Same sized images go through torch in a single call.
+    if isinstance(images, np.ndarray) and backend == "torch" and len(images) > 0:
+        size = target_size(images.shape[1], images.shape[2], side_len, method)
+        resized = _resize_torch(images, size, interpolation)
+        resized = _rescale(resized, images.dtype, preserve_range)
+        return resized if stack else list(resized)
+
+    resize_one = partial(
+        _resize_image_fixed_side,
+        side_len=side_len,
+        method=method,
+        preserve_range=preserve_range,
+        interpolation=interpolation,
+        backend=backend,
+    )
+    items = list(images)
+    if not stack:
+        return conversion._map_ordered(resize_one, items, max_workers)
+
+    # The first image decides the batch shape, the rest land in place.
+    if not items:
+        raise ValueError("Cannot stack an empty list of images.")
+    first = resize_one(items[0])
+    batch = np.empty((len(items),) + first.shape, dtype=first.dtype)
+    batch[0] = first
+
+    def resize_into(idx: int) -> None:
+        resized_image = resize_one(items[idx])
+        if resized_image.shape != first.shape:
+            raise ValueError(
+                f"Cannot stack resized images of shapes {first.shape} "
+                f"and {resized_image.shape}."
+            )
+        batch[idx] = resized_image
+
+    conversion._map_ordered(resize_into, range(1, len(items)), max_workers)
+    return batch
+
+
 def resize_image_min_side(
-    image: np.ndarray, min_side_len: int = 224, preserve_range: bool = True
+    image: np.ndarray,
+    min_side_len: int = 224,
+    preserve_range: bool = True,
+    interpolation: str = "bilinear",
+    backend: str | None = None,
 ) -> np.ndarray:
     """Resize the image such that the smallest side is equal to the specified length.
 
@@ -43,17 +283,30 @@ def resize_image_min_side(
         image: The image to resize.
         min_side_len: The length of the smallest side.
         preserve_range: Preserve the range of the image.
+        interpolation: One of "nearest", "bilinear" or "bicubic".
+        backend: One of "skimage", "pillow" or "torch", defaults to the backend
+            set with `set_resize_backend`. Pillow and torch keep uint8 images as
+            uint8 and return float32 for everything else.
 
     Returns:
         The resized image.
     """
     return _resize_image_fixed_side(
-        image, min_side_len, method="min", preserve_range=preserve_range
+        image,
+        min_side_len,
+        method="min",
+        preserve_range=preserve_range,
+        interpolation=interpolation,
+        backend=backend,
     )
 
 
 def resize_image_max_side(
-    image: np.ndarray, max_side_len: int = 224, preserve_range: bool = True
+    image: np.ndarray,
+    max_side_len: int = 224,
+    preserve_range: bool = True,
+    interpolation: str = "bilinear",
+    backend: str | None = None,
 ) -> np.ndarray:
     """Resize the image such that the longest side is equal to the specified length.
 
@@ -61,10 +314,97 @@ def resize_image_max_side(
         image: The image to resize.
         max_side_len: The length of the smallest side.
         preserve_range: Preserve the range of the image, False for 0-1.
+        interpolation: One of "nearest", "bilinear" or "bicubic".
+        backend: One of "skimage", "pillow" or "torch", defaults to the backend
+            set with `set_resize_backend`. Pillow and torch keep uint8 images as
+            uint8 and return float32 for everything else.
 
     Returns:
         The resized image.
     """
     return _resize_image_fixed_side(
-        image, max_side_len, method="max", preserve_range=preserve_range
+        image,
+        max_side_len,
+        method="max",
+        preserve_range=preserve_range,
+        interpolation=interpolation,
+        backend=backend,
+    )
+
+
+def resize_image_min_side_many(
+    images: Sequence[np.ndarray] | np.ndarray,
+    min_side_len: int = 224,
+    preserve_range: bool = True,
+    interpolation: str = "bilinear",
+    backend: str | None = None,
+    max_workers: int | None = None,
+    stack: bool | None = None,
+) -> list[np.ndarray] | np.ndarray:
+    """Resize many images such that their smallest side is the specified length.
+
+    Images are resized in parallel on a thread pool. An NHWC stack with the torch
+    backend is resized in a single call instead.
+
+    Args:
+        images: List of images, which may differ in size, or an NHWC stack.
+        min_side_len: The length of the smallest side.
+        preserve_range: Preserve the range of the images.
+        interpolation: One of "nearest", "bilinear" or "bicubic".
+        backend: One of "skimage", "pillow" or "torch", see `resize_image_min_side`.
+        max_workers: Maximum number of threads, defaults to the executor default.
+        stack: Return a single NHWC array instead of a list, requires the resized
+            images to have equal shapes. Defaults to stacking only stacked inputs.
+
+    Returns:
+        List of resized images in input order, or a single stacked array.
+    """
+    return _resize_many(
+        images,
+        min_side_len,
+        method="min",
+        preserve_range=preserve_range,
+        interpolation=interpolation,
+        backend=backend,
+        max_workers=max_workers,
+        stack=stack,
+    )
+
+
+def resize_image_max_side_many(
+    images: Sequence[np.ndarray] | np.ndarray,
+    max_side_len: int = 224,
+    preserve_range: bool = True,
+    interpolation: str = "bilinear",
+    backend: str | None = None,
+    max_workers: int | None = None,
+    stack: bool | None = None,
+) -> list[np.ndarray] | np.ndarray:
+    """Resize many images such that their longest side is the specified length.
+
+    Images are resized in parallel on a thread pool. An NHWC stack with the torch
+    backend is resized in a single call instead.
+
+    Args:
+        images: List of images, which may differ in size, or an NHWC stack.
+        max_side_len: The length of the longest side.
+        preserve_range: Preserve the range of the images, False for 0-1.
+        interpolation: One of "nearest", "bilinear" or "bicubic".
+        backend: One of "skimage", "pillow" or "torch", see `resize_image_max_side`.
+        max_workers: Maximum number of threads, defaults to the executor default.
+        stack: Return a single NHWC array instead of a list, requires the resized
+            images to have equal shapes. Defaults to stacking only stacked inputs.
+
+    Returns:
+        List of resized images in input order, or a single stacked array.
+    """
+    return _resize_many(
+        images,
+        max_side_len,
+        method="max",
+        preserve_range=preserve_range,
+        interpolation=interpolation,
+        backend=backend,
+        max_workers=max_workers,
+        stack=stack,
     )
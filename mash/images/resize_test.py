@@ -1,6 +1,9 @@
 import unittest
+from itertools import product
 
 import numpy as np
+from parameterized import parameterized
+from PIL import Image
 
 from mash.images import resize
 
@@ -42,5 +45,180 @@ class TestImageResizing(unittest.TestCase):
         self.assertTrue(np.all((resized_image <= 1) & (resized_image >= 0)))
 
 
+class TestResizeBackends(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.image = rng.integers(0, 256, size=(120, 80, 3), dtype=np.uint8)
+
+    @parameterized.expand(
+        product(["skimage", "pillow", "torch"], ["nearest", "bilinear", "bicubic"])
+    )
+    def test_shape(self, backend, interpolation):
+        resized_image = resize.resize_image_max_side(
+            self.image, 60, interpolation=interpolation, backend=backend
+        )
+        self.assertEqual(resized_image.shape, (60, 40, 3))
+
+    @parameterized.expand([("pillow",), ("torch",)])
+    def test_uint8_stays_uint8(self, backend):
+        resized_image = resize.resize_image_min_side(self.image, 40, backend=backend)
+        self.assertEqual(resized_image.dtype, np.uint8)
+
+    @parameterized.expand([("pillow",), ("torch",)])
+    def test_float_returns_float32(self, backend):
+        image = self.image.astype(np.float64) / 255
+        resized_image = resize.resize_image_min_side(image, 40, backend=backend)
+        self.assertEqual(resized_image.dtype, np.float32)
+
+    @parameterized.expand(product(["pillow", "torch"], [(120, 80), (120, 80, 1)]))
+    def test_grayscale(self, backend, shape):
+        image = self.image[..., 0].reshape(shape)
+        resized_image = resize.resize_image_max_side(image, 60, backend=backend)
+        self.assertEqual(resized_image.shape, (60, 40) + shape[2:])
+
+    @parameterized.expand(product(["pillow", "torch"], ["bilinear", "bicubic"]))
+    def test_backends_agree(self, backend, interpolation):
+        image = self.image.astype(np.float32)
+        expected = resize.resize_image_max_side(
+            image, 60, interpolation=interpolation, backend="pillow"
+        )
+        resized_image = resize.resize_image_max_side(
+            image, 60, interpolation=interpolation, backend=backend
+        )
+        np.testing.assert_allclose(resized_image, expected, atol=1.0)
+
+    @parameterized.expand([("pillow",), ("torch",)])
+    def test_nearest_matches_skimage(self, backend):
+        expected = resize.resize_image_max_side(
+            self.image, 40, interpolation="nearest", backend="skimage"
+        )
+        resized_image = resize.resize_image_max_side(
+            self.image, 40, interpolation="nearest", backend=backend
+        )
+        np.testing.assert_array_equal(resized_image, expected)
+
+    @parameterized.expand([("pillow",), ("torch",)])
+    def test_preserve_range_false_normalizes_values(self, backend):
+        image = np.full((100, 100, 3), 255, dtype=np.uint8)
+        resized_image = resize.resize_image_min_side(
+            image, 50, preserve_range=False, backend=backend
+        )
+        self.assertEqual(resized_image.dtype, np.float32)
+        np.testing.assert_allclose(resized_image, 1.0)
+
+    def test_set_resize_backend(self):
+        resize.set_resize_backend("pillow")
+        self.addCleanup(resize.set_resize_backend, "skimage")
+
+        resized_image = resize.resize_image_min_side(self.image, 40)
+        self.assertEqual(resized_image.dtype, np.uint8)
+
+    def test_invalid_backend_raises(self):
+        with self.assertRaises(ValueError):
+            resize.resize_image_min_side(self.image, 40, backend="opencv")
+        with self.assertRaises(ValueError):
+            resize.set_resize_backend("opencv")
+
+    def test_invalid_interpolation_raises(self):
+        with self.assertRaises(ValueError):
+            resize.resize_image_min_side(self.image, 40, interpolation="lanczos")
+
+
+class TestResizePillow(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.image = rng.integers(0, 256, size=(60, 80, 3), dtype=np.uint8)
+
+    @parameterized.expand(
+        product(["nearest", "bilinear", "bicubic"], [np.uint8, np.float32])
+    )
+    def test_box_matches_pillow(self, interpolation, dtype):
+        # Pillow sees only the box and the kernel's reach, which must not change
+        # the result against resizing the box of the whole image.
+        box = (20.0, 10.5, 60.0, 50.5)
+        image = self.image.astype(dtype)
+        result = resize.resize_pillow(image, (20, 20), interpolation, box=box)
+
+        resample = resize._PILLOW_FILTERS[interpolation]
+        for channel in range(3):
+            plane = Image.fromarray(image[..., channel])
+            expected = plane.resize((20, 20), resample, box=box)
+            self.assertEqual(result.dtype, dtype)
+            np.testing.assert_array_equal(result[..., channel], expected)
+
+    def test_fractional_box(self):
+        result = resize.resize_pillow(
+            self.image, (8, 8), "bilinear", box=(10.5, 4.25, 50.5, 44.25)
+        )
+        self.assertEqual(result.shape, (8, 8, 3))
+
+    def test_invalid_interpolation_raises(self):
+        with self.assertRaises(ValueError):
+            resize.resize_pillow(self.image, (20, 20), "lanczos")
+
+
+class TestResizeMany(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.stack = rng.integers(0, 256, size=(4, 60, 80, 3), dtype=np.uint8)
+        self.images = [
+            rng.integers(0, 256, size=shape, dtype=np.uint8)
+            for shape in [(60, 80, 3), (90, 120, 3), (30, 40, 3)]
+        ]
+
+    @parameterized.expand([("skimage",), ("pillow",), ("torch",)])
+    def test_list_matches_single(self, backend):
+        results = resize.resize_image_min_side_many(
+            self.images, 30, backend=backend, max_workers=2
+        )
+        self.assertIsInstance(results, list)
+        for image, result in zip(self.images, results):
+            expected = resize.resize_image_min_side(image, 30, backend=backend)
+            np.testing.assert_array_equal(result, expected)
+
+    @parameterized.expand([("skimage",), ("pillow",), ("torch",)])
+    def test_stack_matches_single(self, backend):
+        result = resize.resize_image_max_side_many(self.stack, 40, backend=backend)
+        self.assertEqual(result.shape, (4, 30, 40, 3))
+        for image, resized_image in zip(self.stack, result):
+            expected = resize.resize_image_max_side(image, 40, backend=backend)
+            np.testing.assert_allclose(resized_image, expected, atol=1)
+
+    def test_list_stacks_when_shapes_match(self):
+        result = resize.resize_image_min_side_many(
+            self.images, 30, backend="pillow", stack=True
+        )
+        self.assertEqual(result.shape, (3, 30, 40, 3))
+        self.assertEqual(result.dtype, np.uint8)
+
+    def test_stack_returns_list(self):
+        result = resize.resize_image_min_side_many(
+            self.stack, 30, backend="torch", stack=False
+        )
+        self.assertIsInstance(result, list)
+        self.assertEqual(len(result), 4)
+
+    def test_preserve_range_false_torch_stack(self):
+        result = resize.resize_image_min_side_many(
+            self.stack, 30, preserve_range=False, backend="torch"
+        )
+        self.assertEqual(result.dtype, np.float32)
+        self.assertLessEqual(result.max(), 1.0)
+
+    def test_mismatched_shapes_raise_when_stacking(self):
+        images = [np.zeros((60, 80, 3), np.uint8), np.zeros((80, 60, 3), np.uint8)]
+        with self.assertRaises(ValueError):
+            resize.resize_image_min_side_many(images, 30, backend="pillow", stack=True)
+
+    def test_empty(self):
+        self.assertEqual(resize.resize_image_min_side_many([], 30), [])
+        with self.assertRaises(ValueError):
+            resize.resize_image_min_side_many([], 30, stack=True)
+
+    def test_invalid_stack_raises(self):
+        with self.assertRaises(ValueError):
+            resize.resize_image_min_side_many(self.stack[0], 30)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,25 +1,23 @@
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from itertools import product
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Iterator
+
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from PIL import Image
 
+from mash.images import fetch, region
 
-def image_to_tiles(
-    image: np.ndarray,
+
+def _tile_strides(
     tile_width: int,
     tile_height: int,
     overlap_width: int | None = None,
     overlap_height: int | None = None,
-) -> np.ndarray:
-    """Splits an image into tiles with optional overlap.
-
-    Args:
-        image: A numpy array representing the image.
-        tile_width: The width of each tile.
-        tile_height: The height of each tile.
-        overlap_width: The overlap between tiles horizontally.
-        overlap_height: The overlap between tiles vertically.
-
-    Returns:
-        A numpy array containing the tiles. Each tile is a sub-array of the original image.
-    """
+) -> tuple[int, int]:
+    """Validate the tiling arguments and return the (y, x) strides between tiles."""
     # Check for invalid inputs.
     if tile_width <= 0 or tile_height <= 0:
         raise ValueError("Tile width and height must be positive integers")
@@ -44,28 +42,606 @@ def image_to_tiles(
     if stride_x <= 0 or stride_y <= 0:
         raise ValueError("Overlap must be less than the dimensions of the tile")
 
-    # Calculate the number of tiles in each dimension.
-    num_tiles_x = (
-        (image.shape[1] - overlap_width) // stride_x
-        if overlap_width is not None
-        else image.shape[1] // tile_width
-    )
-    num_tiles_y = (
-        (image.shape[0] - overlap_height) // stride_y
-        if overlap_height is not None
-        else image.shape[0] // tile_height
+    return stride_y, stride_x
+
+
+def tile_grid(
+    image: np.ndarray,
+    tile_width: int,
+    tile_height: int,
+    overlap_width: int | None = None,
+    overlap_height: int | None = None,
+    copy: bool = False,
+) -> np.ndarray:
+    """Return the tiles of an image as a grid, by default a view of the image.
+
+    The view shares memory with the image, so it takes constant time and memory
+    however many tiles there are. It is read-only because overlapping tiles share
+    pixels. Tiles that don't fit entirely in the image are dropped, like in
+    `image_to_tiles`.
+
+    Args:
+        image: A numpy array representing the image, HW or HWC.
+        tile_width: The width of each tile.
+        tile_height: The height of each tile.
+        overlap_width: The overlap between tiles horizontally.
+        overlap_height: The overlap between tiles vertically.
+        copy: Return a writeable contiguous copy instead of a view.
+
+    Returns:
+        Array of shape (tiles_y, tiles_x, tile_height, tile_width[, C]).
+    """
+    stride_y, stride_x = _tile_strides(
+        tile_width, tile_height, overlap_width, overlap_height
     )
 
-    # Extract the tiles.
-    tiles = []
-    for y in range(num_tiles_y):
-        for x in range(num_tiles_x):
-            tile = image[
-                y * stride_y : y * stride_y + tile_height,
-                x * stride_x : x * stride_x + tile_width,
-            ]
-            tiles.append(tile)
+    height, width = image.shape[:2]
+    if tile_height > height or tile_width > width:
+        tiles = np.empty((0, 0, tile_height, tile_width) + image.shape[2:], image.dtype)
+    else:
+        # Windows come out as (y, x, [C,] tile_height, tile_width), with one per
+        # pixel, so step through them by the stride and put the channels last.
+        windows = sliding_window_view(image, (tile_height, tile_width), axis=(0, 1))
+        tiles = np.moveaxis(windows[::stride_y, ::stride_x], (-2, -1), (2, 3))
+
+    return np.ascontiguousarray(tiles) if copy else tiles
 
-    tiles_array = np.array(tiles)
+
+def image_to_tiles(
+    image: np.ndarray,
+    tile_width: int,
+    tile_height: int,
+    overlap_width: int | None = None,
+    overlap_height: int | None = None,
+) -> np.ndarray:
+    """Splits an image into tiles with optional overlap.
+
+    Args:
+        image: A numpy array representing the image.
+        tile_width: The width of each tile.
+        tile_height: The height of each tile.
+        overlap_width: The overlap between tiles horizontally.
+        overlap_height: The overlap between tiles vertically.
+
+    Returns:
+        A numpy array containing the tiles. Each tile is a sub-array of the original image.
+    """
+    tiles = tile_grid(image, tile_width, tile_height, overlap_width, overlap_height)
+
+    # Copy every tile out of the image in one go.
+    tiles_array = np.empty(
+        (tiles.shape[0] * tiles.shape[1],) + tiles.shape[2:], tiles.dtype
+    )
+    tiles_array.reshape(tiles.shape)[...] = tiles
 
     return tiles_array
+
+
+_BLEND_MODES = ("mean", "max", "feather")
+
+
+def _feather_window(
+    tile_width: int, tile_height: int, overlap_width: int, overlap_height: int
+) -> np.ndarray:
+    """Return a (tile_height, tile_width) weight that ramps up over the overlap."""
+
+    def ramp(size: int, overlap: int) -> np.ndarray:
+        positions = np.arange(size)
+        distance = np.minimum(positions + 1, size - positions)
+        return np.minimum(distance / (overlap + 1), 1.0)
+
+    window = np.outer(
+        ramp(tile_height, overlap_height), ramp(tile_width, overlap_width)
+    )
+    return window.astype(np.float32)
+
+
+def tiles_to_image(
+    tiles: np.ndarray,
+    image_width: int,
+    image_height: int,
+    overlap_width: int | None = None,
+    overlap_height: int | None = None,
+    blend: str = "mean",
+    out: np.ndarray | None = None,
+    chunk_rows: int | None = None,
+) -> np.ndarray:
+    """Stitch tiles from `image_to_tiles` back into an image, blending overlaps.
+
+    Tiles that don't overlap each other are written in a single vectorized step,
+    so the work is a handful of array operations rather than one per tile.
+    Pixels that no tile covers are zero.
+
+    Args:
+        tiles: Tiles of shape (N, tile_height, tile_width[, C]) in row-major
+            order, as returned by `image_to_tiles`. Reshape a `tile_grid` with
+            `grid.reshape((-1,) + grid.shape[2:])`.
+        image_width: The width of the original image.
+        image_height: The height of the original image.
+        overlap_width: The overlap between tiles horizontally.
+        overlap_height: The overlap between tiles vertically.
+        blend: How to combine overlapping pixels, "mean", "max" or "feather" for
+            a weighted mean that fades each tile out over the overlap.
+        out: Optional float32 array of shape (image_height, image_width[, C]) to
+            accumulate into, its contents are overwritten.
+        chunk_rows: Number of rows of tiles to accumulate at a time. Limits the
+            blending weights kept in memory to one chunk instead of the image.
+
+    Returns:
+        The stitched float32 image.
+    """
+    if blend not in _BLEND_MODES:
+        raise ValueError(f"Invalid blend mode {blend}, choose from {_BLEND_MODES}.")
+    if chunk_rows is not None and chunk_rows <= 0:
+        raise ValueError("chunk_rows must be a positive integer.")
+
+    tile_height, tile_width = tiles.shape[1:3]
+    stride_y, stride_x = _tile_strides(
+        tile_width, tile_height, overlap_width, overlap_height
+    )
+    num_tiles_x = max((image_width - tile_width) // stride_x + 1, 0)
+    num_tiles_y = max((image_height - tile_height) // stride_y + 1, 0)
+    if len(tiles) != num_tiles_x * num_tiles_y:
+        raise ValueError(
+            f"Expected {num_tiles_x * num_tiles_y} tiles for the image, got {len(tiles)}."
+        )
+
+    shape = (image_height, image_width) + tiles.shape[3:]
+    if out is None:
+        out = np.empty(shape, dtype=np.float32)
+    elif out.shape != shape:
+        raise ValueError(
+            f"Output shape {out.shape} does not match image shape {shape}."
+        )
+    elif out.dtype != np.float32:
+        raise ValueError(f"Output dtype must be float32, not {out.dtype}.")
+
+    if len(tiles) == 0:
+        out.fill(0)
+        return out
+
+    # Only the top left is covered by tiles, the rest of the image stays zero.
+    covered_height = (num_tiles_y - 1) * stride_y + tile_height
+    covered_width = (num_tiles_x - 1) * stride_x + tile_width
+    out[covered_height:] = 0
+    out[:, covered_width:] = 0
+    canvas = out[:covered_height, :covered_width]
+    canvas.fill(-np.inf if blend == "max" else 0)
+
+    window = np.ones((tile_height, tile_width), dtype=np.float32)
+    if blend == "feather":
+        window = _feather_window(
+            tile_width, tile_height, tile_width - stride_x, tile_height - stride_y
+        )
+    channel_window = window.reshape(window.shape + (1,) * (tiles.ndim - 3))
+
+    # Tiles this many apart along each axis don't overlap.
+    step_x = -(-tile_width // stride_x)
+    step_y = -(-tile_height // stride_y)
+
+    def group_views(
+        band: np.ndarray, offset_x: int, offset_y: int, shape: tuple[int, ...]
+    ) -> np.ndarray:
+        windows = sliding_window_view(
+            band[offset_y * stride_y :, offset_x * stride_x :],
+            (tile_height, tile_width),
+            axis=(0, 1),
+            writeable=True,
+        )[:: step_y * stride_y, :: step_x * stride_x][: shape[0], : shape[1]]
+        return np.moveaxis(windows, (-2, -1), (2, 3))
+
+    chunk_rows = chunk_rows or num_tiles_y
+    weight = None
+    if blend != "max":
+        band_height = (chunk_rows - 1) * stride_y + tile_height
+        weight = np.zeros((band_height, covered_width), dtype=np.float32)
+    carried = 0
+
+    for first_row in range(0, num_tiles_y, chunk_rows):
+        last_row = min(first_row + chunk_rows, num_tiles_y)
+        top = first_row * stride_y
+        bottom = (last_row - 1) * stride_y + tile_height
+        band = canvas[top:bottom]
+        grid = tiles[first_row * num_tiles_x : last_row * num_tiles_x].reshape(
+            (last_row - first_row, num_tiles_x) + tiles.shape[1:]
+        )
+        if weight is not None:
+            weight[carried:] = 0
+
+        for offset_y, offset_x in product(range(step_y), range(step_x)):
+            group = grid[offset_y::step_y, offset_x::step_x]
+            if group.size == 0:
+                continue
+
+            views = group_views(band, offset_x, offset_y, group.shape)
+            if weight is None:
+                np.maximum(views, group, out=views)
+                continue
+
+            # A row of tiles at a time keeps the converted temporary small.
+            for row_views, row in zip(views, group):
+                if blend == "feather":
+                    row_views += row * channel_window
+                else:
+                    row_views += row
+            group_views(weight, offset_x, offset_y, group.shape)[...] += window
+
+        if weight is None:
+            continue
+
+        # Rows above the next chunk of tiles are final, normalize them and carry
+        # the weights of the overlap over to the next chunk.
+        done = last_row * stride_y if last_row < num_tiles_y else bottom
+        finished_weight = weight[: done - top]
+        canvas[top:done] /= finished_weight.reshape(
+            finished_weight.shape + (1,) * (tiles.ndim - 3)
+        )
+
+        carried = bottom - done
+        weight[:carried] = weight[done - top : bottom - top]
+
+    return out
+
+
+def _num_tiles(size: int, tile_size: int, stride: int, pad: bool) -> int:
+    """Number of tiles along an axis, padding adds a last tile over the remainder."""
+    if pad:
+        return max(-(-(size - tile_size) // stride), 0) + 1
+    return max((size - tile_size) // stride + 1, 0)
+
+
+def _region_reader(
+    uri: str, allow_large: bool = False
+) -> tuple[tuple[int, int], Callable[[tuple[int, int, int, int]], np.ndarray]]:
+    """Return the (width, height) of an image and a function reading a box of it.
+
+    Uncompressed tiled and striped files are reopened for every box and only the
+    tiles under it are decoded. Anything else, including compressed TIFFs, is
+    decoded once and sliced.
+    """
+    if fetch.is_url(uri):
+        # HTTP bodies are downloaded whole anyway, so only do that once.
+        data = fetch.read_remote(uri).read()
+
+        def open_image() -> Image.Image:
+            return region.open_image(BytesIO(data), allow_large=allow_large)
+
+    else:
+
+        def open_image() -> Image.Image:
+            return region.open_image(uri, allow_large=allow_large)
+
+    image = open_image()
+    if not region.is_tiled(image):
+        pixels = np.asarray(image)
+        return image.size, lambda box: pixels[box[1] : box[3], box[0] : box[2]]
+
+    def read(box: tuple[int, int, int, int]) -> np.ndarray:
+        with open_image() as image:
+            return np.asarray(region.decode_region(image, box, allow_large))
+
+    image.close()
+    return image.size, read
+
+
+def tiles_from_uri(
+    uri: str,
+    tile_width: int,
+    tile_height: int,
+    overlap_width: int | None = None,
+    overlap_height: int | None = None,
+    pad: bool = False,
+    allow_large: bool = False,
+) -> Iterator[tuple[int, int, np.ndarray]]:
+    """Stream the tiles of an image file without holding the whole image.
+
+    Tiles are read one row of tiles at a time, so for tiled and striped files
+    (i.e. uncompressed TIFF) only that band is decoded and peak memory is about
+    one band. Other formats, including TIFFs that Pillow decodes with libtiff,
+    are decoded whole once and then tiled.
+
+    Args:
+        uri: File path, url or s3:// uri of the image.
+        tile_width: The width of each tile.
+        tile_height: The height of each tile.
+        overlap_width: The overlap between tiles horizontally.
+        overlap_height: The overlap between tiles vertically.
+        pad: Pad the right and bottom edges with zeros so the tiles cover the
+            whole image, instead of dropping tiles that don't fit.
+        allow_large: Open images over Pillow's decompression bomb limit, see
+            `region.open_image`.
+
+    Yields:
+        The x and y of the top left corner of each tile and the tile itself, a
+        read-only view of the band, in row-major order.
+    """
+    stride_y, stride_x = _tile_strides(
+        tile_width, tile_height, overlap_width, overlap_height
+    )
+    (width, height), read = _region_reader(uri, allow_large)
+    num_tiles_x = _num_tiles(width, tile_width, stride_x, pad)
+    num_tiles_y = _num_tiles(height, tile_height, stride_y, pad)
+    if num_tiles_x == 0 or num_tiles_y == 0:
+        return
+
+    band_width = (num_tiles_x - 1) * stride_x + tile_width
+    for tile_y in range(num_tiles_y):
+        top = tile_y * stride_y
+        bottom = top + tile_height
+        band = read((0, top, min(band_width, width), min(bottom, height)))
+        if band.shape[:2] != (tile_height, band_width):
+            padded = np.zeros((tile_height, band_width) + band.shape[2:], band.dtype)
+            padded[: band.shape[0], : band.shape[1]] = band
+            band = padded
+
+        row = tile_grid(band, tile_width, tile_height, overlap_width)[0]
+        for tile_x, tile in enumerate(row):
+            yield tile_x * stride_x, top, tile
+
+
+def tile_batches_from_uri(
+    uri: str,
+    tile_width: int,
+    tile_height: int,
+    batch_size: int,
+    overlap_width: int | None = None,
+    overlap_height: int | None = None,
+    pad: bool = False,
+    allow_large: bool = False,
+) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+    """Stream the tiles of an image file in batches, see `tiles_from_uri`.
+
+    Args:
+        uri: File path, url or s3:// uri of the image.
+        tile_width: The width of each tile.
+        tile_height: The height of each tile.
+        batch_size: The number of tiles in a batch, the last one may be smaller.
+        overlap_width: The overlap between tiles horizontally.
+        overlap_height: The overlap between tiles vertically.
+        pad: Pad the right and bottom edges so the tiles cover the whole image.
+        allow_large: Open images over Pillow's decompression bomb limit.
+
+    Yields:
+        Array of shape (N, 2) with the x and y of each tile and the tiles, of
+        shape (N, tile_height, tile_width[, C]).
+    """
+    if batch_size <= 0:
+        raise ValueError("batch_size must be a positive integer.")
+
+    coordinates = np.empty((batch_size, 2), dtype=np.int64)
+    batch = None
+    count = 0
+    for x, y, tile in tiles_from_uri(
+        uri, tile_width, tile_height, overlap_width, overlap_height, pad, allow_large
+    ):
+        if batch is None:
+            batch = np.empty((batch_size,) + tile.shape, tile.dtype)
+        coordinates[count] = x, y
+        batch[count] = tile
+        count += 1
+
+        if count == batch_size:
+            yield coordinates, batch
+            coordinates = np.empty_like(coordinates)
+            batch = np.empty_like(batch)
+            count = 0
+
+    if batch is not None and count > 0:
+        yield coordinates[:count], batch[:count]
+
+
+# A tile as (x, y) of its top left corner and the (left, top, right, bottom) box
+# of the pixels it writes to the output.
+_TileTask = tuple[int, int, tuple[int, int, int, int]]
+
+# Shared arrays and tile function of a `map_tiles` worker process.
+_worker_state: dict[str, Any] = {}
+
+
+def _tile_tasks(
+    num_tiles_x: int,
+    num_tiles_y: int,
+    tile_width: int,
+    tile_height: int,
+    stride_x: int,
+    stride_y: int,
+) -> list[list[_TileTask]]:
+    """Return the tasks of each row of tiles.
+
+    Overlaps are split down the middle between neighbouring tiles, so every pixel
+    is written by exactly one tile and away from the tile edge where possible.
+    """
+
+    def cores(num_tiles: int, tile_size: int, stride: int) -> list[tuple[int, int]]:
+        overlap = tile_size - stride
+        return [
+            (
+                index * stride + (overlap // 2 if index > 0 else 0),
+                index * stride
+                + tile_size
+                - (overlap - overlap // 2 if index < num_tiles - 1 else 0),
+            )
+            for index in range(num_tiles)
+        ]
+
+    cores_x = cores(num_tiles_x, tile_width, stride_x)
+    cores_y = cores(num_tiles_y, tile_height, stride_y)
+    return [
+        [
+            (tile_x * stride_x, tile_y * stride_y, (left, top, right, bottom))
+            for tile_x, (left, right) in enumerate(cores_x)
+        ]
+        for tile_y, (top, bottom) in enumerate(cores_y)
+    ]
+
+
+def _write_tile(out: np.ndarray, result: np.ndarray, task: _TileTask) -> None:
+    """Write the part of a tile result that the task owns to out."""
+    x, y, (left, top, right, bottom) = task
+    out[top:bottom, left:right] = result[top - y : bottom - y, left - x : right - x]
+
+
+def _apply_tiles(
+    fn: Callable[[np.ndarray], np.ndarray],
+    source: np.ndarray,
+    out: np.ndarray,
+    tile_size: tuple[int, int],
+    tasks: list[_TileTask],
+) -> None:
+    """Run fn on each tile of source and write the results to out."""
+    tile_height, tile_width = tile_size
+    for task in tasks:
+        x, y, _ = task
+        result = np.asarray(fn(source[y : y + tile_height, x : x + tile_width]))
+        if result.shape != tile_size + out.shape[2:]:
+            raise ValueError(
+                f"Tile function returned shape {result.shape}, expected "
+                f"{tile_size + out.shape[2:]}."
+            )
+        _write_tile(out, result, task)
+
+
+def _attach(name: str, shape: tuple[int, ...], dtype: np.dtype) -> np.ndarray:
+    """Return an array backed by an existing shared memory block."""
+    memory = SharedMemory(name=name)
+    # Keep the block mapped for as long as the worker lives.
+    _worker_state.setdefault("memory", []).append(memory)
+    return np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+
+
+def _init_tile_worker(
+    fn: Callable[[np.ndarray], np.ndarray],
+    source: tuple[str, tuple[int, ...], np.dtype],
+    out: tuple[str, tuple[int, ...], np.dtype],
+    tile_size: tuple[int, int],
+) -> None:
+    """Attach a worker process to the shared source and output arrays."""
+    _worker_state["fn"] = fn
+    _worker_state["source"] = _attach(*source)
+    _worker_state["out"] = _attach(*out)
+    _worker_state["tile_size"] = tile_size
+
+
+def _map_tile_row(tasks: list[_TileTask]) -> None:
+    """Process a row of tiles in a worker process."""
+    _apply_tiles(
+        _worker_state["fn"],
+        _worker_state["source"],
+        _worker_state["out"],
+        _worker_state["tile_size"],
+        tasks,
+    )
+
+
+def _shared_array(
+    shape: tuple[int, ...], dtype: np.dtype
+) -> tuple[SharedMemory, np.ndarray]:
+    """Create a zeroed array in a new shared memory block."""
+    memory = SharedMemory(
+        create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1)
+    )
+    array = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+    array.fill(0)
+    return memory, array
+
+
+def map_tiles(
+    image: np.ndarray,
+    fn: Callable[[np.ndarray], np.ndarray],
+    tile_width: int,
+    tile_height: int,
+    overlap_width: int | None = None,
+    overlap_height: int | None = None,
+    workers: int | None = None,
+    pad: bool = False,
+) -> np.ndarray:
+    """Apply a function to every tile of an image and assemble the results.
+
+    With several workers, the image and the output are placed in shared memory
+    and tiles are processed by a pool of processes, which only receive the tile
+    coordinates and write their results in place. Overlapping results are split
+    down the middle of the overlap, so each tile only contributes pixels at least
+    half the overlap away from its neighbours.
+
+    Args:
+        image: A numpy array representing the image, HW or HWC.
+        fn: Function from a tile to an array with the same height and width, i.e.
+            a filter. It runs in the worker processes, so must be picklable.
+        tile_width: The width of each tile.
+        tile_height: The height of each tile.
+        overlap_width: The overlap between tiles horizontally.
+        overlap_height: The overlap between tiles vertically.
+        workers: Number of worker processes, None or 1 runs in this process.
+        pad: Pad the right and bottom edges with zeros so the tiles cover the
+            whole image, instead of leaving the uncovered pixels zero.
+
+    Returns:
+        Array with the height and width of the image and the dtype and trailing
+        dimensions returned by fn.
+    """
+    if workers is not None and workers <= 0:
+        raise ValueError("workers must be a positive integer.")
+
+    stride_y, stride_x = _tile_strides(
+        tile_width, tile_height, overlap_width, overlap_height
+    )
+    height, width = image.shape[:2]
+    num_tiles_x = _num_tiles(width, tile_width, stride_x, pad)
+    num_tiles_y = _num_tiles(height, tile_height, stride_y, pad)
+    if num_tiles_x == 0 or num_tiles_y == 0:
+        raise ValueError("Tile size is larger than the image.")
+
+    padded_height = max((num_tiles_y - 1) * stride_y + tile_height, height)
+    padded_width = max((num_tiles_x - 1) * stride_x + tile_width, width)
+    if (padded_height, padded_width) != (height, width):
+        padded = np.zeros((padded_height, padded_width) + image.shape[2:], image.dtype)
+        padded[:height, :width] = image
+        image = padded
+
+    tasks = _tile_tasks(
+        num_tiles_x, num_tiles_y, tile_width, tile_height, stride_x, stride_y
+    )
+    tile_size = (tile_height, tile_width)
+
+    # Run the first tile here to find the output dtype and channels.
+    first_task = tasks[0].pop(0)
+    first = np.asarray(fn(image[:tile_height, :tile_width]))
+    if first.shape[:2] != tile_size:
+        raise ValueError(
+            f"Tile function returned shape {first.shape}, expected {tile_size}."
+        )
+    out_shape = image.shape[:2] + first.shape[2:]
+
+    if workers is None or workers == 1:
+        out = np.zeros(out_shape, dtype=first.dtype)
+        _write_tile(out, first, first_task)
+        for row in tasks:
+            _apply_tiles(fn, image, out, tile_size, row)
+        return out[:height, :width]
+
+    source_memory, source = _shared_array(image.shape, image.dtype)
+    out_memory, out = _shared_array(out_shape, first.dtype)
+    try:
+        source[...] = image
+        _write_tile(out, first, first_task)
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_tile_worker,
+            initargs=(
+                fn,
+                (source_memory.name, source.shape, source.dtype),
+                (out_memory.name, out.shape, out.dtype),
+                tile_size,
+            ),
+        ) as executor:
+            # Consume the results to raise any error from the workers.
+            for _ in executor.map(_map_tile_row, tasks):
+                pass
+
+        return out[:height, :width].copy()
+    finally:
+        del source, out
+        for memory in (source_memory, out_memory):
+            memory.close()
+            memory.unlink()
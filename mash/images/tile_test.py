@@ -1,8 +1,30 @@
+import os
+import tempfile
 import unittest
+from itertools import product
+from unittest.mock import patch
 
 import numpy as np
+import tifffile
+from parameterized import parameterized
+from PIL import Image, ImageFile
 
-from mash.images import image_to_tiles
+from mash.images import (
+    image_to_tiles,
+    map_tiles,
+    tile_batches_from_uri,
+    tile_grid,
+    tiles_from_uri,
+    tiles_to_image,
+)
+
+
+def _invert(tile: np.ndarray) -> np.ndarray:
+    return 255 - tile
+
+
+def _tile_mean(tile: np.ndarray) -> np.ndarray:
+    return np.full(tile.shape[:2], tile.mean(), dtype=np.float32)
 
 
 class TestImageToTilesComplete(unittest.TestCase):
@@ -56,3 +78,291 @@ class TestImageToTilesComplete(unittest.TestCase):
         image = np.arange(10 * 10).reshape((10, 10))
         with self.assertRaises(TypeError):
             tiles = image_to_tiles(image, 5.5, 5.5)
+
+
+class TestTileGrid(unittest.TestCase):
+    def setUp(self):
+        self.image = np.arange(50 * 70 * 3).reshape((50, 70, 3))
+
+    @parameterized.expand(
+        [
+            (10, 10, None, None),
+            (16, 12, 4, 2),
+            (70, 50, None, None),
+            (7, 9, 6, 8),
+        ]
+    )
+    def test_matches_slicing(self, tile_width, tile_height, overlap_w, overlap_h):
+        grid = tile_grid(self.image, tile_width, tile_height, overlap_w, overlap_h)
+        stride_x = tile_width - (overlap_w or 0)
+        stride_y = tile_height - (overlap_h or 0)
+
+        self.assertEqual(grid.shape[2:], (tile_height, tile_width, 3))
+        self.assertEqual(grid.shape[0], (50 - tile_height) // stride_y + 1)
+        self.assertEqual(grid.shape[1], (70 - tile_width) // stride_x + 1)
+        for y, x in product(range(grid.shape[0]), range(grid.shape[1])):
+            expected = self.image[
+                y * stride_y : y * stride_y + tile_height,
+                x * stride_x : x * stride_x + tile_width,
+            ]
+            np.testing.assert_array_equal(grid[y, x], expected)
+
+    def test_view_shares_memory(self):
+        grid = tile_grid(self.image, 10, 10, 5, 5)
+        self.assertTrue(np.shares_memory(grid, self.image))
+        self.assertFalse(grid.flags.writeable)
+
+    def test_copy(self):
+        grid = tile_grid(self.image, 10, 10, 5, 5, copy=True)
+        self.assertFalse(np.shares_memory(grid, self.image))
+        self.assertTrue(grid.flags.c_contiguous)
+        np.testing.assert_array_equal(grid, tile_grid(self.image, 10, 10, 5, 5))
+
+    def test_grayscale(self):
+        grid = tile_grid(self.image[..., 0], 10, 25)
+        self.assertEqual(grid.shape, (2, 7, 25, 10))
+
+    def test_tile_larger_than_image(self):
+        grid = tile_grid(self.image, 80, 10)
+        self.assertEqual(grid.shape, (0, 0, 10, 80, 3))
+
+    def test_matches_image_to_tiles(self):
+        tiles = image_to_tiles(self.image, 16, 12, 4, 2)
+        grid = tile_grid(self.image, 16, 12, 4, 2)
+        np.testing.assert_array_equal(tiles, grid.reshape(tiles.shape))
+
+    def test_image_to_tiles_copies(self):
+        tiles = image_to_tiles(self.image, 70, 50)
+        self.assertFalse(np.shares_memory(tiles, self.image))
+        self.assertTrue(tiles.flags.writeable)
+
+    def test_invalid_overlap_raises(self):
+        with self.assertRaises(ValueError):
+            tile_grid(self.image, 10, 10, 10, 0)
+
+
+class TestTilesToImage(unittest.TestCase):
+    def setUp(self):
+        self.image = np.random.default_rng(0).random((50, 70, 3)).astype(np.float32)
+
+    @parameterized.expand(
+        product(
+            [(10, 10, None, None), (16, 12, 4, 2), (7, 9, 6, 8)],
+            ["mean", "max", "feather"],
+            [None, 1, 2],
+        )
+    )
+    def test_round_trip(self, tiling, blend, chunk_rows):
+        tile_width, tile_height, overlap_w, overlap_h = tiling
+        tiles = image_to_tiles(self.image, *tiling)
+        result = tiles_to_image(
+            tiles, 70, 50, overlap_w, overlap_h, blend=blend, chunk_rows=chunk_rows
+        )
+
+        grid = tile_grid(self.image, *tiling)
+        stride_x = tile_width - (overlap_w or 0)
+        stride_y = tile_height - (overlap_h or 0)
+        height = (grid.shape[0] - 1) * stride_y + tile_height
+        width = (grid.shape[1] - 1) * stride_x + tile_width
+
+        self.assertEqual(result.dtype, np.float32)
+        np.testing.assert_allclose(
+            result[:height, :width], self.image[:height, :width], rtol=1e-6
+        )
+        self.assertTrue((result[height:] == 0).all())
+        self.assertTrue((result[:, width:] == 0).all())
+
+    def test_blend_modes(self):
+        tiles = np.stack([np.zeros((4, 4)), np.ones((4, 4))]).astype(np.uint8)
+        mean = tiles_to_image(tiles, 6, 4, overlap_width=2, blend="mean")
+        np.testing.assert_array_equal(mean[0], [0, 0, 0.5, 0.5, 1, 1])
+
+        maximum = tiles_to_image(tiles, 6, 4, overlap_width=2, blend="max")
+        np.testing.assert_array_equal(maximum[0], [0, 0, 1, 1, 1, 1])
+
+        feather = tiles_to_image(tiles, 6, 4, overlap_width=2, blend="feather")
+        np.testing.assert_allclose(feather[0], [0, 0, 1 / 3, 2 / 3, 1, 1])
+
+    def test_grayscale(self):
+        tiles = image_to_tiles(self.image[..., 0], 10, 25)
+        result = tiles_to_image(tiles, 70, 50)
+        np.testing.assert_array_equal(result, self.image[..., 0])
+
+    def test_out(self):
+        tiles = image_to_tiles(self.image, 16, 12, 4, 2)
+        out = np.full(self.image.shape, np.nan, dtype=np.float32)
+        result = tiles_to_image(tiles, 70, 50, 4, 2, out=out)
+        self.assertIs(result, out)
+        np.testing.assert_array_equal(out, tiles_to_image(tiles, 70, 50, 4, 2))
+
+    def test_no_tiles(self):
+        result = tiles_to_image(np.zeros((0, 10, 80, 3)), 70, 50)
+        self.assertEqual(result.shape, (50, 70, 3))
+        self.assertTrue((result == 0).all())
+
+    def test_invalid_arguments_raise(self):
+        tiles = image_to_tiles(self.image, 10, 10)
+        with self.assertRaises(ValueError):
+            tiles_to_image(tiles, 70, 50, blend="median")
+        with self.assertRaises(ValueError):
+            tiles_to_image(tiles, 70, 60)
+        with self.assertRaises(ValueError):
+            tiles_to_image(tiles, 70, 50, chunk_rows=0)
+        with self.assertRaises(ValueError):
+            tiles_to_image(tiles, 70, 50, out=np.zeros((50, 70, 3)))
+        with self.assertRaises(ValueError):
+            tiles_to_image(tiles, 70, 50, out=np.zeros((50, 70), np.float32))
+
+
+class TestTilesFromUri(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+        rng = np.random.default_rng(0)
+        self.image = rng.integers(0, 256, size=(300, 400, 3), dtype=np.uint8)
+
+    def _write(self, name: str) -> str:
+        path = os.path.join(self.directory, name)
+        if name == "tiled.tif":
+            tifffile.imwrite(path, self.image, tile=(64, 64))
+        else:
+            Image.fromarray(self.image).save(path)
+        return path
+
+    @parameterized.expand(
+        product(
+            ["tiled.tif", "striped.tif", "image.png"],
+            [(64, 64, None, None), (100, 70, 20, 10)],
+        )
+    )
+    def test_matches_image_to_tiles(self, name, tiling):
+        tile_width, tile_height, overlap_w, overlap_h = tiling
+        results = list(tiles_from_uri(self._write(name), *tiling))
+
+        grid = tile_grid(self.image, *tiling)
+        self.assertEqual(len(results), grid.shape[0] * grid.shape[1])
+        for x, y, tile in results:
+            expected = self.image[y : y + tile_height, x : x + tile_width]
+            np.testing.assert_array_equal(tile, expected)
+        np.testing.assert_array_equal(
+            np.stack([tile for _, _, tile in results]),
+            image_to_tiles(self.image, *tiling),
+        )
+
+    @parameterized.expand([("tiled.tif",), ("image.png",)])
+    def test_pad_covers_image(self, name):
+        results = list(tiles_from_uri(self._write(name), 128, 128, 16, 16, pad=True))
+
+        coordinates = [(x, y) for x, y, _ in results]
+        self.assertEqual(coordinates[:3], [(0, 0), (112, 0), (224, 0)])
+        self.assertEqual(len(coordinates), 4 * 3)
+        x, y, tile = results[-1]
+        self.assertEqual((x, y), (336, 224))
+        np.testing.assert_array_equal(tile[:76, :64], self.image[224:, 336:])
+        self.assertTrue((tile[76:] == 0).all())
+        self.assertTrue((tile[:, 64:] == 0).all())
+
+    def test_pad_tile_larger_than_image(self):
+        path = self._write("image.png")
+        self.assertEqual(list(tiles_from_uri(path, 500, 500)), [])
+
+        ((x, y, tile),) = tiles_from_uri(path, 500, 500, pad=True)
+        self.assertEqual((x, y, tile.shape), (0, 0, (500, 500, 3)))
+        np.testing.assert_array_equal(tile[:300, :400], self.image)
+
+    def test_tiled_decodes_one_band_at_a_time(self):
+        path = self._write("tiled.tif")
+        decoded = []
+        original_load = ImageFile.ImageFile.load
+
+        def load(image):
+            if image.tile:
+                decoded.append(image.size)
+            return original_load(image)
+
+        with patch.object(ImageFile.ImageFile, "load", load):
+            tiles = list(tiles_from_uri(path, 128, 64))
+
+        self.assertEqual(len(tiles), 3 * 4)
+        self.assertEqual(decoded, [(384, 64)] * 4)
+
+    @parameterized.expand([("tiled.tif",), ("image.png",)])
+    def test_allow_large(self, name):
+        path = self._write(name)
+
+        # The 300x400 image is over twice the lowered limit, a band of tiles is not.
+        with patch.object(Image, "MAX_IMAGE_PIXELS", 20000):
+            with self.assertRaises(Image.DecompressionBombError):
+                next(tiles_from_uri(path, 100, 40))
+
+            tiles = list(tiles_from_uri(path, 100, 40, allow_large=True))
+            batches = list(tile_batches_from_uri(path, 100, 40, 4, allow_large=True))
+
+        self.assertEqual(len(tiles), 4 * 7)
+        np.testing.assert_array_equal(
+            np.stack([tile for _, _, tile in tiles]),
+            np.concatenate([batch for _, batch in batches]),
+        )
+
+    def test_batches(self):
+        path = self._write("tiled.tif")
+        batches = list(tile_batches_from_uri(path, 64, 64, batch_size=5))
+
+        self.assertEqual([len(tiles) for _, tiles in batches], [5, 5, 5, 5, 4])
+        coordinates = np.concatenate([coordinates for coordinates, _ in batches])
+        tiles = np.concatenate([tiles for _, tiles in batches])
+        np.testing.assert_array_equal(tiles, image_to_tiles(self.image, 64, 64))
+        self.assertEqual(coordinates[7].tolist(), [64, 64])
+
+    def test_invalid_arguments_raise(self):
+        path = self._write("image.png")
+        with self.assertRaises(ValueError):
+            next(tiles_from_uri(path, 0, 64))
+        with self.assertRaises(ValueError):
+            next(tile_batches_from_uri(path, 64, 64, batch_size=0))
+
+
+class TestMapTiles(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.image = rng.integers(0, 256, size=(300, 401, 3), dtype=np.uint8)
+
+    @parameterized.expand(product([None, 2], [False, True]))
+    def test_pointwise_function_matches_image(self, workers, pad):
+        result = map_tiles(self.image, _invert, 64, 64, 16, 8, workers, pad)
+
+        # Without padding only the 288x400 top left is covered by tiles.
+        height, width = (300, 401) if pad else (288, 400)
+        self.assertEqual(result.shape, self.image.shape)
+        np.testing.assert_array_equal(
+            result[:height, :width], 255 - self.image[:height, :width]
+        )
+        self.assertTrue((result[height:] == 0).all())
+        self.assertTrue((result[:, width:] == 0).all())
+
+    @parameterized.expand([(None,), (2,)])
+    def test_overlap_is_split_between_tiles(self, workers):
+        image = np.arange(12 * 10, dtype=np.float32).reshape(12, 10)
+        result = map_tiles(image, _tile_mean, 6, 6, 2, 0, workers)
+
+        # Tiles start every 4 columns, each owns the columns up to the middle of
+        # its overlap with the next one.
+        for columns, x in [(slice(0, 5), 0), (slice(5, 10), 4)]:
+            for rows, y in [(slice(0, 6), 0), (slice(6, 12), 6)]:
+                expected = image[y : y + 6, x : x + 6].mean()
+                np.testing.assert_allclose(result[rows, columns], expected)
+
+    def test_output_dtype_and_channels_follow_function(self):
+        result = map_tiles(self.image, _tile_mean, 100, 100, workers=2)
+        self.assertEqual(result.shape, (300, 401))
+        self.assertEqual(result.dtype, np.float32)
+
+    def test_invalid_arguments_raise(self):
+        with self.assertRaises(ValueError):
+            map_tiles(self.image, _invert, 64, 64, workers=0)
+        with self.assertRaises(ValueError):
+            map_tiles(self.image, _invert, 500, 64)
+        with self.assertRaises(ValueError):
+            map_tiles(self.image, lambda tile: tile[:10], 64, 64)
@@ -1,28 +1,118 @@
+from typing import Sequence
+
 import numpy as np
 
+# Number of pixels composited at a time, bounds the uint16 scratch arrays.
+_COMPOSITE_BLOCK_SIZE = 1 << 18
+
+
+def _divide_255(values: np.ndarray) -> np.ndarray:
+    """Divide uint16 values up to 255 * 255 by 255, rounding to nearest."""
+    values += 128
+    values += values >> 8
+    values >>= 8
+    return values
+
+
+def _composite(
+    image: np.ndarray,
+    background: np.ndarray,
+    premultiplied: bool,
+    out: np.ndarray,
+) -> None:
+    """Composite an HW4 image over a background into an HW3 output.
+
+    Works on blocks of rows one channel plane at a time, which keeps the inner
+    loops long and the scratch arrays small.
+    """
+    row_size = max(1, image.shape[1])
+    rows_per_block = max(1, _COMPOSITE_BLOCK_SIZE // row_size)
+    integer = image.dtype == np.uint8
+
+    for start in range(0, image.shape[0], rows_per_block):
+        block = image[start : start + rows_per_block]
+        target = out[start : start + rows_per_block]
 
-def transparent_to_rgb(image: np.ndarray) -> np.ndarray:
-    """Convert a transparent image to RGB by dropping the transparency.
+        # color * alpha + background * (255 - alpha) is at most 255 * 255, so
+        # uint8 images fit in uint16.
+        if integer:
+            alpha = block[..., 3].astype(np.uint16)
+            inverse = 255 - alpha
+        else:
+            alpha = block[..., 3]
+            inverse = 1 - alpha
+        value = np.empty_like(inverse)
+
+        for channel in range(3):
+            np.multiply(inverse, background[channel], out=value)
+            if integer and premultiplied:
+                _divide_255(value)
+                value += block[..., channel]
+                np.minimum(value, 255, out=value)
+            elif integer:
+                value += block[..., channel] * alpha
+                _divide_255(value)
+            elif premultiplied:
+                value += block[..., channel]
+            else:
+                value += block[..., channel] * alpha
+            target[..., channel] = value
+
+
+def transparent_to_rgb(
+    image: np.ndarray,
+    background: float | Sequence[float] | None = None,
+    premultiplied: bool = False,
+) -> np.ndarray:
+    """Convert a transparent image to RGB.
+
+    By default the transparency is dropped, which is free but leaves the color
+    of transparent pixels as stored. With a background the image is composited
+    over it instead, in integer math for uint8 images.
 
     Args:
-        image: The transparent image.
+        image: The transparent image, HW4 or a batch of them.
+        background: Optional color to composite over, a single value or one per
+            channel, in the range of the image (0-255 for uint8, 0-1 for floats).
+        premultiplied: Whether the colors are already multiplied by alpha.
 
     Returns:
         The RGB image.
     """
-    if image.ndim != 3:
+    if image.ndim < 3:
         raise ValueError("Input must be 3D.")
-    if image.shape[2] != 4:
+    if image.shape[-1] != 4:
         raise ValueError("Input must have 4 channels.")
 
-    return image[:, :, :3]
+    if background is None:
+        return image[..., :3]
 
+    if image.dtype == np.uint8:
+        background_array = np.broadcast_to(np.asarray(background), (3,))
+        if (background_array < 0).any() or (background_array > 255).any():
+            raise ValueError("Background must be in the range 0-255 for uint8.")
+        background_array = background_array.astype(np.uint16)
+    elif np.issubdtype(image.dtype, np.floating):
+        background_array = np.broadcast_to(
+            np.asarray(background, dtype=image.dtype), (3,)
+        )
+    else:
+        raise ValueError(f"Image must be of type uint8 or float, got {image.dtype}")
 
-def grayscale_to_rgb(image: np.ndarray) -> np.ndarray:
+    out = np.empty(image.shape[:-1] + (3,), dtype=image.dtype)
+    for index in np.ndindex(image.shape[:-3]):
+        _composite(image[index], background_array, premultiplied, out[index])
+
+    return out
+
+
+def grayscale_to_rgb(image: np.ndarray, view: bool = False) -> np.ndarray:
     """Convert a grayscale image to RGB by duplicating the channels.
 
     Args:
         image: The grayscale image.
+        view: Return a read-only view that repeats the channel instead of a
+            copy, which takes no extra memory.
 
     Returns:
         The RGB image.
@@ -33,4 +123,7 @@ def grayscale_to_rgb(image: np.ndarray) -> np.ndarray:
     if image.ndim == 2:
         image = np.expand_dims(image, axis=2)
 
+    if view:
+        return np.broadcast_to(image, image.shape[:2] + (3,))
+
     return np.concatenate([image] * 3, axis=2)
@@ -1,6 +1,7 @@
 import unittest
 
 import numpy as np
+from parameterized import parameterized
 
 from mash.images import truecolor
 
@@ -22,6 +23,52 @@ class TransparentToRgbTests(unittest.TestCase):
         with self.assertRaises(ValueError):
             truecolor.transparent_to_rgb(image)
 
+    def test_composites_over_background(self):
+        image = np.array([[[200, 100, 0, 255], [200, 100, 0, 0], [200, 100, 0, 128]]])
+        result = truecolor.transparent_to_rgb(image.astype(np.uint8), (0, 0, 255))
+        self.assertEqual(result.dtype, np.uint8)
+        np.testing.assert_array_equal(
+            result[0], [[200, 100, 0], [0, 0, 255], [100, 50, 127]]
+        )
+
+    def test_composite_matches_float(self):
+        rng = np.random.default_rng(0)
+        image = rng.integers(0, 256, (2, 30, 40, 4), dtype=np.uint8)
+        background = np.array([10, 200, 255])
+        result = truecolor.transparent_to_rgb(image, background)
+
+        alpha = image[..., 3:] / 255
+        expected = np.rint(image[..., :3] * alpha + background * (1 - alpha))
+        self.assertEqual(result.shape, (2, 30, 40, 3))
+        np.testing.assert_array_equal(result, expected)
+
+    @parameterized.expand([(np.uint8, 255), (np.float32, 1.0)])
+    def test_premultiplied(self, dtype, scale):
+        image = np.array([[[0.5, 0.25, 0, 0.5]]]) * scale
+        result = truecolor.transparent_to_rgb(
+            image.astype(dtype), scale, premultiplied=True
+        )
+        self.assertEqual(result.dtype, dtype)
+        np.testing.assert_allclose(
+            result[0, 0], np.array([1, 0.75, 0.5]) * scale, atol=1
+        )
+
+    def test_float_composite_keeps_dtype(self):
+        image = np.random.rand(10, 10, 4).astype(np.float32)
+        result = truecolor.transparent_to_rgb(image, 1.0)
+        self.assertEqual(result.dtype, np.float32)
+        expected = image[..., :3] * image[..., 3:] + (1 - image[..., 3:])
+        np.testing.assert_allclose(result, expected, rtol=1e-6)
+
+    def test_invalid_background_raises(self):
+        image = np.zeros((10, 10, 4), dtype=np.uint8)
+        with self.assertRaises(ValueError):
+            truecolor.transparent_to_rgb(image, 256)
+        with self.assertRaises(ValueError):
+            truecolor.transparent_to_rgb(image, (0, 0))
+        with self.assertRaises(ValueError):
+            truecolor.transparent_to_rgb(image.astype(np.int32), 0)
+
 
 class GrayscaleToRgbTests(unittest.TestCase):
     def test_2d_input_duplicates_channels(self):
@@ -43,6 +90,15 @@ class GrayscaleToRgbTests(unittest.TestCase):
         with self.assertRaises(ValueError):
             truecolor.grayscale_to_rgb(image)
 
+    @parameterized.expand([((100, 100),), ((100, 100, 1),)])
+    def test_view(self, shape):
+        image = np.random.randint(0, 256, shape, dtype=np.uint8)
+        result = truecolor.grayscale_to_rgb(image, view=True)
+        self.assertEqual(result.shape, (100, 100, 3))
+        self.assertTrue(np.shares_memory(result, image))
+        self.assertFalse(result.flags.writeable)
+        np.testing.assert_array_equal(result, truecolor.grayscale_to_rgb(image))
+
 
 if __name__ == "__main__":
     unittest.main()